@@ -0,0 +1,186 @@
+"""Seeded generator of synthetic P&ID drawing text.
+
+The generated corpus mimics what the frontend sends to the extraction
+endpoints: a map of PDF filename -> {page_number: page_text}. Every page
+carries a title block, general notes and a legend that repeat across the
+drawing set, plus a body of line numbers, instrument and equipment tags.
+"""
+
+import random
+from dataclasses import dataclass
+
+SIZES: dict[str, tuple[int, int]] = {
+    "tiny": (2, 2),
+    "small": (20, 3),
+    "medium": (200, 4),
+    "large": (1000, 5),
+}
+"""Preset corpus sizes as (files, pages_per_file)."""
+
+LINE_SIZES = ["1/2", "3/4", "1", "2", "3", "4", "6", "8", "10", "12", "16", "24"]
+FLUID_CODES = ["FG", "CWS", "CWR", "LP", "HP", "PW", "IA", "N2", "FW", "VNT", "DR"]
+PIPE_CLASSES = ["A1A", "B2C", "C3F", "D1B", "E5A"]
+INSTRUMENT_PREFIXES = ["FT", "FIC", "PT", "PIC", "TT", "TIC", "LT", "LIC", "PSV"]
+VALVE_PREFIXES = ["HV", "XV", "FV", "PV", "LV", "TV"]
+EQUIPMENT_PREFIXES = ["P", "V", "E", "T", "C", "K"]
+FILLER_WORDS = [
+    "TO",
+    "FROM",
+    "SEE",
+    "DETAIL",
+    "CONT",
+    "ON",
+    "SHEET",
+    "NORMALLY",
+    "CLOSED",
+    "OPEN",
+    "VENT",
+    "DRAIN",
+    "HOLD",
+    "FOR",
+    "TIE-IN",
+    "BATTERY",
+    "LIMIT",
+]
+
+NOTES = (
+    "GENERAL NOTES:\n"
+    "1. ALL DIMENSIONS ARE IN MILLIMETRES UNLESS OTHERWISE NOTED.\n"
+    "2. LINE NUMBERS SHOWN AS SIZE-SERVICE-SEQUENCE-CLASS.\n"
+    '3. ALL VENTS AND DRAINS TO BE 3/4" UNLESS OTHERWISE NOTED.\n'
+    "4. INSTRUMENT TAGS PER PROJECT INSTRUMENT INDEX.\n"
+)
+
+LEGEND = (
+    "LEGEND:\n"
+    "FT - FLOW TRANSMITTER    PT - PRESSURE TRANSMITTER\n"
+    "TT - TEMPERATURE TRANSMITTER    LT - LEVEL TRANSMITTER\n"
+    "PSV - PRESSURE SAFETY VALVE    XV - SHUTDOWN VALVE\n"
+)
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """Parameters controlling the size and shape of a synthetic corpus."""
+
+    files: int = 20
+    pages_per_file: int = 3
+    tags_per_page: int = 60
+    filler_per_tag: int = 6
+    seed: int = 42
+
+    @classmethod
+    def from_size(cls, size: str, seed: int = 42) -> "CorpusSpec":
+        """Build a spec from one of the named presets in ``SIZES``."""
+        if size not in SIZES:
+            raise ValueError(
+                f"Unknown corpus size '{size}'. Choose from: {', '.join(SIZES)}"
+            )
+        files, pages = SIZES[size]
+        return cls(files=files, pages_per_file=pages, seed=seed)
+
+
+def line_number(rng: random.Random) -> str:
+    """Return a pipe line number such as ``10"-FG-001``."""
+    return (
+        f'{rng.choice(LINE_SIZES)}"-{rng.choice(FLUID_CODES)}-{rng.randint(1, 999):03d}'
+    )
+
+
+def line_number_with_class(rng: random.Random) -> str:
+    """Return a full line number such as ``6"-CWS-105-B2C``."""
+    return f"{line_number(rng)}-{rng.choice(PIPE_CLASSES)}"
+
+
+def instrument_tag(rng: random.Random) -> str:
+    """Return an instrument tag such as ``FIC-1203``."""
+    return f"{rng.choice(INSTRUMENT_PREFIXES)}-{rng.randint(1000, 9999)}"
+
+
+def valve_tag(rng: random.Random) -> str:
+    """Return a valve tag such as ``XV-2041A``."""
+    suffix = rng.choice(["", "", "A", "B"])
+    return f"{rng.choice(VALVE_PREFIXES)}-{rng.randint(1000, 9999)}{suffix}"
+
+
+def equipment_tag(rng: random.Random) -> str:
+    """Return an equipment tag such as ``P-101A``."""
+    return f"{rng.choice(EQUIPMENT_PREFIXES)}-{rng.randint(100, 999)}{rng.choice('AB')}"
+
+
+TAG_GENERATORS = [
+    line_number,
+    line_number,
+    line_number_with_class,
+    instrument_tag,
+    valve_tag,
+    equipment_tag,
+]
+
+
+def filename(project_id: str, sheet: int, revision: str) -> str:
+    """Return a drawing filename carrying project and sheet identifiers."""
+    return f"{project_id}_PID-{sheet:04d}_Rev{revision}.pdf"
+
+
+def title_block(project_id: str, sheet: int, page: int, revision: str) -> str:
+    """Return the title block text printed on every sheet of a drawing."""
+    return (
+        "PIPING AND INSTRUMENTATION DIAGRAM\n"
+        f"PROJECT: {project_id}    DRAWING NO: {project_id}-PID-{sheet:04d}\n"
+        f"SHEET {page} OF {page}    REV {revision}    SCALE: NTS\n"
+        "CLIENT: SYNTHETIC ENERGY CO.    CONTRACTOR: TEXTHUNTER ENGINEERING\n"
+    )
+
+
+def page_body(rng: random.Random, spec: CorpusSpec) -> str:
+    """Return the drawing body: tags interleaved with annotation words."""
+    tokens: list[str] = []
+    for _ in range(spec.tags_per_page):
+        tokens.append(rng.choice(TAG_GENERATORS)(rng))
+        tokens.extend(rng.choices(FILLER_WORDS, k=rng.randint(0, spec.filler_per_tag)))
+    lines = []
+    for i in range(0, len(tokens), 12):
+        lines.append(" ".join(tokens[i : i + 12]))
+    return "\n".join(lines)
+
+
+def generate_corpus(spec: CorpusSpec | None = None) -> dict[str, dict[int, str]]:
+    """Generate a deterministic corpus for the given spec.
+
+    Args:
+        spec: Size and seed of the corpus; defaults to ``CorpusSpec()``
+
+    Returns:
+        Map of filename -> {page_number: page_text}
+
+    """
+    spec = spec or CorpusSpec()
+    rng = random.Random(spec.seed)
+    projects = [f"{rng.randint(2020, 2026)}{rng.choice('ABCDE')}" for _ in range(4)]
+
+    corpus: dict[str, dict[int, str]] = {}
+    for sheet in range(1, spec.files + 1):
+        project_id = rng.choice(projects)
+        revision = rng.choice("0123ABC")
+        pages: dict[int, str] = {}
+        for page in range(1, spec.pages_per_file + 1):
+            pages[page] = "\n".join(
+                [
+                    title_block(project_id, sheet, page, revision),
+                    page_body(rng, spec),
+                    NOTES,
+                    LEGEND,
+                ]
+            )
+        corpus[filename(project_id, sheet, revision)] = pages
+    return corpus
+
+
+def corpus_bytes(text_content: dict[str, dict[int, str]]) -> int:
+    """Return the UTF-8 size of all page text in a corpus."""
+    return sum(
+        len(text.encode("utf-8"))
+        for pages in text_content.values()
+        for text in pages.values()
+    )
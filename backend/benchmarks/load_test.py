@@ -0,0 +1,150 @@
+"""Load test for multi-worker serving with a shared corpus store.
+
+Starts the API with different worker counts, uploads one synthetic corpus
+to ``/corpora`` and fires concurrent ``/extract`` requests that reference
+it by ``corpus_id``. Requests land on arbitrary workers, so every success
+also shows that a corpus uploaded to one worker is usable from the others.
+
+Usage::
+
+    uv run python -m benchmarks.load_test --workers 1 4 --size medium
+
+Each request carries a unique regex comment so the shared result cache
+does not answer it; pass ``--allow-cache`` to measure cache hits instead.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from benchmarks.corpus import SIZES, CorpusSpec, generate_corpus
+from benchmarks.run import FILE_IDENTIFIER_REGEX, KEYWORD_REGEX
+
+
+def _wait_until_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start within {timeout}s")
+
+
+def run_load(
+    base_url: str,
+    corpus_id: str,
+    requests: int,
+    concurrency: int,
+    allow_cache: bool,
+) -> dict:
+    """Send concurrent extraction requests and summarize latencies."""
+
+    def one(i: int) -> tuple[float, bool]:
+        pattern = KEYWORD_REGEX if allow_cache else f"{KEYWORD_REGEX}(?#req{i})"
+        start = time.perf_counter()
+        response = client.post(
+            f"{base_url}/extract",
+            json={
+                "corpus_id": corpus_id,
+                "keyword_regex": pattern,
+                "file_identifier_regex": FILE_IDENTIFIER_REGEX,
+            },
+        )
+        return time.perf_counter() - start, response.status_code == 200
+
+    with httpx.Client(timeout=120.0) as client:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(one, range(requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        "requests": requests,
+        "errors": sum(1 for _, ok in results if not ok),
+        "seconds": elapsed,
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--size", choices=list(SIZES), default="small")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--allow-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    text_content = generate_corpus(CorpusSpec.from_size(args.size))
+    base_url = f"http://127.0.0.1:{args.port}"
+    failed = False
+
+    print(f"{'workers':>7} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as store_dir:
+            env = {
+                **os.environ,
+                "TEXTHUNTER_STORE_DIR": store_dir,
+                # Let the admission queue absorb the whole burst
+                "TEXTHUNTER_MAX_QUEUED_EXTRACTIONS": str(args.requests),
+            }
+            server = subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "texthunter",
+                    "--host",
+                    "127.0.0.1",
+                    "--port",
+                    str(args.port),
+                    "--workers",
+                    str(workers),
+                ],
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                _wait_until_ready(base_url)
+                upload = httpx.post(
+                    f"{base_url}/corpora",
+                    json={"text_content": text_content},
+                    timeout=120.0,
+                )
+                upload.raise_for_status()
+                stats = run_load(
+                    base_url,
+                    upload.json()["corpus_id"],
+                    args.requests,
+                    args.concurrency,
+                    args.allow_cache,
+                )
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+        failed = failed or stats["errors"] > 0
+        print(
+            f"{workers:>7} {stats['rps']:>9.1f} {stats['p50_ms']:>9.1f} "
+            f"{stats['p95_ms']:>9.1f} {stats['errors']:>7}"
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""Benchmark runner for extraction, regex generation and Excel export.
+
+Usage::
+
+    uv run python -m benchmarks.run --size small
+    uv run python -m benchmarks.run --size medium --save benchmarks/baseline.json
+    uv run python -m benchmarks.run --size medium --compare benchmarks/baseline.json
+
+Each benchmark is timed over several repeats (best run wins) and then run
+once more under ``tracemalloc`` to record peak Python memory. Results can
+be written to JSON and compared against a stored baseline; throughput drops
+or memory growth beyond the tolerance are reported as regressions.
+"""
+
+import argparse
+import json
+import logging
+import platform
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.corpus import SIZES, CorpusSpec, corpus_bytes, generate_corpus
+
+KEYWORD_REGEX = r'\d+(?:/\d+)?"-[A-Z0-9]+-\d{3}'
+FILE_IDENTIFIER_REGEX = r"^(\d{4}[A-E])_PID-(\d{4})"
+GUESS_EXAMPLES = ['10"-FG-001', '2"-CWS-505', '6"-HP-120', '24"-DR-999']
+
+
+@dataclass
+class BenchmarkResult:
+    """Timing and memory figures for one benchmark."""
+
+    name: str
+    seconds: float
+    throughput: float
+    unit: str
+    peak_mb: float
+
+
+@dataclass
+class Benchmark:
+    """A named workload and how to express its throughput."""
+
+    name: str
+    func: Callable[[], object]
+    work: float
+    unit: str
+
+
+def _measure(bench: Benchmark, repeats: int) -> BenchmarkResult:
+    """Time a benchmark and record its peak traced memory."""
+    bench.func()  # warm-up: regex compilation, imports, caches
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        bench.func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        bench.func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(
+        name=bench.name,
+        seconds=best,
+        throughput=bench.work / best if best > 0 else float("inf"),
+        unit=bench.unit,
+        peak_mb=peak / 1_000_000,
+    )
+
+
+def build_benchmarks(text_content: dict[str, dict[int, str]]) -> list[Benchmark]:
+    """Create the benchmark workloads for a corpus."""
+    from fastapi.testclient import TestClient
+
+    from texthunter.core.excel import build_dataframe, generate_excel
+    from texthunter.core.regex import extract_matches, guess_regex
+    from texthunter.main import app
+
+    megabytes = corpus_bytes(text_content) / 1_000_000
+    matches = list(extract_matches(text_content, KEYWORD_REGEX, FILE_IDENTIFIER_REGEX))
+    match_dicts = [m.model_dump() for m in matches]
+    payload = {
+        "filenames": list(text_content),
+        "file_identifier_regex": FILE_IDENTIFIER_REGEX,
+        "keyword_regex": KEYWORD_REGEX,
+        "text_content": text_content,
+    }
+    client = TestClient(app)
+
+    def http_post(path: str, body: dict) -> Callable[[], object]:
+        def call() -> object:
+            response = client.post(path, json=body)
+            response.raise_for_status()
+            return response.content
+
+        return call
+
+    return [
+        Benchmark(
+            "extract_matches",
+            lambda: list(
+                extract_matches(text_content, KEYWORD_REGEX, FILE_IDENTIFIER_REGEX)
+            ),
+            megabytes,
+            "MB/s",
+        ),
+        Benchmark(
+            "guess_regex",
+            lambda: guess_regex(GUESS_EXAMPLES),
+            len(GUESS_EXAMPLES),
+            "examples/s",
+        ),
+        Benchmark(
+            "build_dataframe",
+            lambda: build_dataframe(matches),
+            len(matches),
+            "rows/s",
+        ),
+        Benchmark(
+            "generate_excel",
+            lambda: generate_excel(matches),
+            len(matches),
+            "rows/s",
+        ),
+        Benchmark("http_extract", http_post("/extract", payload), megabytes, "MB/s"),
+        Benchmark(
+            "http_extract_all", http_post("/extract-all", payload), megabytes, "MB/s"
+        ),
+        Benchmark(
+            "http_guess_regex",
+            http_post("/guess-regex", {"examples": GUESS_EXAMPLES}),
+            len(GUESS_EXAMPLES),
+            "examples/s",
+        ),
+        Benchmark(
+            "http_export",
+            http_post("/export", {"matches": match_dicts, "include_context": True}),
+            len(matches),
+            "rows/s",
+        ),
+    ]
+
+
+def run_benchmarks(
+    spec: CorpusSpec, repeats: int = 3, only: list[str] | None = None
+) -> dict:
+    """Run all (or the selected) benchmarks against a generated corpus.
+
+    Args:
+        spec: Corpus size and seed
+        repeats: Timed runs per benchmark; the fastest is kept
+        only: Optional list of benchmark names to run
+
+    Returns:
+        Report dict with ``meta`` and ``results`` keys, suitable for JSON
+
+    """
+    text_content = generate_corpus(spec)
+    benchmarks = build_benchmarks(text_content)
+    if only:
+        benchmarks = [b for b in benchmarks if b.name in only]
+
+    results = {b.name: asdict(_measure(b, repeats)) for b in benchmarks}
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "corpus": asdict(spec),
+            "corpus_bytes": corpus_bytes(text_content),
+            "repeats": repeats,
+        },
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float = 0.1) -> list[str]:
+    """Compare a report against a baseline and describe regressions.
+
+    Args:
+        report: Report produced by ``run_benchmarks``
+        baseline: Previously saved report
+        tolerance: Allowed relative throughput drop or memory growth
+
+    Returns:
+        List of human-readable regression descriptions (empty if none)
+
+    """
+    regressions = []
+    if report["meta"]["corpus"] != baseline["meta"]["corpus"]:
+        regressions.append(
+            "Corpus spec differs from baseline; results are not comparable"
+        )
+        return regressions
+
+    for name, current in report["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        speed = current["throughput"] / previous["throughput"]
+        if speed < 1 - tolerance:
+            regressions.append(
+                f"{name}: throughput {speed:.0%} of baseline "
+                f"({current['throughput']:.2f} vs {previous['throughput']:.2f} "
+                f"{current['unit']})"
+            )
+        if previous["peak_mb"] > 0:
+            memory = current["peak_mb"] / previous["peak_mb"]
+            if memory > 1 + tolerance:
+                regressions.append(
+                    f"{name}: peak memory {memory:.0%} of baseline "
+                    f"({current['peak_mb']:.1f} vs {previous['peak_mb']:.1f} MB)"
+                )
+    return regressions
+
+
+def format_report(report: dict, baseline: dict | None = None) -> str:
+    """Render a report as a plain-text table."""
+    lines = [
+        f"{'benchmark':<20} {'seconds':>10} {'throughput':>21} "
+        f"{'peak MB':>9} {'vs base':>8}"
+    ]
+    for name, r in report["results"].items():
+        ratio = ""
+        if baseline and name in baseline["results"]:
+            ratio = f"{r['throughput'] / baseline['results'][name]['throughput']:.2f}x"
+        lines.append(
+            f"{name:<20} {r['seconds']:>10.4f} "
+            f"{r['throughput']:>10.2f} {r['unit']:<10} {r['peak_mb']:>9.1f} {ratio:>8}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=list(SIZES), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--only", nargs="*", help="Benchmark names to run")
+    parser.add_argument("--save", type=Path, help="Write the report to this file")
+    parser.add_argument("--compare", type=Path, help="Baseline report to compare")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    # Per-page debug logging would dominate the timings
+    for name in ("texthunter", "httpx", "asyncio"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    report = run_benchmarks(
+        CorpusSpec.from_size(args.size, args.seed), args.repeats, args.only
+    )
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print(format_report(report, baseline))
+
+    if args.save:
+        args.save.write_text(json.dumps(report, indent=2))
+        print(f"Report saved to {args.save}")
+
+    if baseline:
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""Tests for admission control and request size limits."""
+
+import asyncio
+import threading
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from texthunter.api.admission import (
+    AdmissionController,
+    BodySizeLimitMiddleware,
+    MemoryBudget,
+    per_worker,
+)
+from texthunter.main import app
+
+
+def _controller(
+    max_concurrent: int = 1,
+    max_queued: int = 1,
+    queue_timeout: float = 1.0,
+    budget: MemoryBudget | None = None,
+) -> AdmissionController:
+    return AdmissionController(
+        "test",
+        max_concurrent,
+        max_queued,
+        queue_timeout,
+        budget or MemoryBudget(0),
+        retry_after=7,
+    )
+
+
+class TestAdmissionController:
+    """Tests for concurrency, queueing and memory admission."""
+
+    def test_queued_request_admitted_on_release(self):
+        """Test that a waiting request runs once a slot frees up."""
+        controller = _controller()
+
+        async def scenario():
+            await controller.acquire()
+            waiter = asyncio.create_task(controller.acquire())
+            await asyncio.sleep(0)
+            assert controller.queued == 1
+            controller.release()
+            waited = await waiter
+            assert controller.active == 1
+            assert waited >= 0
+            controller.release()
+
+        asyncio.run(scenario())
+        assert controller.snapshot()["admitted"] == 2
+
+    def test_queue_full_rejected_with_429(self):
+        """Test that requests beyond the queue limit get 429 and Retry-After."""
+        controller = _controller(max_queued=0)
+
+        async def scenario():
+            await controller.acquire()
+            with pytest.raises(HTTPException) as exc:
+                await controller.acquire()
+            return exc.value
+
+        error = asyncio.run(scenario())
+        assert error.status_code == 429
+        assert error.headers["Retry-After"] == "7"
+
+    def test_queue_timeout_rejected_with_503(self):
+        """Test that a request waiting too long gets 503."""
+        controller = _controller(queue_timeout=0.01)
+
+        async def scenario():
+            await controller.acquire()
+            with pytest.raises(HTTPException) as exc:
+                await controller.acquire()
+            return exc.value
+
+        error = asyncio.run(scenario())
+        assert error.status_code == 503
+        assert controller.queued == 0
+        assert controller.snapshot()["rejected_timeout"] == 1
+
+    def test_memory_budget(self):
+        """Test memory-aware admission shared between controllers."""
+        budget = MemoryBudget(100)
+        extract = _controller(max_concurrent=5, budget=budget)
+        export = _controller(max_concurrent=5, budget=budget)
+
+        async def scenario():
+            with pytest.raises(HTTPException) as exc:
+                await extract.acquire(101)
+            assert exc.value.status_code == 413
+
+            await export.acquire(80)
+            waiter = asyncio.create_task(extract.acquire(50))
+            await asyncio.sleep(0)
+            assert extract.queued == 1
+            export.release(80)
+            await waiter
+            assert budget.in_use == 50
+            extract.release(50)
+
+        asyncio.run(scenario())
+        assert budget.in_use == 0
+
+    def test_budget_share_with_two_workers(self):
+        """Test that a corpus over a worker's share runs alone, not 413."""
+        budget = MemoryBudget(per_worker(100, workers=2), 100)
+        controller = _controller(max_concurrent=5, max_queued=5, budget=budget)
+
+        async def scenario():
+            await controller.acquire(80)
+            waiter = asyncio.create_task(controller.acquire(10))
+            await asyncio.sleep(0)
+            assert controller.queued == 1
+            controller.release(80)
+            await waiter
+            # Over the share of 50, so it waits for the budget to empty
+            large = asyncio.create_task(controller.acquire(60))
+            await asyncio.sleep(0)
+            assert controller.queued == 1
+            controller.release(10)
+            await large
+            controller.release(60)
+
+            with pytest.raises(HTTPException) as exc:
+                await controller.acquire(101)
+            assert exc.value.status_code == 413
+            assert "server limit of 100 bytes" in exc.value.detail
+
+        asyncio.run(scenario())
+        assert budget.in_use == 0
+
+    def test_stats_from_threads(self):
+        """Test that counters stay exact when job threads are admitted."""
+        controller = _controller(max_concurrent=8, budget=MemoryBudget(10))
+
+        def admit(cost: int) -> None:
+            try:
+                with controller.admit_blocking(cost):
+                    pass
+            except HTTPException:
+                pass
+
+        threads = [
+            threading.Thread(target=admit, args=(cost,)) for cost in [1, 11] * 16
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        snapshot = controller.snapshot()
+        assert snapshot["rejected_too_large"] == 16
+        others = ("admitted", "rejected_queue_full", "rejected_timeout")
+        assert sum(snapshot[name] for name in others) == 16
+        assert controller.active == 0
+
+    def test_limits_split_between_workers(self):
+        """Test that each worker process gets its share of a limit."""
+        assert per_worker(16, workers=4) == 4
+        assert per_worker(2, workers=4) == 1
+        assert per_worker(1024, workers=1) == 1024
+        assert per_worker(0, workers=4) == 0
+
+
+class TestBodySizeLimit:
+    """Tests for the request body size middleware."""
+
+    @pytest.fixture
+    def client(self):
+        """Return a client for a tiny app with a 10 byte body limit."""
+        small_app = FastAPI()
+        small_app.add_middleware(BodySizeLimitMiddleware, max_bytes=10)
+
+        @small_app.post("/echo")
+        async def echo(request: Request):
+            return {"size": len(await request.body())}
+
+        return TestClient(small_app)
+
+    def test_within_limit(self, client):
+        """Test that small bodies pass through."""
+        assert client.post("/echo", content=b"12345").json() == {"size": 5}
+
+    def test_declared_length_too_large(self, client):
+        """Test that an oversized Content-Length is rejected with 413."""
+        assert client.post("/echo", content=b"x" * 11).status_code == 413
+
+    def test_chunked_body_too_large(self, client):
+        """Test that an oversized body without Content-Length is rejected."""
+        response = client.post("/echo", content=iter([b"x" * 6, b"x" * 6]))
+        assert response.status_code == 413
+
+    def test_streamed_body_passes(self, client):
+        """Test that NDJSON bodies are left for their route to cap."""
+        response = client.post(
+            "/echo",
+            content=iter([b"x" * 6, b"x" * 6]),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert response.json() == {"size": 12}
+
+
+def test_health_reports_admission():
+    """Test that /health reports queue depth and wait times."""
+    data = TestClient(app).get("/health").json()
+    assert data["admission"]["extract"]["queued"] == 0
+    assert "avg_wait_seconds" in data["admission"]["export"]
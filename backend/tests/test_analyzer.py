@@ -0,0 +1,198 @@
+"""Tests for the regex cost analyzer and optimizer."""
+
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+from texthunter.core import analyzer
+from texthunter.core.analyzer import (
+    analyze_pattern,
+    auto_optimize,
+    is_bytes_safe,
+    is_segment_safe,
+    optimize_pattern,
+)
+from texthunter.main import app
+
+SAMPLES = [
+    'Line connects to 10"-FG-001 at valve',
+    'abd ABC abcxx ac a-b ]x\n2"-CWS-505 end',
+    "tag V-101 V-102a, bc bcbc",
+]
+
+
+def _all_matches(pattern: str) -> list[tuple]:
+    compiled = re.compile(pattern)
+    return [(m.span(), m.groups()) for s in SAMPLES for m in compiled.finditer(s)]
+
+
+class TestOptimizePattern:
+    """Tests for pattern rewriting."""
+
+    @pytest.mark.parametrize(
+        "pattern",
+        [
+            r"abc|abd",
+            r"(?i)(?P<tag>ab|ac)\w*",
+            r"(a|bc)+[^\]x-]",
+            r'\d+"-[A-Z]+-\d+.*?',
+            r"(?<=V-)\d{3}(?!a)|\bbc\b",
+            r"(?x) V - \d+ # comment",
+        ],
+    )
+    def test_exact_rewrites_keep_matches(self, pattern):
+        """Test that exact-only rewrites find exactly the same matches."""
+        optimized, _ = optimize_pattern(pattern, allow_trim=False)
+        assert _all_matches(optimized) == _all_matches(pattern)
+
+    def test_strips_wildcards(self):
+        """Test that leading and trailing wildcards are trimmed."""
+        optimized, rewrites = optimize_pattern(r'.*\d+"-[A-Z]+-\d+.*')
+
+        assert optimized == r'\d+"\-[A-Z]+\-\d+'
+        assert len(rewrites) == 2
+
+    def test_simplifies_alternation(self):
+        """Test that literal alternations are factored into a class."""
+        optimized, rewrites = optimize_pattern("abc|abd")
+
+        assert optimized == "ab[cd]"
+        assert rewrites
+
+    def test_nothing_to_do(self):
+        """Test that patterns without rewrites come back unchanged."""
+        assert optimize_pattern("FG|CWS|P") == ("FG|CWS|P", [])
+        assert optimize_pattern(".*$") == (".*$", [])
+
+    @pytest.mark.parametrize("pattern", ["", "(?i)", ".*"])
+    def test_empty_tree(self, pattern):
+        """Test patterns that are empty, or empty once wildcards are trimmed."""
+        assert optimize_pattern(pattern) == (pattern, [])
+        assert auto_optimize(pattern, "trim") == pattern
+        assert analyze_pattern(pattern).pattern == pattern
+
+    def test_invalid_pattern(self):
+        """Test that invalid patterns raise ValueError."""
+        with pytest.raises(ValueError, match="Invalid keyword regex"):
+            optimize_pattern("[")
+
+
+class TestAnalyzePattern:
+    """Tests for issue detection and auto-optimization levels."""
+
+    def test_flags_costly_constructs(self):
+        """Test that wildcards and nested quantifiers are reported."""
+        analysis = analyze_pattern(r".*(?:x+)+y.*")
+
+        codes = {issue.code for issue in analysis.issues}
+        assert codes == {"leading_wildcard", "trailing_wildcard", "nested_quantifier"}
+        assert not analysis.exact
+
+    def test_large_alternation(self):
+        """Test that long alternations are reported."""
+        pattern = "|".join(f"TAG{n}X" for n in range(12))
+        codes = [issue.code for issue in analyze_pattern(pattern).issues]
+        assert codes == ["large_alternation"]
+
+    def test_auto_optimize_levels(self):
+        """Test that trim rewrites only apply at the trim level."""
+        pattern = r".*V-\d+.*?"
+        assert auto_optimize(pattern, "off") == pattern
+        assert auto_optimize(pattern, "exact") == r".*V\-\d+"
+        assert auto_optimize(pattern, "trim") == r"V\-\d+"
+        assert auto_optimize("[", "trim") == "["
+
+
+class TestIsSegmentSafe:
+    """Tests for deciding whether a pattern can run line by line."""
+
+    @pytest.mark.parametrize(
+        "pattern", [r'\d+"-[A-Z]+-\d+', r"\bFG\b", r"(?m)^FG", r"A.B"]
+    )
+    def test_safe(self, pattern):
+        """Test patterns whose matches stay within one line."""
+        assert is_segment_safe(pattern)
+
+    @pytest.mark.parametrize(
+        "pattern",
+        [r"\w+\s\w+", r"(?s)A.B", r"[^x]+", r"^FG", r"(?<=a)b", r"x*", "["],
+    )
+    def test_unsafe(self, pattern):
+        """Test patterns that can cross or look across line breaks."""
+        assert not is_segment_safe(pattern)
+
+
+class TestIsBytesSafe:
+    """Tests for deciding whether a pattern can scan UTF-8 bytes."""
+
+    @pytest.mark.parametrize(
+        "pattern",
+        [r'[0-9]+"-[A-Z]+-[0-9]+', r"(?a)\b\d+\b", r"(?<![A-Z])FG|CWS", r"(V)-\1"],
+    )
+    def test_safe(self, pattern):
+        """Test patterns that only ever match ASCII characters."""
+        assert is_bytes_safe(pattern)
+
+    @pytest.mark.parametrize(
+        "pattern",
+        [r'\d+"-[A-Z]+', r"A.B", r"[^x]+", r"\bFG", r"(?i)fg", "µ", r"\xb5", "["],
+    )
+    def test_unsafe(self, pattern):
+        """Test patterns that can match or inspect non-ASCII characters."""
+        assert not is_bytes_safe(pattern)
+
+
+class TestAnalyzeRoute:
+    """Tests for /analyze-regex and auto-optimized extraction."""
+
+    TEXT_CONTENT = {"a.pdf": {1: 'Line connects to 10"-FG-001 at valve'}}
+
+    def test_reports_throughput(self):
+        """Test that before/after throughput is measured on the corpus."""
+        response = TestClient(app).post(
+            "/analyze-regex",
+            json={"keyword_regex": ".*FG.*", "text_content": self.TEXT_CONTENT},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["optimized_pattern"] == "FG"
+        assert data["throughput_before"]["matches"] == 1
+        assert data["throughput_after"]["matches"] == 1
+
+    def test_one_corpus_source(self):
+        """Test that a corpus sent both inline and by ID is rejected."""
+        response = TestClient(app).post(
+            "/analyze-regex",
+            json={
+                "keyword_regex": ".*FG.*",
+                "text_content": self.TEXT_CONTENT,
+                "corpus_id": "abc123",
+            },
+        )
+        assert response.status_code == 422
+
+    def test_invalid_regex(self):
+        """Test that invalid patterns return 400."""
+        response = TestClient(app).post("/analyze-regex", json={"keyword_regex": "["})
+        assert response.status_code == 400
+
+    def test_empty_pattern(self):
+        """Test that an empty pattern is analyzed rather than failing."""
+        response = TestClient(app).post("/analyze-regex", json={"keyword_regex": ""})
+        assert response.status_code == 200
+        assert response.json()["optimized_pattern"] is None
+
+    def test_extraction_auto_optimized(self, monkeypatch):
+        """Test that extraction runs the rewritten pattern when enabled."""
+        monkeypatch.setattr(analyzer, "REGEX_AUTO_OPTIMIZE", "trim")
+        response = TestClient(app).post(
+            "/extract",
+            json={
+                "keyword_regex": r'.*\d+"-[A-Z]+-\d+.*',
+                "text_content": self.TEXT_CONTENT,
+            },
+        )
+        data = response.json()
+        assert data["optimized_pattern"] == r'\d+"\-[A-Z]+\-\d+'
+        assert data["matches"][0]["match_found"] == '10"-FG-001'
@@ -0,0 +1,73 @@
+"""Tests for the benchmark corpus generator and report comparison."""
+
+import re
+
+import pytest
+
+from benchmarks.corpus import CorpusSpec, generate_corpus
+from benchmarks.run import FILE_IDENTIFIER_REGEX, KEYWORD_REGEX, compare
+
+
+class TestGenerateCorpus:
+    """Tests for the synthetic P&ID corpus generator."""
+
+    def test_same_seed_same_corpus(self):
+        """Test that generation is reproducible for a seed."""
+        spec = CorpusSpec.from_size("tiny", seed=7)
+        assert generate_corpus(spec) == generate_corpus(spec)
+
+    def test_different_seed_different_corpus(self):
+        """Test that the seed changes the generated text."""
+        assert generate_corpus(CorpusSpec(seed=1)) != generate_corpus(
+            CorpusSpec(seed=2)
+        )
+
+    def test_shape_and_content(self):
+        """Test corpus size, filenames and tag formats."""
+        spec = CorpusSpec(files=3, pages_per_file=2)
+        corpus = generate_corpus(spec)
+
+        assert len(corpus) == 3
+        for filename, pages in corpus.items():
+            assert re.search(FILE_IDENTIFIER_REGEX, filename)
+            assert sorted(pages) == [1, 2]
+            for text in pages.values():
+                assert "PIPING AND INSTRUMENTATION DIAGRAM" in text
+                assert re.search(KEYWORD_REGEX, text)
+
+    def test_unknown_size(self):
+        """Test that an unknown preset raises ValueError."""
+        with pytest.raises(ValueError, match="Unknown corpus size"):
+            CorpusSpec.from_size("huge")
+
+
+class TestCompare:
+    """Tests for baseline comparison."""
+
+    @staticmethod
+    def _report(throughput: float, peak_mb: float) -> dict:
+        return {
+            "meta": {"corpus": {"files": 1}},
+            "results": {
+                "extract_matches": {
+                    "throughput": throughput,
+                    "unit": "MB/s",
+                    "peak_mb": peak_mb,
+                }
+            },
+        }
+
+    def test_no_regression(self):
+        """Test that results within tolerance are accepted."""
+        assert compare(self._report(9.5, 1.0), self._report(10.0, 1.0)) == []
+
+    def test_throughput_and_memory_regression(self):
+        """Test that slowdowns and memory growth are reported."""
+        regressions = compare(self._report(5.0, 2.0), self._report(10.0, 1.0))
+        assert len(regressions) == 2
+
+    def test_incomparable_corpus(self):
+        """Test that reports for different corpora are not compared."""
+        baseline = self._report(10.0, 1.0)
+        baseline["meta"]["corpus"] = {"files": 2}
+        assert "not comparable" in compare(self._report(10.0, 1.0), baseline)[0]
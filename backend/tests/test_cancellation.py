@@ -0,0 +1,135 @@
+"""Tests for cooperative extraction cancellation."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from texthunter.core.cancellation import (
+    CancellationToken,
+    ExtractionCancelled,
+    QueryRegistry,
+    query_registry,
+)
+from texthunter.core.regex import extract_matches
+from texthunter.main import app
+
+
+class TestCancellationToken:
+    """Tests for token-driven cancellation of extract_matches."""
+
+    def test_cancelled_before_start(self):
+        """Test that a cancelled token stops extraction."""
+        token = CancellationToken()
+        token.cancel("test")
+        with pytest.raises(ExtractionCancelled, match="test"):
+            list(
+                extract_matches(
+                    text_content={"a.pdf": {1: "10-FG-001"}},
+                    keyword_regex=r"\d+-[A-Z]+-\d+",
+                    cancel_token=token,
+                )
+            )
+
+    def test_cancelled_between_pages(self):
+        """Test that cancellation takes effect at the next page."""
+        token = CancellationToken()
+        text_content = {"a.pdf": {1: "10-FG-001", 2: "20-FG-002"}}
+        matches = extract_matches(
+            text_content=text_content,
+            keyword_regex=r"\d+-[A-Z]+-\d+",
+            cancel_token=token,
+        )
+
+        assert next(matches).page == 1
+        token.cancel()
+        with pytest.raises(ExtractionCancelled):
+            next(matches)
+
+
+class TestQueryRegistry:
+    """Tests for per-session supersession and cancel-by-ID."""
+
+    def test_new_query_supersedes_previous(self, tmp_path):
+        """Test that a newer query in the same session cancels the old one."""
+        registry = QueryRegistry(tmp_path)
+        first = registry.start(session_id="s1")
+        second = registry.start(session_id="s1")
+        other = registry.start(session_id="s2")
+
+        assert first.cancelled
+        assert "superseded" in first.reason
+        assert not second.cancelled
+        assert not other.cancelled
+
+    def test_cancel_by_query_id(self, tmp_path):
+        """Test explicit cancellation and cleanup of finished queries."""
+        registry = QueryRegistry(tmp_path)
+        token = registry.start(query_id="q1")
+
+        assert registry.cancel("q1")
+        assert token.cancelled
+        registry.finish(token)
+        assert not registry.cancel("q1")
+
+    def test_across_processes(self, tmp_path):
+        """Test supersession and cancellation through another worker's registry."""
+        worker_a, worker_b = QueryRegistry(tmp_path), QueryRegistry(tmp_path)
+        first = worker_a.start(session_id="s1", query_id="q1")
+        worker_a.poll(first)
+        assert not first.cancelled
+
+        second = worker_b.start(session_id="s1")
+        worker_a.poll(first)
+        assert "superseded" in first.reason
+        worker_a.finish(first, "s1")
+        worker_b.poll(second)
+        assert not second.cancelled
+
+        third = worker_a.start(query_id="q2")
+        assert worker_b.cancel("q2")
+        assert not third.cancelled
+        worker_a.poll(third)
+        assert third.reason == "cancelled by client"
+        worker_a.finish(third)
+        assert not worker_b.cancel("q2")
+
+        worker_b.finish(second, "s1")
+        assert list(worker_a.running_dir.iterdir()) == []
+
+
+class TestCancelEndpoint:
+    """Tests for the /cancel route."""
+
+    @pytest.fixture(autouse=True)
+    def running_dir(self, tmp_path, monkeypatch):
+        """Keep query markers in a temporary directory."""
+        monkeypatch.setattr(query_registry, "root", tmp_path)
+
+    def test_cancel_in_another_worker(self):
+        """Test that /cancel reaches a query another worker is running."""
+        worker = QueryRegistry(query_registry.root)
+        token = worker.start(query_id="elsewhere")
+        response = TestClient(app).post("/cancel/elsewhere")
+        assert response.json()["cancelled"]
+        worker.poll(token)
+        assert token.cancelled
+
+    def test_cancel_unknown_query(self):
+        """Test that cancelling an unknown query reports False."""
+        response = TestClient(app).post("/cancel/nope")
+        assert response.status_code == 200
+        assert response.json() == {"query_id": "nope", "cancelled": False}
+
+    def test_extract_with_session(self):
+        """Test that a finished session query completes normally."""
+        response = TestClient(app).post(
+            "/extract",
+            json={
+                "filenames": ["a.pdf"],
+                "keyword_regex": r"\d+-[A-Z]+-\d+",
+                "text_content": {"a.pdf": {"1": "10-FG-001"}},
+                "session_id": "s1",
+                "query_id": "q1",
+            },
+        )
+        assert response.status_code == 200
+        assert response.json()["total_count"] == 1
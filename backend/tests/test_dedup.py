@@ -0,0 +1,104 @@
+"""Tests for page normalization and dedup of repeated text."""
+
+import pytest
+
+from texthunter.core import regex
+from texthunter.core.dedup import (
+    NormalizationCache,
+    SegmentIndex,
+    normalize_text,
+)
+from texthunter.core.regex import extract_matches
+
+TITLE = "PIPING AND INSTRUMENTATION DIAGRAM - SYNTHETIC ENERGY CO.\n"
+NOTES = 'NOTE 1: ALL LINES 2"-FG-001 AND SMALLER ARE SOCKET WELDED.\n'
+TEXT_CONTENT = {
+    "a.pdf": {
+        1: TITLE + 'Line 10"-FG-001 at valve\n' + NOTES,
+        2: TITLE + 'Flow from 2"-CWS-505\n' + NOTES,
+    },
+    "b.pdf": {
+        1: TITLE + 'Line 10"-FG-001 at valve\n' + NOTES,
+        2: 'no title block here: 4"-PW-100',
+    },
+}
+
+
+class TestSegmentIndex:
+    """Tests for line-level dedup."""
+
+    def test_layout_marks_repeated_lines(self):
+        """Test that repeated lines get digests and the rest is scanned."""
+        index = SegmentIndex(TEXT_CONTENT)
+
+        digest, layout = index.page("a.pdf", 2)
+        assert [seg[2] is not None for seg in layout] == [True, False, True]
+        assert layout[0][:2] == (0, len(TITLE))
+        assert index.page("b.pdf", 2)[1] is None
+        assert index.page("a.pdf", 1)[0] == index.page("b.pdf", 1)[0]
+        assert index.unique_chars < index.total_chars
+
+    @pytest.mark.parametrize(
+        "pattern",
+        [
+            r'\d+"-[A-Z]+-\d+',
+            r"\b[A-Z]+\b",
+            r"(?m)^[A-Z]+",
+            r"\w+\s\w+",
+            r"(?<=\n)[A-Z]+",
+        ],
+    )
+    def test_matches_unchanged(self, pattern):
+        """Test that dedup returns exactly the matches of a plain scan."""
+        index = SegmentIndex(TEXT_CONTENT, min_chars=1)
+        plain = list(extract_matches(TEXT_CONTENT, pattern))
+        deduped = list(extract_matches(TEXT_CONTENT, pattern, segments=index))
+        assert deduped == plain
+
+    def test_repeated_text_scanned_once(self, monkeypatch):
+        """Test that identical pages are only scanned once per run."""
+        scanned = []
+        original = regex._scan
+
+        def spy(pattern, text, layout, segment_spans):
+            scanned.append(text)
+            return original(pattern, text, layout, segment_spans)
+
+        monkeypatch.setattr(regex, "_scan", spy)
+        matches = list(extract_matches(TEXT_CONTENT, r'\d+"-[A-Z]+-\d+'))
+
+        assert len(scanned) == 3
+        assert sum(m.source_file == "b.pdf" and m.page == 1 for m in matches) == 2
+
+
+class TestNormalization:
+    """Tests for cached page normalization."""
+
+    def test_normalize_text(self):
+        """Test whitespace, Unicode and case folding."""
+        text = "ＦＧ  Line\t\tTAG\r\nNext"
+        assert normalize_text(text, ["unicode", "casefold", "whitespace"]) == (
+            "fg line tag\nnext"
+        )
+        with pytest.raises(ValueError, match="Unknown normalization"):
+            normalize_text(text, ["upper"])
+
+    def test_cache_hits(self):
+        """Test that a page is normalized once across queries."""
+        cache = NormalizationCache(max_chars=10)
+        assert cache.normalize("ABC", ["casefold"]) == "abc"
+        assert cache.normalize("ABC", ["casefold"]) == "abc"
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        cache.normalize("A" * 20, ["casefold"])
+        assert cache.size <= 10
+
+    def test_extract_normalized(self):
+        """Test that matches and context come from the normalized text."""
+        text_content = {"a.pdf": {1: 'Line  10"-fg-001 AT\tvalve'}}
+        matches = list(
+            extract_matches(
+                text_content, r'\d+"-fg-\d+', normalize=["casefold", "whitespace"]
+            )
+        )
+        assert matches[0].context == 'line 10"-fg-001 at valve'
@@ -0,0 +1,166 @@
+"""Tests for partitioned Excel export and the /export endpoint."""
+
+import io
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+from openpyxl import load_workbook
+
+from texthunter.api.schemas import MatchResult
+from texthunter.core import export
+from texthunter.core.export import export_matches, part_name, plan_parts
+from texthunter.core.results import result_sets
+from texthunter.main import app
+
+
+def make_matches(count: int) -> list[MatchResult]:
+    """Return ``count`` synthetic matches over three files."""
+    return [
+        MatchResult(
+            source_file=f"file-{i % 3}.pdf",
+            project_id="2024_SiteA",
+            sheet_no=f"PID-{i % 3 + 8}",
+            page=i % 5 + 1,
+            match_found=f"TAG-{i:04d}",
+            context=f"... TAG-{i:04d} ...",
+        )
+        for i in range(count)
+    ]
+
+
+def sheets(data: bytes) -> dict[str, list[tuple]]:
+    """Return the rows of every sheet in a workbook, header included."""
+    workbook = load_workbook(io.BytesIO(data), read_only=True)
+    return {ws.title: list(ws.iter_rows(values_only=True)) for ws in workbook}
+
+
+class TestPlanParts:
+    """Tests for splitting matches into sheets."""
+
+    def test_partition_by_file(self):
+        """Test one part per source file, in first-seen order."""
+        parts = plan_parts(make_matches(7), "source_file")
+        assert [part.name for part in parts] == [
+            "file-0.pdf",
+            "file-1.pdf",
+            "file-2.pdf",
+        ]
+        assert [len(part.rows) for part in parts] == [3, 2, 2]
+
+    def test_row_limit_splits(self):
+        """Test that parts over the row limit continue on numbered sheets."""
+        parts = plan_parts(make_matches(10), max_rows=4)
+        assert [part.name for part in parts] == [
+            "Extraction Results",
+            "Extraction Results (2)",
+            "Extraction Results (3)",
+            "Extraction Results (4)",
+        ]
+        assert [len(part.rows) for part in parts] == [3, 3, 3, 1]
+
+    def test_columns(self):
+        """Test that the columns follow the matches and ``include_context``."""
+        matches = make_matches(2)
+        matches[0].edit_distance = 1
+        parts = plan_parts(matches, include_context=False)
+        assert parts[0].columns[-1] == "Edit Distance"
+        assert parts[0].rows[1][-1] is None
+
+    def test_rejects_tiny_limit(self):
+        """Test that a sheet must hold a row below the header."""
+        with pytest.raises(ValueError, match="at least one row"):
+            plan_parts(make_matches(2), max_rows=1)
+
+    def test_part_name(self):
+        """Test that names are sanitized, truncated and de-duplicated."""
+        taken: set[str] = set()
+        assert part_name("a/b:c?.pdf", taken) == "a_b_c_.pdf"
+        assert part_name("A/B:C?.PDF", taken) == "A_B_C_.PDF (2)"
+        long = "x" * 40
+        assert part_name(long, taken) == "x" * 31
+        assert part_name(long, taken) == "x" * 27 + " (2)"
+        assert part_name("", taken) == "(blank)"
+
+
+class TestExportMatches:
+    """Tests for writing partitioned exports."""
+
+    def test_merged_workbook(self, monkeypatch):
+        """Test one workbook with a sheet per part and every row kept."""
+        monkeypatch.setattr(export, "EXPORT_MAX_SHEET_ROWS", 3)
+        matches = make_matches(7)
+        with export_matches(matches, "sheet_no", workers=1) as file:
+            result = sheets(file.read())
+
+        assert list(result) == ["PID-8", "PID-8 (2)", "PID-9", "PID-10"]
+        assert result["PID-8"][0][:5] == (
+            "Source File",
+            "Project ID",
+            "Sheet No",
+            "Page",
+            "Match Found",
+        )
+        rows = [row for sheet in result.values() for row in sheet[1:]]
+        assert sorted(row[4] for row in rows) == [m.match_found for m in matches]
+
+    def test_zip(self):
+        """Test a ZIP holding a workbook per part."""
+        with export_matches(make_matches(6), "source_file", "zip", workers=1) as file:
+            bundle = zipfile.ZipFile(io.BytesIO(file.read()))
+        assert bundle.namelist() == [
+            "file-0.pdf.xlsx",
+            "file-1.pdf.xlsx",
+            "file-2.pdf.xlsx",
+        ]
+        result = sheets(bundle.read("file-1.pdf.xlsx"))
+        assert [row[4] for row in result["file-1.pdf"][1:]] == ["TAG-0001", "TAG-0004"]
+
+    def test_single_sheet(self):
+        """Test that an unpartitioned export is one sheet as before."""
+        with export_matches(make_matches(4), workers=1) as file:
+            result = sheets(file.read())
+        assert list(result) == ["Extraction Results"]
+        assert len(result["Extraction Results"]) == 5
+
+    def test_unknown_output(self):
+        """Test that an unknown output format is rejected."""
+        with pytest.raises(ValueError, match="Unknown export output"):
+            export_matches(make_matches(1), output="csv")
+
+
+class TestExportRoute:
+    """Tests for the /export endpoint."""
+
+    def test_partitioned_zip(self):
+        """Test a partitioned ZIP export of inline matches."""
+        client = TestClient(app)
+        matches = [m.model_dump() for m in make_matches(4)]
+        response = client.post(
+            "/export",
+            json={"matches": matches, "partition_by": "source_file", "output": "zip"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
+        assert ".zip" in response.headers["content-disposition"]
+        assert len(zipfile.ZipFile(io.BytesIO(response.content)).namelist()) == 3
+
+    def test_result_set(self):
+        """Test exporting a server-held result set by id."""
+        result_sets.put("export-test", make_matches(5))
+        client = TestClient(app)
+        response = client.post(
+            "/export", json={"result_id": "export-test", "partition_by": "sheet_no"}
+        )
+        assert response.status_code == 200
+        assert list(sheets(response.content)) == ["PID-8", "PID-9", "PID-10"]
+
+    def test_errors(self):
+        """Test unknown result sets, empty exports and conflicting sources."""
+        client = TestClient(app)
+        assert client.post("/export", json={"result_id": "nope"}).status_code == 404
+        assert client.post("/export", json={"matches": []}).status_code == 400
+        both = {"matches": [make_matches(1)[0].model_dump()], "result_id": "x"}
+        assert client.post("/export", json=both).status_code == 422
+        bad = {"matches": [], "partition_by": "pattern"}
+        assert client.post("/export", json=bad).status_code == 422
@@ -0,0 +1,203 @@
+"""Tests for incremental re-extraction and revision diffs."""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from texthunter.core.incremental import (
+    cached_fragments,
+    diff_matches,
+    diff_revisions,
+    extract_revision,
+)
+from texthunter.core.regex import extract_matches
+from texthunter.core.store import CorpusStore, corpus_store
+from texthunter.main import app
+
+KEYWORD_REGEX = r'\d+"-[A-Z]+-\d+'
+FILE_IDENTIFIER_REGEX = r"(?P<project_id>\d{4}_\w+?)_(?P<sheet_no>PID-\d+)"
+REVISION_1 = {
+    "2024_SiteA_PID-001.pdf": {1: 'Line 10"-FG-001 to 4"-CWS-200', 2: "Notes"},
+    "2024_SiteA_PID-002.pdf": {1: 'Line 6"-FG-002 and 6"-FG-002'},
+    "2024_SiteA_PID-003.pdf": {1: 'Line 2"-HW-300'},
+}
+REVISION_2 = {
+    "2024_SiteA_PID-001.pdf": REVISION_1["2024_SiteA_PID-001.pdf"],
+    "2024_SiteA_PID-002.pdf": {1: 'Line 6"-FG-002 and 8"-FG-009'},
+    "2024_SiteA_PID-004.pdf": {1: 'Line 3"-PW-400'},
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Return a store rooted in a temporary directory."""
+    return CorpusStore(tmp_path)
+
+
+def counting_scan(scanned: list[str]):
+    """Return a scan running the test query and recording the files it saw."""
+
+    def scan(text_content):
+        scanned.extend(text_content)
+        return extract_matches(text_content, KEYWORD_REGEX, FILE_IDENTIFIER_REGEX)
+
+    return scan
+
+
+class TestFileMatches:
+    """Tests for assembling extractions from per-file fragments."""
+
+    def test_file_digest(self, store):
+        """Test that digests follow content and name, and survive old indexes."""
+        first = store.get(store.put(REVISION_1))
+        second = store.get(store.put(REVISION_2))
+        name = "2024_SiteA_PID-001.pdf"
+        assert first.file_digest(name) == second.file_digest(name)
+        assert first.file_digest("2024_SiteA_PID-002.pdf") != second.file_digest(
+            "2024_SiteA_PID-002.pdf"
+        )
+
+        # Indexes written before per-file digests hash the pages on demand
+        index_path = store.corpora_dir / f"{store.put(REVISION_2)}.json"
+        index = json.loads(index_path.read_text())
+        digests = [entry.pop("digest") for entry in index["files"]]
+        index_path.write_text(json.dumps(index))
+        legacy = CorpusStore(store.root).get(store.put(REVISION_2))
+        assert [legacy.file_digest(name) for name in legacy] == digests
+
+    def test_rescans_only_new_files(self, store):
+        """Test that a revision scans changed and new files only."""
+        key = store.query_key(KEYWORD_REGEX, FILE_IDENTIFIER_REGEX)
+        scanned: list[str] = []
+        previous_id = store.put(REVISION_1)
+        matches = extract_revision(
+            store.get(previous_id), key, counting_scan(scanned), store
+        )
+        assert scanned == list(REVISION_1)
+        store.put_results("r1", matches)
+        store.add_revision(key, previous_id, "r1")
+
+        scanned.clear()
+        corpus = store.get(store.put(REVISION_2))
+        matches = extract_revision(corpus, key, counting_scan(scanned), store)
+        assert scanned == ["2024_SiteA_PID-002.pdf", "2024_SiteA_PID-004.pdf"]
+        assert matches == list(
+            extract_matches(REVISION_2, KEYWORD_REGEX, FILE_IDENTIFIER_REGEX)
+        )
+        # One cached result set and history entry, nothing per file
+        assert {path.name for path in store.root.iterdir()} == {
+            "corpora",
+            "queries",
+            "results",
+        }
+        assert len(list(store.results_dir.iterdir())) == 1
+
+    def test_revision_history(self, store):
+        """Test that revisions are listed newest first and skipped once evicted."""
+        key = store.query_key(KEYWORD_REGEX)
+        previous_id = store.put(REVISION_1)
+        current_id = store.put(REVISION_2)
+        store.add_revision(key, previous_id, "r1")
+        store.add_revision(key, current_id, "r2")
+        store.add_revision(key, previous_id, "r1")
+        assert store.revisions(key) == [(previous_id, "r1"), (current_id, "r2")]
+        for i in range(10):
+            store.add_revision(key, f"abc{i}", f"r{i}")
+        assert len(store.revisions(key)) == 8
+
+        # Neither revision's results are cached, so nothing can be reused
+        corpus = store.get(current_id)
+        assert cached_fragments(corpus, key, store) == {}
+        scanned: list[str] = []
+        extract_revision(corpus, key, counting_scan(scanned), store)
+        assert scanned == list(REVISION_2)
+
+
+class TestDiff:
+    """Tests for comparing matches between revisions."""
+
+    def test_diff_matches_counts_repeats(self):
+        """Test that repeated matches are compared as a multiset."""
+        before = list(extract_matches(REVISION_1, KEYWORD_REGEX))
+        after = list(extract_matches(REVISION_2, KEYWORD_REGEX))
+        added, removed = diff_matches(before, after)
+        assert [m.match_found for m in added] == ['8"-FG-009', '3"-PW-400']
+        assert [m.match_found for m in removed] == ['6"-FG-002', '2"-HW-300']
+
+    def test_diff_revisions(self, store):
+        """Test the per-file report, extracting only files that differ."""
+        previous = store.get(store.put(REVISION_1))
+        current = store.get(store.put(REVISION_2))
+        scanned: list[str] = []
+        key = store.query_key(KEYWORD_REGEX)
+        diff = diff_revisions(previous, current, key, counting_scan(scanned), store)
+
+        assert "2024_SiteA_PID-001.pdf" not in scanned
+        assert diff.unchanged_files == 1
+        assert diff.scanned_files == 4
+        assert [(f.filename, f.status) for f in diff.files] == [
+            ("2024_SiteA_PID-002.pdf", "changed"),
+            ("2024_SiteA_PID-004.pdf", "added"),
+            ("2024_SiteA_PID-003.pdf", "removed"),
+        ]
+        changed = diff.files[0]
+        assert [m.match_found for m in changed.added] == ['8"-FG-009']
+        assert [m.match_found for m in changed.removed] == ['6"-FG-002']
+        assert changed.added[0].sheet_no == "PID-002"
+        assert (diff.added_count, diff.removed_count) == (2, 2)
+
+        # With the previous revision's results cached only new files are scanned
+        previous_id = store.put(REVISION_1)
+        store.put_results("r1", list(counting_scan([])(REVISION_1)))
+        store.add_revision(key, previous_id, "r1")
+        scanned.clear()
+        cached = diff_revisions(previous, current, key, counting_scan(scanned), store)
+        assert scanned == ["2024_SiteA_PID-002.pdf", "2024_SiteA_PID-004.pdf"]
+        assert (cached.scanned_files, cached.files) == (2, diff.files)
+
+
+class TestDiffRoute:
+    """Tests for /extract-diff and incremental /extract-all."""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        """Return a client whose store lives in a temporary directory."""
+        monkeypatch.setattr(corpus_store, "root", tmp_path)
+        return TestClient(app)
+
+    def upload(self, client: TestClient, text_content: dict) -> str:
+        """Store a corpus and return its ID."""
+        return client.post("/corpora", json={"text_content": text_content}).json()[
+            "corpus_id"
+        ]
+
+    def test_extract_diff(self, client):
+        """Test a revision diff after extracting the previous revision."""
+        previous = self.upload(client, REVISION_1)
+        current = self.upload(client, REVISION_2)
+        query = {"keyword_regex": KEYWORD_REGEX}
+        client.post("/extract-all", json={**query, "corpus_id": previous})
+
+        response = client.post(
+            "/extract-diff",
+            json={**query, "corpus_id": current, "previous_corpus_id": previous},
+        )
+        assert response.status_code == 200
+        body = response.json()
+        assert body["scanned_files"] == 2
+        assert [f["status"] for f in body["files"]] == ["changed", "added", "removed"]
+
+        full = client.post("/extract-all", json={**query, "corpus_id": current})
+        assert full.json()["total_count"] == 5
+
+    def test_errors(self, client):
+        """Test unknown revisions and a missing stored corpus."""
+        current = self.upload(client, REVISION_2)
+        query = {"keyword_regex": KEYWORD_REGEX, "previous_corpus_id": "abc123"}
+        unknown = client.post("/extract-diff", json={**query, "corpus_id": current})
+        assert unknown.status_code == 404
+        inline = client.post(
+            "/extract-diff", json={**query, "text_content": REVISION_2}
+        )
+        assert inline.status_code == 422
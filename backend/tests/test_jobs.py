@@ -0,0 +1,257 @@
+"""Tests for background jobs and the /jobs endpoints."""
+
+import io
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from openpyxl import load_workbook
+
+from texthunter.api.admission import (
+    AdmissionController,
+    MemoryBudget,
+    export_admission,
+)
+from texthunter.core.cancellation import ExtractionCancelled
+from texthunter.core.jobs import Job, JobManager, JobQueueFull, job_manager
+from texthunter.core.store import corpus_store
+from texthunter.main import app
+
+TEXT_CONTENT = {
+    "2024_SiteA_PID-010.pdf": {
+        1: 'Lines 10"-FG-001 and 4"-CWS-200',
+        2: 'Line 6"-FG-002',
+    },
+    "2024_SiteB_PID-9.pdf": {
+        1: 'Line 2"-FG-003 and 8"-HW-100',
+    },
+}
+KEYWORD_REGEX = r'\d+"-[A-Z]+-\d+'
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """Return a one-worker manager rooted in a temporary directory."""
+    return JobManager(tmp_path, workers=1, max_queued=1)
+
+
+def wait(manager: JobManager, job_id: str, timeout: float = 10):
+    """Poll a job until it finishes and return its state."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        info = manager.get(job_id)
+        if info.status in ("succeeded", "failed", "cancelled"):
+            return info
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+class TestJob:
+    """Tests for job progress accounting."""
+
+    def test_scan_progress(self, tmp_path):
+        """Test that files and pages count cached files as done."""
+        job = Job("j1", "extraction", tmp_path)
+        job.start()
+        job.begin(files_total=4, pages_total=10)
+        # One file of 4 pages came from a cache; three are scanned
+        job.track_scan([1, 2, 3])
+        job.pages_scanned(3, matches=5)
+
+        info = job.info()
+        assert (info.files_done, info.pages_done, info.matches) == (3, 7, 5)
+        assert info.eta_seconds is not None
+
+        job.finish("succeeded")
+        info = job.info()
+        assert (info.files_done, info.pages_done, info.eta_seconds) == (4, 10, None)
+
+    def test_cancel_marker(self, tmp_path):
+        """Test that a cancel marker stops the job at its next update."""
+        job = Job("j2", "export", tmp_path)
+        job.start()
+        (tmp_path / "cancel").touch()
+        with pytest.raises(ExtractionCancelled):
+            job.parts_written(1, 3)
+
+
+class TestJobManager:
+    """Tests for running and tracking jobs."""
+
+    def test_success_and_artifact(self, manager):
+        """Test a job spooling an artifact, read back by another manager."""
+
+        def work(job):
+            job.begin(matches=2)
+            job.write_artifact("out.txt", "text/plain", b"done")
+
+        info = wait(manager, manager.submit("export", work).job_id)
+        assert info.status == "succeeded"
+
+        other = JobManager(manager.root)
+        path, state = other.artifact_path(info.job_id)
+        assert path.read_bytes() == b"done"
+        assert state.media_type == "text/plain"
+
+    def test_inputs_and_chunked_artifact(self, manager):
+        """Test that inputs are spooled before the job runs."""
+
+        def work(job):
+            data = (job.directory / "in.txt").read_bytes()
+            job.write_artifact("out.txt", "text/plain", iter([data, b"-", data]))
+
+        submitted = manager.submit("export", work, {"in.txt": b"abc"})
+        info = wait(manager, submitted.job_id)
+        path, _ = manager.artifact_path(info.job_id)
+        assert path.read_bytes() == b"abc-abc"
+        assert (path.parent / "in.txt").exists()
+
+    def test_failure(self, manager):
+        """Test that an error fails the job with its message."""
+
+        def work(job):
+            raise ValueError("Invalid keyword regex: boom")
+
+        info = wait(manager, manager.submit("extraction", work).job_id)
+        assert (info.status, info.detail) == ("failed", "Invalid keyword regex: boom")
+        with pytest.raises(ValueError, match="no artifact"):
+            manager.artifact_path(info.job_id)
+
+    def test_queue_bound_and_cancel(self, manager):
+        """Test that the queue is bounded and a queued job can be cancelled."""
+        release = threading.Event()
+        running = manager.submit("export", lambda job: release.wait(10))
+        queued = manager.submit("export", lambda job: None)
+        with pytest.raises(JobQueueFull):
+            manager.submit("export", lambda job: None)
+
+        assert manager.cancel(queued.job_id).status == "queued"
+        release.set()
+        assert wait(manager, running.job_id).status == "succeeded"
+        assert wait(manager, queued.job_id).status == "cancelled"
+
+    def test_sweep_and_delete(self, manager):
+        """Test that expired jobs are swept and deleted jobs are gone."""
+        first = wait(manager, manager.submit("export", lambda job: None).job_id)
+        assert manager.delete(first.job_id)
+        assert not manager.delete(first.job_id)
+        with pytest.raises(KeyError):
+            manager.get(first.job_id)
+
+        second = wait(manager, manager.submit("export", lambda job: None).job_id)
+        manager.retention = -1
+        manager.sweep()
+        with pytest.raises(KeyError):
+            manager.get(second.job_id)
+
+
+class TestJobRoutes:
+    """Tests for the /jobs endpoints."""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        """Return a client whose store and jobs live in a temporary directory."""
+        monkeypatch.setattr(corpus_store, "root", tmp_path)
+        monkeypatch.setattr(job_manager, "root", tmp_path)
+        return TestClient(app)
+
+    def test_extraction_then_export(self, client):
+        """Test an extraction job, its artifact, and an export of its result."""
+        query = {"text_content": TEXT_CONTENT, "keyword_regex": KEYWORD_REGEX}
+        submitted = client.post("/jobs/extract", json=query)
+        assert submitted.status_code == 202
+        job_id = submitted.json()["job_id"]
+
+        info = wait(job_manager, job_id)
+        assert info.status == "succeeded"
+        assert (info.files_done, info.pages_done, info.matches) == (2, 3, 5)
+
+        artifact = client.get(f"/jobs/{job_id}/artifact")
+        assert artifact.status_code == 200
+        assert artifact.headers["content-type"] == "application/json"
+        full = client.post("/extract-all", json=query).json()
+        assert artifact.json()["matches"] == full["matches"]
+
+        export = client.post(
+            "/jobs/export",
+            json={"result_id": info.result_id, "partition_by": "source_file"},
+        )
+        assert export.status_code == 202
+        export_id = export.json()["job_id"]
+        with client.websocket_connect(f"/jobs/{export_id}/progress") as websocket:
+            while True:
+                message = websocket.receive_json()
+                if message["status"] != "queued" and message["status"] != "running":
+                    break
+        assert message["status"] == "succeeded"
+        assert message["parts_done"] == message["parts_total"] == 2
+
+        workbook = client.get(f"/jobs/{export_id}/artifact")
+        sheets = load_workbook(io.BytesIO(workbook.content), read_only=True)
+        assert sheets.sheetnames == ["2024_SiteA_PID-010.pdf", "2024_SiteB_PID-9.pdf"]
+
+    def test_inline_export(self, client, tmp_path, monkeypatch):
+        """Test that inline matches are spooled and the export is admitted."""
+        monkeypatch.setattr("texthunter.api.routes.JOB_ARTIFACT_CHUNK_MATCHES", 2)
+        query = {"text_content": TEXT_CONTENT, "keyword_regex": KEYWORD_REGEX}
+        job_id = client.post("/jobs/extract", json=query).json()["job_id"]
+        wait(job_manager, job_id)
+        # Written two matches at a time
+        artifact = client.get(f"/jobs/{job_id}/artifact").json()
+        full = client.post("/extract-all", json=query).json()
+        assert artifact == {**full, "preview_count": 5}
+
+        admitted = export_admission.stats.admitted
+        export = client.post("/jobs/export", json={"matches": full["matches"]})
+        export_id = export.json()["job_id"]
+        assert wait(job_manager, export_id).status == "succeeded"
+        assert export_admission.stats.admitted == admitted + 1
+        spooled = tmp_path / "jobs" / export_id / "matches.json"
+        assert json.loads(spooled.read_bytes()) == full["matches"]
+
+    def test_extraction_waits_for_admission(self, client, monkeypatch):
+        """Test that a job scans only once admitted, and fails if rejected."""
+        controller = AdmissionController("extract", 1, 1, 10, MemoryBudget(0))
+        monkeypatch.setattr("texthunter.api.routes.extraction_admission", controller)
+        query = {"text_content": TEXT_CONTENT, "keyword_regex": KEYWORD_REGEX}
+
+        with controller.admit_blocking():
+            job_id = client.post("/jobs/extract", json=query).json()["job_id"]
+            deadline = time.monotonic() + 5
+            while controller.queued == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert controller.queued == 1
+            info = job_manager.get(job_id)
+            assert (info.status, info.matches) == ("running", 0)
+        assert wait(job_manager, job_id).status == "succeeded"
+
+        controller.max_queued = 0
+        with controller.admit_blocking():
+            query["keyword_regex"] = r"FG-\d+"
+            job_id = client.post("/jobs/extract", json=query).json()["job_id"]
+            info = wait(job_manager, job_id)
+        assert info.status == "failed"
+        assert "Too many extract requests queued" in info.detail
+
+    def test_failed_job(self, client):
+        """Test that an invalid pattern fails the job rather than the request."""
+        query = {"text_content": TEXT_CONTENT, "keyword_regex": "("}
+        job_id = client.post("/jobs/extract", json=query).json()["job_id"]
+        info = wait(job_manager, job_id)
+        assert info.status == "failed"
+        assert "Invalid keyword regex" in info.detail
+        assert client.get(f"/jobs/{job_id}/artifact").status_code == 409
+
+    def test_unknown(self, client):
+        """Test unknown jobs, corpora and result sets."""
+        assert client.get("/jobs/abc123").status_code == 404
+        assert client.get("/jobs/abc123/artifact").status_code == 404
+        assert client.post("/jobs/abc123/cancel").status_code == 404
+        assert client.delete("/jobs/abc123").status_code == 404
+        missing = {"corpus_id": "abc123", "keyword_regex": KEYWORD_REGEX}
+        assert client.post("/jobs/extract", json=missing).status_code == 404
+        assert client.post("/jobs/export", json={"result_id": "x"}).status_code == 404
+        with client.websocket_connect("/jobs/abc123/progress") as websocket:
+            assert websocket.receive_json()["type"] == "error"
@@ -0,0 +1,98 @@
+"""Tests for live search sessions and the /live-search WebSocket."""
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from texthunter.core.live import LiveSearchSession
+from texthunter.main import app
+
+TEXT_CONTENT = {
+    "a.pdf": {1: 'Line 10"-FG-001 at valve', 2: 'Flow from 2"-CWS-505'},
+    "b.pdf": {1: "no tags", 2: 'Drain 4"-FG-100 and 6"-PW-200'},
+}
+
+
+def _until_done(ws) -> list[dict]:
+    """Collect messages up to and including the next ``done`` or error."""
+    messages = []
+    while not messages or messages[-1]["type"] not in ("done", "error"):
+        messages.append(ws.receive_json())
+    return messages
+
+
+class TestLiveSearchSession:
+    """Tests for query planning and refinement."""
+
+    def test_refinement_rescans_candidate_pages(self):
+        """Test that an appended pattern only revisits matching pages."""
+        session = LiveSearchSession(TEXT_CONTENT)
+        first = session.run(session.start(r'\d+"-'))
+        assert first.pages_total == 4
+        assert first.total_count == 4
+
+        refined = session.run(session.start(r'\d+"-FG'))
+        assert refined.refined
+        assert refined.pages_total == 3
+        assert refined.total_count == 2
+
+        broadened = session.start(r'\d+"-FG|PW')
+        assert not broadened.refined
+
+    def test_repeated_pattern_reuses_result(self):
+        """Test that re-sending the last pattern returns the cached result."""
+        session = LiveSearchSession(TEXT_CONTENT, max_hits=1)
+        first = session.run(session.start("FG"))
+        assert session.start("FG") is first
+        assert len(first.hits) == 1
+
+
+class TestLiveSearchRoute:
+    """Tests for the WebSocket protocol."""
+
+    def test_query_and_refine(self):
+        """Test ready, progress/done updates and refined follow-ups."""
+        with TestClient(app).websocket_connect("/live-search") as ws:
+            ws.send_json({"text_content": TEXT_CONTENT})
+            assert ws.receive_json() == {"type": "ready", "pages": 4}
+
+            ws.send_json({"keyword_regex": r'\d+"-'})
+            done = _until_done(ws)[-1]
+            assert done["type"] == "done"
+            assert done["total_count"] == 4
+            assert not done["refined"]
+
+            ws.send_json({"keyword_regex": r'\d+"-CWS'})
+            done = _until_done(ws)[-1]
+            assert done["refined"]
+            assert done["pages_total"] == 3
+            assert done["hits"][0]["match_found"] == '2"-CWS'
+
+    def test_debounce_runs_latest_only(self):
+        """Test that quickly superseded patterns are never run."""
+        with TestClient(app).websocket_connect("/live-search") as ws:
+            ws.send_json({"text_content": TEXT_CONTENT})
+            ws.receive_json()
+            for pattern in ("F", "FG", "FG-1"):
+                ws.send_json({"keyword_regex": pattern})
+            messages = _until_done(ws)
+            assert {m["keyword_regex"] for m in messages} == {"FG-1"}
+            assert messages[-1]["total_count"] == 1
+
+    def test_invalid_regex_keeps_session(self):
+        """Test that a bad pattern reports an error and the session goes on."""
+        with TestClient(app).websocket_connect("/live-search") as ws:
+            ws.send_json({"text_content": TEXT_CONTENT})
+            ws.receive_json()
+            ws.send_json({"keyword_regex": "["})
+            assert _until_done(ws)[-1]["type"] == "error"
+            ws.send_json({"keyword_regex": "FG"})
+            assert _until_done(ws)[-1]["total_count"] == 2
+
+    def test_unknown_corpus_closes(self):
+        """Test that an unknown corpus is reported and the socket closed."""
+        with TestClient(app).websocket_connect("/live-search") as ws:
+            ws.send_json({"corpus_id": "missing"})
+            assert ws.receive_json()["type"] == "error"
+            with pytest.raises(WebSocketDisconnect):
+                ws.receive_json()
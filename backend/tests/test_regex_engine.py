@@ -4,7 +4,18 @@ import re
 
 import pytest
 
-from texthunter.core.regex import extract_matches, guess_regex
+from texthunter.core.excel import build_dataframe
+from texthunter.core.regex import (
+    FuzzyMatcher,
+    _char_masks,
+    _guess_regex_cached,
+    cluster_examples,
+    edit_scores,
+    example_shape,
+    extract_matches,
+    guess_regex,
+    measure_scan_throughput,
+)
 
 
 class TestExtractMatches:
@@ -108,3 +119,156 @@ class TestGuessRegex:
         compiled = re.compile(pattern)
         for ex in examples:
             assert compiled.fullmatch(ex), f"Pattern {pattern} did not match {ex}"
+
+    def test_large_example_set_is_clustered(self):
+        """Test that many examples yield one compact branch per shape."""
+        examples = [
+            f'{n % 12 + 1}"-{"FG" if n % 2 else "CWS"}-{n:03d}' for n in range(200)
+        ]
+        examples += [f"V-{n}" for n in range(100, 150)]
+        pattern, explanation = guess_regex(examples)
+
+        assert "2 shape cluster(s)" in explanation
+        assert pattern.count("|") == 1
+        compiled = re.compile(pattern)
+        for ex in examples:
+            assert compiled.fullmatch(ex), f"Pattern {pattern} did not match {ex}"
+
+    def test_memoized_by_example_set(self):
+        """Test that the same examples in any order hit the cache."""
+        _guess_regex_cached.cache_clear()
+        examples = ["ABC-001", "DEF-002", "GHI-003"]
+        first = guess_regex(examples)
+        assert guess_regex(list(reversed(examples)) + ["ABC-001"]) == first
+        assert _guess_regex_cached.cache_info().hits == 1
+
+
+class TestShapeClustering:
+    """Tests for shape skeletons and clustering."""
+
+    def test_example_shape(self):
+        """Test the run-length skeleton of a pipe line number."""
+        assert example_shape('10"-FG-001') == (
+            ("9", 2),
+            ('"', 1),
+            ("-", 1),
+            ("A", 2),
+            ("-", 1),
+            ("9", 3),
+        )
+
+    def test_coarse_fallback(self):
+        """Test that too many fine clusters collapse to alphanumeric ones."""
+        examples = ["A1-x", "1A-x", "AA-x", "11-x"]
+        assert len(cluster_examples(examples, max_clusters=4)) == 4
+        assert len(cluster_examples(examples, max_clusters=2)) == 1
+
+
+class TestScanThroughput:
+    """Tests for measure_scan_throughput."""
+
+    def test_counts_matches_and_samples(self):
+        """Test that matches are counted and large corpora are sampled."""
+        text_content = {"a.pdf": {1: "x1 x2", 2: "x3"}, "b.pdf": {1: "x4"}}
+
+        full = measure_scan_throughput(r"x\d", text_content, max_bytes=0)
+        assert full.matches == 4
+        assert full.bytes_scanned == 9
+        assert not full.sampled
+
+        sample = measure_scan_throughput(r"x\d", text_content, max_bytes=5)
+        assert sample.matches == 2
+        assert sample.sampled
+
+    def test_invalid_pattern(self):
+        """Test that invalid patterns raise ValueError."""
+        with pytest.raises(ValueError, match="Invalid keyword regex"):
+            measure_scan_throughput("[", {})
+
+
+def sellers_scores(term: str, text: str) -> list[int]:
+    """Return the textbook dynamic-programming scores ``edit_scores`` computes."""
+    previous = [0] * (len(text) + 1)
+    for i, term_char in enumerate(term, 1):
+        current = [i]
+        for j, text_char in enumerate(text, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (term_char != text_char),
+                )
+            )
+        previous = current
+    return previous[1:]
+
+
+class TestFuzzyMatching:
+    """Tests for approximate (OCR-tolerant) matching."""
+
+    TEXT_CONTENT = {
+        "scan.pdf": {
+            1: 'Line 10"-FG-0O1 joins 2"-CWS-505',
+            2: 'Split tag 10" -FG-001 and exact 10"-FG-001',
+        }
+    }
+
+    def test_edit_scores_match_dynamic_programming(self):
+        """Test the bit-parallel scores against the textbook recurrence."""
+        cases = [
+            ('10"-FG-001', 'x10"-FG-0O1 10" -FG-001'),
+            ("abab", "bababbaab"),
+            ("a-1", ""),
+        ]
+        for term, text in cases:
+            scores = edit_scores(_char_masks(term), len(term), text)
+            assert scores == sellers_scores(term, text)
+
+    def test_finds_tags_within_edits(self):
+        """Test OCR substitutions and split characters with their distances."""
+        matches = list(
+            extract_matches(
+                self.TEXT_CONTENT,
+                keyword_regex="",
+                fuzzy_terms=['10"-FG-001', '2"-CWS-505'],
+                max_edits=1,
+            )
+        )
+
+        found = [(m.page, m.match_found, m.edit_distance) for m in matches]
+        assert found == [
+            (1, '10"-FG-0O1', 1),
+            (1, '2"-CWS-505', 0),
+            (2, '10" -FG-001', 1),
+            (2, '10"-FG-001', 0),
+        ]
+
+    def test_literal_keyword_regex_is_the_term(self):
+        """Test that a literal keyword regex is matched approximately."""
+        matches = list(extract_matches(self.TEXT_CONTENT, r"10\"-FG-001", max_edits=1))
+        assert len(matches) == 3
+
+        with pytest.raises(ValueError, match="literal keyword regex"):
+            list(extract_matches(self.TEXT_CONTENT, r"\d+", max_edits=1))
+
+    def test_short_terms_rejected(self):
+        """Test that terms too short to split for k edits raise ValueError."""
+        with pytest.raises(ValueError, match="too short"):
+            FuzzyMatcher(["FG-1"], max_edits=2)
+
+    def test_overlaps_keep_fewest_edits(self):
+        """Test that overlapping hits resolve to the closest one."""
+        spans = FuzzyMatcher(["ABC-123", "ABD-123"], max_edits=1).scan("xABD-123x")
+        assert spans == [(1, 8, "ABD-123", 0)]
+
+    def test_export_column(self):
+        """Test that exports gain an edit distance column for fuzzy matches."""
+        fuzzy = list(
+            extract_matches(
+                self.TEXT_CONTENT, "", fuzzy_terms=['10"-FG-001'], max_edits=1
+            )
+        )
+        exact = list(extract_matches(self.TEXT_CONTENT, r'10"-FG-001'))
+
+        assert list(build_dataframe(fuzzy)["Edit Distance"]) == [1, 1, 0]
+        assert "Edit Distance" not in build_dataframe(exact).columns
@@ -0,0 +1,193 @@
+"""Tests for server-held result sets and the /results endpoints."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from texthunter.api.schemas import MatchResult, ResultQuery
+from texthunter.core.results import ResultSet, ResultSetRegistry, natural_key
+from texthunter.core.store import corpus_store
+from texthunter.main import app
+
+TEXT_CONTENT = {
+    "2024_SiteA_PID-010.pdf": {
+        1: 'Lines 10"-FG-001 and 4"-CWS-200',
+        2: 'Line 6"-FG-002',
+    },
+    "2024_SiteB_PID-9.pdf": {
+        1: 'Line 2"-FG-003 and 8"-HW-100',
+    },
+}
+KEYWORD_REGEX = r'\d+"-[A-Z]+-\d+'
+FILE_IDENTIFIER_REGEX = r"(?P<project_id>\d{4}_\w+?)_(?P<sheet_no>PID-\d+)"
+
+
+def make_matches(count: int) -> list[MatchResult]:
+    """Return ``count`` synthetic matches over three files."""
+    return [
+        MatchResult(
+            source_file=f"file-{i % 3}.pdf",
+            sheet_no=f"PID-{i % 3 + 8}",
+            page=i % 5 + 1,
+            match_found=f"TAG-{i:04d}",
+            context=f"... TAG-{i:04d} ...",
+        )
+        for i in range(count)
+    ]
+
+
+def collect(result_set: ResultSet, **query) -> list[MatchResult]:
+    """Page through a view with a small limit and return all rows."""
+    rows = []
+    cursor = None
+    while True:
+        page = result_set.page(ResultQuery(limit=7, cursor=cursor, **query))
+        rows.extend(page.matches)
+        cursor = page.next_cursor
+        if cursor is None:
+            return rows
+
+
+class TestResultSet:
+    """Tests for sorting, filtering and paging a result set."""
+
+    def test_pages_cover_all_rows_once(self):
+        """Test that following cursors returns every row in order."""
+        matches = make_matches(50)
+        assert collect(ResultSet(matches)) == matches
+
+    def test_sort(self):
+        """Test ascending and descending sorts with natural ordering."""
+        result_set = ResultSet(make_matches(30))
+        rows = collect(result_set, sort="sheet_no")
+        assert [m.sheet_no for m in rows] == sorted(
+            (m.sheet_no for m in rows), key=natural_key
+        )
+        assert rows[0].sheet_no == "PID-8"
+        assert rows[-1].sheet_no == "PID-10"
+
+        descending = collect(result_set, sort="page", descending=True)
+        assert [m.page for m in descending] == sorted(
+            (m.page for m in rows), reverse=True
+        )
+
+    def test_filters_and_facets(self):
+        """Test that filters narrow the rows, count and facets together."""
+        result_set = ResultSet(make_matches(60))
+        rows = collect(result_set, source_file="file-1.pdf", regex=r"[05]$")
+
+        assert rows
+        assert all(m.source_file == "file-1.pdf" for m in rows)
+        assert all(m.match_found[-1] in "05" for m in rows)
+
+        page = result_set.page(ResultQuery(source_file="file-1.pdf", regex=r"[05]$"))
+        assert page.total_count == len(rows)
+        assert page.facets["source_file"][0].model_dump() == {
+            "value": "file-1.pdf",
+            "count": len(rows),
+        }
+        assert result_set.page(ResultQuery(contains="tag-000")).total_count == 10
+
+    def test_selective_filter_pages_from_cached_order(self):
+        """Test that a filtered sort is built once and cursors seek into it."""
+        result_set = ResultSet(make_matches(300))
+        query = {"regex": r"[05]0$", "sort": "match_found", "descending": True}
+        rows = collect(result_set, **query)
+        assert [m.match_found for m in rows] == [
+            f"TAG-{i:04d}" for i in range(250, -1, -50)
+        ]
+
+        view = result_set.view(ResultQuery(**query))
+        assert list(view.orders) == ["match_found"]
+        order = view.orders["match_found"]
+        assert len(order) == view.count == len(rows)
+        collect(result_set, **query)
+        assert view.orders["match_found"] is order
+
+        # The same rows come from the full sort order once that exists
+        presorted = ResultSet(result_set.matches)
+        presorted.order("match_found")
+        assert collect(presorted, **query) == rows
+
+    def test_cursor_must_match_query(self):
+        """Test that a cursor cannot be reused with different filters."""
+        result_set = ResultSet(make_matches(20))
+        cursor = result_set.page(ResultQuery(limit=5)).next_cursor
+
+        with pytest.raises(ValueError, match="does not match"):
+            result_set.page(ResultQuery(limit=5, cursor=cursor, sort="page"))
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            result_set.page(ResultQuery(cursor="not-a-cursor"))
+
+    def test_invalid_regex_filter(self):
+        """Test that an invalid regex filter raises ValueError."""
+        with pytest.raises(ValueError, match="Invalid regex filter"):
+            ResultSet(make_matches(3)).page(ResultQuery(regex="("))
+
+    def test_registry_reloads_from_store(self, tmp_path, monkeypatch):
+        """Test that a result set not held in memory is read from the store."""
+        monkeypatch.setattr(corpus_store, "root", tmp_path)
+        matches = make_matches(4)
+        corpus_store.put_results("abc123", matches)
+
+        registry = ResultSetRegistry(max_sets=1)
+        assert registry.get("abc123").matches == matches
+        with pytest.raises(KeyError):
+            registry.get("missing")
+
+
+class TestResultRoutes:
+    """Tests for creating and querying result sets over HTTP."""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        """Return a client whose store lives in a temporary directory."""
+        monkeypatch.setattr(corpus_store, "root", tmp_path)
+        return TestClient(app)
+
+    def test_create_and_query(self, client):
+        """Test paging a result set sorted by sheet number."""
+        created = client.post(
+            "/results",
+            json={
+                "text_content": TEXT_CONTENT,
+                "keyword_regex": KEYWORD_REGEX,
+                "file_identifier_regex": FILE_IDENTIFIER_REGEX,
+            },
+        )
+        assert created.status_code == 200
+        info = created.json()
+        assert info["total_count"] == 5
+
+        url = f"/results/{info['result_id']}/query"
+        first = client.post(url, json={"sort": "sheet_no", "limit": 2}).json()
+        assert first["total_count"] == 5
+        assert [m["sheet_no"] for m in first["matches"]] == ["PID-9", "PID-9"]
+        assert {f["value"]: f["count"] for f in first["facets"]["project_id"]} == {
+            "2024_SiteA": 3,
+            "2024_SiteB": 2,
+        }
+
+        rest = client.post(
+            url,
+            json={"sort": "sheet_no", "limit": 10, "cursor": first["next_cursor"]},
+        ).json()
+        assert len(rest["matches"]) == 3
+        assert rest["next_cursor"] is None
+
+        filtered = client.post(url, json={"contains": "-fg-", "page": 1}).json()
+        assert [m["match_found"] for m in filtered["matches"]] == [
+            '10"-FG-001',
+            '2"-FG-003',
+        ]
+
+    def test_errors(self, client):
+        """Test 404 for unknown result sets and 400 for bad filters."""
+        assert client.post("/results/missing/query", json={}).status_code == 404
+
+        created = client.post(
+            "/results",
+            json={"text_content": TEXT_CONTENT, "keyword_regex": KEYWORD_REGEX},
+        ).json()
+        url = f"/results/{created['result_id']}/query"
+        assert client.post(url, json={"regex": "("}).status_code == 400
+        assert client.post(url, json={"cursor": "bogus"}).status_code == 400
@@ -0,0 +1,260 @@
+"""Tests for the shared on-disk corpus store."""
+
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from texthunter.api import routes
+from texthunter.core.regex import extract_matches
+from texthunter.core.store import CorpusStore, corpus_id_for, corpus_store
+from texthunter.main import app
+
+TEXT_CONTENT = {
+    "2024_SiteA_PID-001.pdf": {
+        1: 'Line connects to 10"-FG-001 at valve',
+        2: 'Unicode µ text with 2"-CWS-505',
+    },
+    "empty.pdf": {1: ""},
+}
+KEYWORD_REGEX = r'\d+"-[A-Z]+-\d+'
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Return a store rooted in a temporary directory."""
+    return CorpusStore(tmp_path, open_cache_size=1, result_cache_entries=2)
+
+
+class TestCorpusStore:
+    """Tests for storing and memory-mapping corpora."""
+
+    def test_round_trip(self, store):
+        """Test that a stored corpus reads back like the original dict."""
+        corpus_id = store.put(TEXT_CONTENT)
+        corpus = store.get(corpus_id)
+
+        assert {f: dict(p) for f, p in corpus.items()} == TEXT_CONTENT
+        assert corpus.page_count == 3
+        assert store.put(TEXT_CONTENT) == corpus_id
+
+    def test_extract_from_mapped_corpus(self, store):
+        """Test that extraction over a mapped corpus matches the dict result."""
+        corpus = store.get(store.put(TEXT_CONTENT))
+
+        mapped = list(extract_matches(corpus, KEYWORD_REGEX))
+        inline = list(extract_matches(TEXT_CONTENT, KEYWORD_REGEX))
+        assert mapped == inline
+
+    @pytest.mark.parametrize(
+        "pattern", [KEYWORD_REGEX, r"[0-9]+", r"\w+ \S", r"(?i)LINE", r"µ \w+"]
+    )
+    @pytest.mark.parametrize("context_chars", [0, 3, 20])
+    def test_bytes_scan_matches_text_scan(self, store, pattern, context_chars):
+        """Test that scanning mapped bytes gives the decoded-text results."""
+        text_content = {
+            **TEXT_CONTENT,
+            "ascii.pdf": {1: 'Line 3"-PW-300 and 4"-PW-301\nnext', 2: "line"},
+            "mixed.pdf": {1: 'µ 5"-N2-500 ¾ 6"-N2-600 €€€€€€€€€€€€ line'},
+        }
+        corpus = store.get(store.put(text_content))
+        assert corpus["ascii.pdf"].ascii
+        assert not corpus["mixed.pdf"].ascii
+
+        mapped = list(extract_matches(corpus, pattern, context_chars=context_chars))
+        inline = list(
+            extract_matches(text_content, pattern, context_chars=context_chars)
+        )
+        assert mapped == inline
+
+    def test_writer_streams_pages(self, store):
+        """Test that a streamed corpus gets the same ID and stores text once."""
+        pages = {i: 'TITLE BLOCK 10"-FG-001' for i in range(1, 51)}
+        writer = store.writer()
+        writer.add_file("repeated.pdf", iter(pages.items()))
+        corpus_id = writer.commit()
+
+        assert corpus_id == corpus_id_for({"repeated.pdf": pages})
+        corpus = store.get(corpus_id)
+        assert corpus.nbytes == len(pages[1])
+        assert dict(corpus["repeated.pdf"]) == pages
+        assert len(list(extract_matches(corpus, KEYWORD_REGEX))) == 50
+        assert not list(store.corpora_dir.glob("*.tmp"))
+
+    def test_shared_between_instances(self, store, tmp_path):
+        """Test that a second store on the same directory (worker) sees it."""
+        corpus_id = store.put(TEXT_CONTENT)
+        other_worker = CorpusStore(tmp_path)
+        assert dict(other_worker.get(corpus_id)["empty.pdf"]) == {1: ""}
+
+    def test_delete(self, store):
+        """Test that deleted corpora are gone."""
+        corpus_id = store.put(TEXT_CONTENT)
+        store.get(corpus_id)
+
+        assert store.delete(corpus_id)
+        assert not store.delete(corpus_id)
+        with pytest.raises(KeyError):
+            store.get(corpus_id)
+
+    def test_delete_during_scan(self, store):
+        """Test that a delete does not close the mapping a scan is reading."""
+        corpus_id = store.put(TEXT_CONTENT)
+        corpus = store.get(corpus_id)
+        pages = iter(corpus["2024_SiteA_PID-001.pdf"].items())
+        first = next(pages)
+
+        assert store.delete(corpus_id)
+        assert [first, *pages] == list(TEXT_CONTENT["2024_SiteA_PID-001.pdf"].items())
+        assert dict(corpus["empty.pdf"]) == {1: ""}
+        assert not list(store.corpora_dir.iterdir())
+        with pytest.raises(KeyError):
+            store.get(corpus_id)
+
+    def test_result_cache_eviction(self, store):
+        """Test that cached results round-trip and old entries are evicted."""
+        matches = list(extract_matches(TEXT_CONTENT, KEYWORD_REGEX))
+        keys = [store.result_key("c", str(i)) for i in range(3)]
+        for key in keys:
+            store.put_results(key, matches)
+
+        assert store.get_results(keys[-1]) == matches
+        assert len(list(store.results_dir.glob("*.json"))) == 2
+
+
+class TestCorpusRoutes:
+    """Tests for uploading corpora and extracting by corpus_id."""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        """Return a client whose store lives in a temporary directory."""
+        monkeypatch.setattr(corpus_store, "root", tmp_path)
+        return TestClient(app)
+
+    def test_upload_and_extract(self, client):
+        """Test extraction against an uploaded corpus, twice (cache hit)."""
+        upload = client.post("/corpora", json={"text_content": TEXT_CONTENT})
+        assert upload.status_code == 200
+        info = upload.json()
+        assert info["files"] == 2
+        assert info["pages"] == 3
+
+        for _ in range(2):
+            response = client.post(
+                "/extract-all",
+                json={"corpus_id": info["corpus_id"], "keyword_regex": KEYWORD_REGEX},
+            )
+            assert response.status_code == 200
+            assert response.json()["total_count"] == 2
+
+    def test_stream_upload(self, client, tmp_path):
+        """Test a gzip NDJSON upload in chunks, stored like the same dict."""
+        lines = [
+            json.dumps({"filename": name, "page": page, "text": text})
+            for name, pages in TEXT_CONTENT.items()
+            for page, text in pages.items()
+        ]
+        body = gzip.compress(("\n".join(lines) + "\n\n").encode("utf-8"))
+        upload = client.post(
+            "/corpora/stream",
+            content=iter([body[:20], body[20:]]),
+            headers={
+                "Content-Type": "application/x-ndjson",
+                "Content-Encoding": "gzip",
+            },
+        )
+        assert upload.status_code == 200
+        info = upload.json()
+        assert info["corpus_id"] == corpus_id_for(TEXT_CONTENT)
+        assert (info["files"], info["pages"]) == (2, 3)
+        assert not list(tmp_path.glob("corpora/*.tmp"))
+
+    def test_stream_upload_errors(self, client, tmp_path, monkeypatch):
+        """Test malformed streams, which leave nothing in the store."""
+
+        def post(*lines: dict | str, content_type="application/x-ndjson"):
+            body = "\n".join(
+                line if isinstance(line, str) else json.dumps(line) for line in lines
+            )
+            return client.post(
+                "/corpora/stream", content=body, headers={"Content-Type": content_type}
+            )
+
+        page = {"filename": "a.pdf", "page": 1, "text": "x"}
+        other = {"filename": "b.pdf", "page": 1, "text": "y"}
+        assert post(page, other, page).json()["detail"] == (
+            "Pages of a.pdf are not consecutive"
+        )
+        assert post(page, "{").json()["detail"].startswith("Line 2: Invalid JSON")
+        missing = post({"filename": "a.pdf", "page": 1}).json()["detail"]
+        assert missing == "Line 1: text: Field required"
+        assert post(page, content_type="application/json").status_code == 415
+        monkeypatch.setattr(routes, "MAX_CORPUS_STREAM_BYTES", 10)
+        assert post(page).status_code == 413
+        assert not list(tmp_path.glob("corpora/*"))
+
+    def test_normalized_extract(self, client):
+        """Test normalized extraction against a stored corpus."""
+        upload = client.post("/corpora", json={"text_content": TEXT_CONTENT})
+        response = client.post(
+            "/extract-all",
+            json={
+                "corpus_id": upload.json()["corpus_id"],
+                "keyword_regex": r'\d+"-[a-z]+-\d+',
+                "normalize": ["casefold"],
+            },
+        )
+        assert response.status_code == 200
+        assert response.json()["matches"][0]["match_found"] == '10"-fg-001'
+
+    def test_fuzzy_extract(self, client):
+        """Test fuzzy extraction, cached separately from the exact query."""
+        upload = client.post("/corpora", json={"text_content": TEXT_CONTENT})
+        query = {"corpus_id": upload.json()["corpus_id"], "keyword_regex": '10"-FG-011'}
+
+        exact = client.post("/extract-all", json=query)
+        assert exact.json()["total_count"] == 0
+
+        fuzzy = client.post("/extract-all", json={**query, "max_edits": 1})
+        assert fuzzy.status_code == 200
+        match = fuzzy.json()["matches"][0]
+        assert (match["match_found"], match["edit_distance"]) == ('10"-FG-001', 1)
+
+    def test_unknown_corpus(self, client):
+        """Test that unknown corpus IDs return 404."""
+        response = client.post(
+            "/extract", json={"corpus_id": "missing", "keyword_regex": "x"}
+        )
+        assert response.status_code == 404
+        assert client.get("/corpora/missing").status_code == 404
+
+    def test_requires_one_corpus_source(self, client):
+        """Test that exactly one of text_content and corpus_id is required."""
+        response = client.post("/extract", json={"keyword_regex": "x"})
+        assert response.status_code == 422
+
+    def test_guess_regex_reports_throughput(self, client):
+        """Test that /guess-regex measures the pattern on a stored corpus."""
+        corpus_id = client.post("/corpora", json={"text_content": TEXT_CONTENT})
+        response = client.post(
+            "/guess-regex",
+            json={
+                "examples": ['10"-FG-001', '2"-CWS-505'],
+                "corpus_id": corpus_id.json()["corpus_id"],
+            },
+        )
+        assert response.status_code == 200
+        throughput = response.json()["scan_throughput"]
+        assert throughput["matches"] == 2
+        assert throughput["bytes_scanned"] > 0
+
+        both = client.post(
+            "/guess-regex",
+            json={
+                "examples": ['10"-FG-001', '2"-CWS-505'],
+                "corpus_id": corpus_id.json()["corpus_id"],
+                "text_content": TEXT_CONTENT,
+            },
+        )
+        assert both.status_code == 422
@@ -0,0 +1,176 @@
+"""Tests for bulk term lookup."""
+
+import random
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+from texthunter.core.regex import extract_matches
+from texthunter.core.store import corpus_store
+from texthunter.core.terms import TermDictionary, _trie_pattern, term_dictionary
+from texthunter.main import app
+
+
+@pytest.fixture(params=[False, True], ids=["trie-regex", "aho-corasick"])
+def engine(request) -> bool:
+    """Run a test with each lookup engine."""
+    if request.param:
+        pytest.importorskip("ahocorasick")
+    return request.param
+
+
+def found(dictionary: TermDictionary, text: str) -> list[str]:
+    """Return the matched texts of a scan."""
+    return [span[2] for span in dictionary.scan(text)]
+
+
+class TestTermDictionary:
+    """Tests for scanning pages with a term dictionary."""
+
+    def test_longest_non_overlapping(self, engine):
+        """Test that the longest term wins at each position."""
+        dictionary = TermDictionary(
+            ["FG-001", "FG-001-A", "001-A"], use_automaton=engine
+        )
+        assert found(dictionary, "FG-001-A, FG-001 and 001-A") == [
+            "FG-001-A",
+            "FG-001",
+            "001-A",
+        ]
+
+    def test_word_boundaries(self, engine):
+        """Test that a term continuing a word is not reported."""
+        dictionary = TermDictionary(["FG-001"], use_automaton=engine)
+        assert found(dictionary, "FG-0012 XFG-001 FG-001.") == ["FG-001"]
+
+    def test_rejected_longer_term_keeps_prefix_term(self, engine):
+        """Test that a longer term continuing a word does not hide a shorter one."""
+        dictionary = TermDictionary(["P-101", "P-101-A"], use_automaton=engine)
+        assert found(dictionary, "see P-101-AB here") == ["P-101"]
+        assert found(dictionary, "P-101-A, P-101-AB, XP-101-A") == [
+            "P-101-A",
+            "P-101",
+        ]
+        assert dictionary.missing(found(dictionary, "see P-101-AB")) == ["P-101-A"]
+
+        nested = TermDictionary(
+            ["A-1", "A-1-2", "A-1-2-3"], ignore_case=True, use_automaton=engine
+        )
+        assert found(nested, "a-1-2-34 a-1-23") == ["a-1-2", "a-1"]
+
+    def test_ignore_case_and_whitespace(self, engine):
+        """Test that folded matches are reported as they appear in the page."""
+        dictionary = TermDictionary(
+            ['10"-FG-001', "straße-1"],
+            ignore_case=True,
+            ignore_whitespace=True,
+            use_automaton=engine,
+        )
+        text = 'See 10" -fg-001 and STRASSE-1 here'
+        spans = dictionary.scan(text)
+        assert [span[2] for span in spans] == ['10" -fg-001', "STRASSE-1"]
+        assert all(text[start:end] == match for start, end, match, _ in spans)
+
+    def test_hit_ending_inside_case_expansion(self, engine):
+        """Test that a hit ending on the first "s" of "ß" ends after the "ß"."""
+        dictionary = TermDictionary(
+            ["MASS", "STRASS", "STRASSE"], ignore_case=True, use_automaton=engine
+        )
+        text = "Maß 10, Straße"
+        spans = dictionary.scan(text)
+        assert [span[2] for span in spans] == ["Maß", "Straße"]
+        assert all(text[start:end] == match for start, end, match, _ in spans)
+        # "strass" ends inside "Straße", so it continues a word
+        assert found(TermDictionary(["STRASS"], ignore_case=True), "Straße") == []
+
+    def test_missing(self, engine):
+        """Test that terms never matched are reported in input order."""
+        dictionary = TermDictionary(
+            ["B-2", "A-1", "b-2", "C-3"], ignore_case=True, use_automaton=engine
+        )
+        assert dictionary.missing(["a-1"]) == ["B-2", "C-3"]
+
+    def test_no_terms(self):
+        """Test that an empty term list is rejected."""
+        with pytest.raises(ValueError, match="No terms"):
+            TermDictionary(["", "   "], ignore_whitespace=True)
+
+    def test_trie_pattern_matches_alternation(self):
+        """Test that the trie regex finds what a longest-first alternation does."""
+        rng = random.Random(3)
+        terms = {"".join(rng.choices("AB-1", k=rng.randint(1, 5))) for _ in range(60)}
+        alternation = re.compile(
+            "|".join(map(re.escape, sorted(terms, key=len, reverse=True)))
+        )
+        trie = re.compile(_trie_pattern(terms))
+        for _ in range(200):
+            text = "".join(rng.choices("AB-1 ", k=40))
+            assert trie.findall(text) == alternation.findall(text)
+
+    def test_dictionary_cached(self):
+        """Test that the same term list compiles once."""
+        assert term_dictionary(["X-1", "Y-2"]) is term_dictionary(["X-1", "Y-2"])
+
+
+class TestTermExtraction:
+    """Tests for term lookup in extractions."""
+
+    TEXT_CONTENT = {
+        "2024_SiteA_PID-010.pdf": {
+            1: 'Lines 10"-FG-001 and 4"-cws-200',
+            2: 'Line 6"-FG-002',
+        },
+    }
+
+    def test_extract_matches(self):
+        """Test that extract_matches reports dictionary hits per page."""
+        dictionary = term_dictionary(['10"-FG-001', '6"-FG-002'])
+        matches = list(
+            extract_matches(self.TEXT_CONTENT, "", None, term_dictionary=dictionary)
+        )
+        assert [(m.page, m.match_found) for m in matches] == [
+            (1, '10"-FG-001'),
+            (2, '6"-FG-002'),
+        ]
+
+    def test_rejects_fuzzy(self):
+        """Test that term lookup cannot be combined with fuzzy matching."""
+        with pytest.raises(ValueError, match="cannot be combined"):
+            list(
+                extract_matches(
+                    self.TEXT_CONTENT,
+                    "",
+                    None,
+                    fuzzy_terms=["FG-001"],
+                    max_edits=1,
+                    term_dictionary=term_dictionary(["FG-001"]),
+                )
+            )
+
+    def test_route_reports_missing_terms(self, tmp_path, monkeypatch):
+        """Test /extract and /extract-all with a term list."""
+        monkeypatch.setattr(corpus_store, "root", tmp_path)
+        client = TestClient(app)
+        query = {
+            "text_content": self.TEXT_CONTENT,
+            "keyword_regex": "",
+            "terms": ['4"-CWS-200', '10"-FG-001', '2"-HW-999'],
+            "ignore_case": True,
+        }
+
+        preview = client.post("/extract", json=query)
+        assert preview.status_code == 200
+        assert preview.json()["missing_terms"] == ['2"-HW-999']
+
+        full = client.post("/extract-all", json=query).json()
+        assert [m["match_found"] for m in full["matches"]] == [
+            '10"-FG-001',
+            '4"-cws-200',
+        ]
+        assert full["missing_terms"] == ['2"-HW-999']
+
+        plain = client.post(
+            "/extract-all", json={**query, "terms": [], "keyword_regex": "FG"}
+        ).json()
+        assert plain["missing_terms"] is None
@@ -0,0 +1,122 @@
+"""Tests for compressed and MessagePack wire formats."""
+
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from texthunter.main import app
+
+PAYLOAD = {
+    "filenames": ["test.pdf"],
+    "keyword_regex": r'\d+"-[A-Z]+-\d+',
+    "text_content": {
+        "test.pdf": {1: 'Line connects to 10"-FG-001 at valve ' * 50},
+    },
+}
+
+
+@pytest.fixture
+def client():
+    """Return a test client for the API app."""
+    return TestClient(app)
+
+
+def _json_payload() -> dict:
+    pages = {str(k): v for k, v in PAYLOAD["text_content"]["test.pdf"].items()}
+    return {**PAYLOAD, "text_content": {"test.pdf": pages}}
+
+
+class TestRequestDecoding:
+    """Tests for compressed and MessagePack request bodies."""
+
+    def test_gzip_request(self, client):
+        """Test that a gzip-encoded JSON body is decoded."""
+        body = gzip.compress(json.dumps(_json_payload()).encode())
+        response = client.post(
+            "/extract",
+            content=body,
+            headers={"Content-Encoding": "gzip", "Content-Type": "application/json"},
+        )
+        assert response.status_code == 200
+        assert response.json()["total_count"] == 50
+
+    def test_zstd_request(self, client):
+        """Test that a zstd-encoded JSON body is decoded."""
+        zstandard = pytest.importorskip("zstandard")
+        body = zstandard.ZstdCompressor().compress(json.dumps(_json_payload()).encode())
+        response = client.post(
+            "/extract",
+            content=body,
+            headers={"Content-Encoding": "zstd", "Content-Type": "application/json"},
+        )
+        assert response.status_code == 200
+        assert response.json()["total_count"] == 50
+
+    def test_msgpack_request(self, client):
+        """Test that a MessagePack body with integer page keys is accepted."""
+        msgpack = pytest.importorskip("msgpack")
+        response = client.post(
+            "/extract-all",
+            content=msgpack.packb(PAYLOAD),
+            headers={"Content-Type": "application/msgpack"},
+        )
+        assert response.status_code == 200
+        assert response.json()["total_count"] == 50
+        assert response.json()["matches"][0]["page"] == 1
+
+    def test_unsupported_encoding(self, client):
+        """Test that unknown content codings are rejected with 415."""
+        response = client.post(
+            "/extract", content=b"xx", headers={"Content-Encoding": "br"}
+        )
+        assert response.status_code == 415
+
+    def test_corrupt_gzip(self, client):
+        """Test that an undecodable body is rejected with 400."""
+        response = client.post(
+            "/extract",
+            content=b"not gzip at all",
+            headers={"Content-Encoding": "gzip", "Content-Type": "application/json"},
+        )
+        assert response.status_code == 400
+
+
+class TestResponseEncoding:
+    """Tests for negotiated response formats."""
+
+    def test_gzip_response(self, client):
+        """Test that large JSON responses are gzip-compressed on request."""
+        response = client.post(
+            "/extract-all", json=_json_payload(), headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json()["total_count"] == 50
+
+    def test_small_response_uncompressed(self, client):
+        """Test that responses below the size threshold are sent as-is."""
+        response = client.get("/health", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+    def test_identity_response(self, client):
+        """Test that nothing is compressed without Accept-Encoding."""
+        response = client.post(
+            "/extract-all",
+            json=_json_payload(),
+            headers={"Accept-Encoding": "identity"},
+        )
+        assert "content-encoding" not in response.headers
+
+    def test_msgpack_response(self, client):
+        """Test that MessagePack responses are returned when accepted."""
+        msgpack = pytest.importorskip("msgpack")
+        response = client.post(
+            "/extract",
+            json=_json_payload(),
+            headers={"Accept": "application/msgpack"},
+        )
+        assert response.headers["content-type"] == "application/msgpack"
+        data = msgpack.unpackb(response.content)
+        assert data["total_count"] == 50
+        assert data["preview_count"] == 10
@@ -0,0 +1,409 @@
+"""Admission control and backpressure for heavy endpoints.
+
+Extraction and export requests hold whole corpora and result sets in
+memory, so running too many at once can exhaust the host. Each endpoint
+class gets an ``AdmissionController`` that bounds concurrency and queue
+length, and all controllers share a ``MemoryBudget`` of in-flight corpus
+bytes. Requests that cannot be admitted are rejected with 429 (queue full)
+or 503 (timed out waiting) and a ``Retry-After`` header, instead of
+slowing down everyone else.
+
+``BodySizeLimitMiddleware`` rejects oversized request bodies with 413
+before they are parsed.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Iterable, Iterator, Mapping
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from texthunter.api.schemas import MatchResult
+from texthunter.api.wire import is_streamed
+from texthunter.config.settings import (
+    ADMISSION_QUEUE_TIMEOUT,
+    ADMISSION_RETRY_AFTER,
+    MAX_CONCURRENT_EXPORTS,
+    MAX_CONCURRENT_EXTRACTIONS,
+    MAX_INFLIGHT_CORPUS_BYTES,
+    MAX_QUEUED_EXPORTS,
+    MAX_QUEUED_EXTRACTIONS,
+    MAX_REQUEST_BODY_BYTES,
+    WORKERS,
+)
+from texthunter.core.store import MappedCorpus
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_corpus_bytes(text_content: Mapping[str, Mapping[int, str]]) -> int:
+    """Approximate the in-memory size of a corpus by its character count."""
+    if isinstance(text_content, MappedCorpus):
+        return text_content.nbytes
+    return sum(len(text) for pages in text_content.values() for text in pages.values())
+
+
+def estimate_matches_bytes(matches: Iterable[MatchResult]) -> int:
+    """Approximate the in-memory size of matches by their text."""
+    return sum(
+        len(m.source_file) + len(m.match_found) + len(m.context) for m in matches
+    )
+
+
+class MemoryBudget:
+    """Shared allowance of in-flight corpus bytes across controllers.
+
+    The budget's lock guards the state of every controller using it, so
+    memory freed by one endpoint class can admit requests queued in another.
+    A thread lock (not asyncio) keeps the state safe to share between event
+    loops, e.g. the per-request loops of Starlette's TestClient.
+    """
+
+    def __init__(self, limit_bytes: int, request_limit_bytes: int | None = None):
+        """Create a budget; a limit of 0 disables memory accounting.
+
+        Args:
+            limit_bytes: Bytes held at once by the requests admitted
+            request_limit_bytes: Largest single request; defaults to
+                ``limit_bytes``. A request larger than ``limit_bytes`` but
+                within this runs only while nothing else holds the budget.
+
+        """
+        self.limit_bytes = limit_bytes
+        self.request_limit_bytes = (
+            limit_bytes if request_limit_bytes is None else request_limit_bytes
+        )
+        self.in_use = 0
+        self.lock = threading.Lock()
+        self.controllers: list[AdmissionController] = []
+
+    def fits(self, cost: int) -> bool:
+        """Whether ``cost`` more bytes fit in the budget right now."""
+        return (
+            self.limit_bytes <= 0
+            or self.in_use + cost <= self.limit_bytes
+            or self.in_use == 0  # alone, within request_limit_bytes
+        )
+
+
+@dataclass
+class _Waiter:
+    cost: int
+    future: asyncio.Future
+    granted: bool = False
+
+
+@dataclass
+class AdmissionStats:
+    """Counters reported for one endpoint class."""
+
+    admitted: int = 0
+    rejected_queue_full: int = 0
+    rejected_timeout: int = 0
+    rejected_too_large: int = 0
+    max_wait_seconds: float = 0.0
+    recent_waits: deque = field(default_factory=lambda: deque(maxlen=100))
+
+
+class AdmissionController:
+    """Bound concurrency and queueing for one class of endpoints.
+
+    Waiters are admitted strictly in FIFO order, so a large request at the
+    head of the queue is not starved by smaller ones behind it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int,
+        max_queued: int,
+        queue_timeout: float,
+        budget: MemoryBudget,
+        retry_after: int = ADMISSION_RETRY_AFTER,
+    ):
+        """Create a controller.
+
+        Args:
+            name: Endpoint class name used in logs and stats
+            max_concurrent: Requests allowed to run at once
+            max_queued: Requests allowed to wait for a slot
+            queue_timeout: Seconds a request may wait before a 503
+            budget: Memory budget shared with other controllers
+            retry_after: Seconds suggested to rejected clients
+
+        """
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.budget = budget
+        self.retry_after = retry_after
+        self.active = 0
+        self.stats = AdmissionStats()
+        self._queue: deque[_Waiter] = deque()
+        self._lock = budget.lock
+        budget.controllers.append(self)
+
+    @property
+    def queued(self) -> int:
+        """Number of requests waiting for a slot."""
+        return len(self._queue)
+
+    def _can_run(self, cost: int) -> bool:
+        return self.active < self.max_concurrent and self.budget.fits(cost)
+
+    def _reject(self, status_code: int, detail: str) -> HTTPException:
+        logger.warning("Admission rejected (%s): %s", self.name, detail)
+        return HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    async def acquire(self, cost: int = 0) -> float:
+        """Wait for a slot and reserve ``cost`` bytes of the memory budget.
+
+        Returns:
+            Seconds spent waiting in the queue
+
+        Raises:
+            HTTPException: 413 if ``cost`` exceeds the budget's request limit,
+                429 if the queue is full, 503 if no slot freed up within the
+                timeout
+
+        """
+        if 0 < self.budget.request_limit_bytes < cost:
+            # Under the lock: job threads acquire through ``admit_blocking``
+            with self._lock:
+                self.stats.rejected_too_large += 1
+            raise HTTPException(
+                status_code=413,
+                detail=f"Corpus of {cost} bytes exceeds the server limit of "
+                f"{self.budget.request_limit_bytes} bytes",
+            )
+
+        with self._lock:
+            if not self._queue and self._can_run(cost):
+                self._grant(cost)
+                self.stats.admitted += 1
+                return 0.0
+            if len(self._queue) >= self.max_queued:
+                self.stats.rejected_queue_full += 1
+                raise self._reject(
+                    429, f"Too many {self.name} requests queued; try again later"
+                )
+            waiter = _Waiter(cost, asyncio.get_running_loop().create_future())
+            self._queue.append(waiter)
+
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter.future, self.queue_timeout)
+        except (TimeoutError, asyncio.CancelledError) as e:
+            with self._lock:
+                if waiter.granted:
+                    # Granted just as we gave up: hand the slot back.
+                    self._release(waiter.cost)
+                else:
+                    self._queue.remove(waiter)
+                if isinstance(e, TimeoutError):
+                    self.stats.rejected_timeout += 1
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self._reject(
+                503,
+                f"Server busy: {self.name} queue wait exceeded "
+                f"{self.queue_timeout:.0f}s",
+            ) from e
+
+        waited = time.monotonic() - start
+        with self._lock:
+            self.stats.admitted += 1
+            self.stats.max_wait_seconds = max(self.stats.max_wait_seconds, waited)
+            self.stats.recent_waits.append(waited)
+        logger.debug("Admitted %s request after %.3fs in queue", self.name, waited)
+        return waited
+
+    def release(self, cost: int = 0) -> None:
+        """Free a slot and its memory reservation, waking queued requests."""
+        with self._lock:
+            self._release(cost)
+
+    def _grant(self, cost: int) -> None:
+        self.active += 1
+        self.budget.in_use += cost
+
+    def _release(self, cost: int) -> None:
+        self.active -= 1
+        self.budget.in_use -= cost
+        for controller in self.budget.controllers:
+            controller._drain()
+
+    def _drain(self) -> None:
+        while self._queue and self._can_run(self._queue[0].cost):
+            waiter = self._queue.popleft()
+            self._grant(waiter.cost)
+            waiter.granted = True
+            loop = waiter.future.get_loop()
+            loop.call_soon_threadsafe(_resolve, waiter.future)
+
+    @asynccontextmanager
+    async def admit(self, cost: int = 0) -> AsyncIterator[float]:
+        """Context manager form of ``acquire``/``release``."""
+        waited = await self.acquire(cost)
+        try:
+            yield waited
+        finally:
+            self.release(cost)
+
+    @contextmanager
+    def admit_blocking(self, cost: int = 0) -> Iterator[float]:
+        """``admit`` for threads without an event loop, such as job workers.
+
+        Raises:
+            HTTPException: As ``acquire``
+
+        """
+        waited = asyncio.run(self.acquire(cost))
+        try:
+            yield waited
+        finally:
+            self.release(cost)
+
+    def snapshot(self) -> dict:
+        """Return current queue depth, concurrency and wait-time figures."""
+        with self._lock:
+            recent = list(self.stats.recent_waits)
+            return {
+                "active": self.active,
+                "queued": len(self._queue),
+                "max_concurrent": self.max_concurrent,
+                "max_queued": self.max_queued,
+                "admitted": self.stats.admitted,
+                "rejected_queue_full": self.stats.rejected_queue_full,
+                "rejected_timeout": self.stats.rejected_timeout,
+                "rejected_too_large": self.stats.rejected_too_large,
+                "avg_wait_seconds": (sum(recent) / len(recent) if recent else 0.0),
+                "max_wait_seconds": self.stats.max_wait_seconds,
+            }
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def per_worker(limit: int, workers: int = WORKERS) -> int:
+    """Return one worker process's share of a server-wide limit.
+
+    Every worker gets at least 1; a limit of 0 (disabled) stays 0.
+    """
+    return max(1, limit // max(1, workers)) if limit > 0 else limit
+
+
+# Each worker process enforces its share of the limits, so N workers
+# together stay within them. A corpus over a worker's share of the memory
+# budget (but within the whole) still runs, alone in its worker.
+memory_budget = MemoryBudget(
+    per_worker(MAX_INFLIGHT_CORPUS_BYTES), MAX_INFLIGHT_CORPUS_BYTES
+)
+extraction_admission = AdmissionController(
+    "extract",
+    per_worker(MAX_CONCURRENT_EXTRACTIONS),
+    per_worker(MAX_QUEUED_EXTRACTIONS),
+    ADMISSION_QUEUE_TIMEOUT,
+    memory_budget,
+)
+export_admission = AdmissionController(
+    "export",
+    per_worker(MAX_CONCURRENT_EXPORTS),
+    per_worker(MAX_QUEUED_EXPORTS),
+    ADMISSION_QUEUE_TIMEOUT,
+    memory_budget,
+)
+
+
+def admission_snapshot() -> dict:
+    """Return stats for every endpoint class and the shared memory budget."""
+    with memory_budget.lock:
+        in_use = memory_budget.in_use
+    return {
+        "extract": extraction_admission.snapshot(),
+        "export": export_admission.snapshot(),
+        "memory": {
+            "in_use_bytes": in_use,
+            "limit_bytes": memory_budget.limit_bytes,
+            "request_limit_bytes": memory_budget.request_limit_bytes,
+        },
+    }
+
+
+class BodySizeLimitMiddleware:
+    """Reject request bodies larger than ``max_bytes`` with 413."""
+
+    def __init__(self, app: ASGIApp, max_bytes: int = MAX_REQUEST_BODY_BYTES):
+        """Wrap an ASGI app; a limit of 0 disables the check."""
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle one ASGI connection."""
+        if scope["type"] != "http" or self.max_bytes <= 0:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if is_streamed(headers):
+            # Streamed uploads are capped by their route as they are read
+            await self.app(scope, receive, send)
+            return
+
+        content_length = headers.get("content-length")
+        if content_length is not None:
+            if int(content_length) > self.max_bytes:
+                await self._too_large(scope, receive, send)
+                return
+            await self.app(scope, receive, send)
+            return
+
+        # No declared length (chunked upload): buffer up to the limit.
+        chunks = []
+        size = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_bytes:
+                await self._too_large(scope, receive, send)
+                return
+            chunks.append(chunk)
+            more_body = message.get("more_body", False)
+
+        body = b"".join(chunks)
+        sent = False
+
+        async def replay() -> Message:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app(scope, replay, send)
+
+    async def _too_large(self, scope: Scope, receive: Receive, send: Send) -> None:
+        logger.warning("Rejected request body larger than %d bytes", self.max_bytes)
+        response = JSONResponse(
+            {"detail": f"Request body exceeds {self.max_bytes} bytes"},
+            status_code=413,
+        )
+        await response(scope, receive, send)
@@ -1,36 +1,335 @@
 """API route definitions."""
 
+import asyncio
 import logging
 import re
+from collections.abc import Callable, Iterator, Mapping
 from datetime import datetime
+from typing import TypeVar
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from starlette.concurrency import run_in_threadpool
 
+from texthunter.api.admission import (
+    admission_snapshot,
+    estimate_corpus_bytes,
+    estimate_matches_bytes,
+    export_admission,
+    extraction_admission,
+)
 from texthunter.api.schemas import (
+    CancelResponse,
+    CorpusInfo,
+    CorpusPage,
+    CorpusUploadRequest,
     ExportRequest,
+    ExtractionDiff,
+    ExtractionDiffRequest,
     ExtractionRequest,
     ExtractionResponse,
+    JobInfo,
+    LiveSearchOpen,
+    LiveSearchQuery,
+    MatchResult,
+    RegexAnalysis,
+    RegexAnalyzeRequest,
     RegexGuessRequest,
     RegexGuessResponse,
+    ResultPage,
+    ResultQuery,
+    ResultSetInfo,
+)
+from texthunter.api.wire import (
+    NDJSON_MEDIA_TYPE,
+    WireRoute,
+    is_streamed,
+    negotiate_response,
+)
+from texthunter.config.settings import (
+    ADMISSION_RETRY_AFTER,
+    DISCONNECT_POLL_INTERVAL,
+    JOB_ARTIFACT_CHUNK_MATCHES,
+    JOB_PROGRESS_INTERVAL,
+    LIVE_SEARCH_DEBOUNCE,
+    LIVE_SEARCH_PROGRESS_INTERVAL,
+    MAX_CORPUS_STREAM_BYTES,
+)
+from texthunter.core.analyzer import analyze_pattern, auto_optimize
+from texthunter.core.cancellation import (
+    CancellationToken,
+    ExtractionCancelled,
+    query_registry,
 )
-from texthunter.core.excel import generate_excel
-from texthunter.core.regex import extract_matches, guess_regex
+from texthunter.core.dedup import canonical_forms, normalize_text
+from texthunter.core.export import export_matches, iter_file
+from texthunter.core.incremental import Scan, diff_revisions, extract_revision
+from texthunter.core.jobs import FINISHED, Job, JobQueueFull, job_manager
+from texthunter.core.live import LiveQuery, LiveSearchSession
+from texthunter.core.regex import (
+    extract_matches,
+    guess_regex,
+    measure_scan_throughput,
+)
+from texthunter.core.results import result_sets
+from texthunter.core.store import (
+    CorpusWriter,
+    MappedCorpus,
+    corpus_id_for,
+    corpus_store,
+)
+from texthunter.core.terms import TermDictionary, term_dictionary
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(route_class=WireRoute)
+
+T = TypeVar("T")
+
+_MATCH_LIST = TypeAdapter(list[MatchResult])
+_SPOOLED_MATCHES = "matches.json"
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def resolve_corpus(
+    payload: ExtractionRequest
+    | RegexGuessRequest
+    | RegexAnalyzeRequest
+    | LiveSearchOpen,
+) -> Mapping[str, Mapping[int, str]] | None:
+    """Return the request's inline corpus or the stored one it references.
+
+    Raises:
+        HTTPException: 404 if ``corpus_id`` is not in the store
+
+    """
+    if payload.corpus_id is None:
+        return payload.text_content
+    try:
+        return corpus_store.get(payload.corpus_id)
+    except KeyError as e:
+        raise HTTPException(
+            status_code=404, detail=f"Unknown corpus: {payload.corpus_id}"
+        ) from e
+
+
+def apply_auto_optimize(
+    payload: ExtractionRequest,
+) -> tuple[ExtractionRequest, str | None]:
+    """Rewrite the payload's keyword regex per ``REGEX_AUTO_OPTIMIZE``.
+
+    Returns the payload to run and the rewritten pattern, or None if the
+    pattern was left as written.
+    """
+    optimized = auto_optimize(payload.keyword_regex)
+    if optimized == payload.keyword_regex:
+        return payload, None
+    return payload.model_copy(update={"keyword_regex": optimized}), optimized
+
+
+def query_parts(payload: ExtractionRequest) -> list[str | None]:
+    """Return the parameters that determine an extraction's matches."""
+    parts = [
+        payload.keyword_regex,
+        payload.file_identifier_regex,
+        ",".join(canonical_forms(payload.normalize)),
+    ]
+    if payload.fuzzy_terms or payload.max_edits:
+        parts.append(f"fuzzy:{payload.max_edits}")
+        parts.extend(payload.fuzzy_terms)
+    if payload.terms:
+        parts.append(f"terms:{payload.ignore_case:d}{payload.ignore_whitespace:d}")
+        parts.extend(payload.terms)
+    return parts
+
+
+def result_cache_key(payload: ExtractionRequest, corpus_id: str) -> str:
+    """Return the shared result cache key of an extraction on a corpus."""
+    return corpus_store.result_key(corpus_id, *query_parts(payload))
+
+
+def build_term_dictionary(payload: ExtractionRequest) -> TermDictionary | None:
+    """Return the compiled dictionary of the payload's ``terms``, if any.
+
+    Terms are normalized like the page text they are looked up in.
+    """
+    if not payload.terms:
+        return None
+    forms = canonical_forms(payload.normalize)
+    return term_dictionary(
+        [normalize_text(term, forms) for term in payload.terms],
+        payload.ignore_case,
+        payload.ignore_whitespace,
+    )
+
+
+def missing_terms(
+    payload: ExtractionRequest, matches: list[MatchResult]
+) -> list[str] | None:
+    """Return the payload's ``terms`` that matched nowhere (None without terms)."""
+    dictionary = build_term_dictionary(payload)
+    if dictionary is None:
+        return None
+    forms = canonical_forms(payload.normalize)
+    missing = {
+        dictionary.fold(term)
+        for term in dictionary.missing(m.match_found for m in matches)
+    }
+    return [
+        term
+        for term in dict.fromkeys(payload.terms)
+        if dictionary.fold(normalize_text(term, forms)) in missing
+    ]
+
+
+def corpus_scanner(
+    payload: ExtractionRequest,
+    token: CancellationToken,
+    progress_callback: Callable[[int, int], None] | None = None,
+) -> Scan:
+    """Return a function running the payload's query on a corpus."""
+    dictionary = build_term_dictionary(payload)
+
+    def scan(text_content: Mapping[str, Mapping[int, str]]) -> list[MatchResult]:
+        # Stored corpora keep a line dedup index across queries
+        segments = None
+        if isinstance(text_content, MappedCorpus):
+            segments = text_content.segment_index(payload.normalize)
+        return list(
+            extract_matches(
+                text_content=text_content,
+                keyword_regex=payload.keyword_regex,
+                file_identifier_regex=payload.file_identifier_regex,
+                cancel_token=token,
+                normalize=payload.normalize,
+                segments=segments,
+                fuzzy_terms=payload.fuzzy_terms,
+                max_edits=payload.max_edits,
+                term_dictionary=dictionary,
+                progress_callback=progress_callback,
+            )
+        )
+
+    return scan
+
+
+def extract_stored(
+    payload: ExtractionRequest, corpus: MappedCorpus, scan: Scan
+) -> list[MatchResult]:
+    """Extract from a stored corpus, reusing an earlier revision's matches.
+
+    The matches are put in the shared result cache under
+    ``result_cache_key`` and the corpus is added to the query's revisions.
+    """
+    query_key = corpus_store.query_key(*query_parts(payload))
+    matches = extract_revision(corpus, query_key, scan)
+    result_key = result_cache_key(payload, payload.corpus_id)
+    corpus_store.put_results(result_key, matches)
+    corpus_store.add_revision(query_key, payload.corpus_id, result_key)
+    return matches
+
+
+async def run_cancellable(
+    request: Request,
+    payload: ExtractionRequest,
+    cost: int,
+    work: Callable[[CancellationToken], T],
+) -> T:
+    """Run ``work`` in a worker thread under admission, cancelling it cooperatively.
+
+    The work is abandoned (at page granularity) when the client disconnects,
+    when a newer query arrives for the same ``session_id``, or when
+    ``/cancel/{query_id}`` is called, in this worker process or another
+    (see ``core.cancellation``). Concurrency and in-flight corpus bytes
+    (``cost``) are bounded by ``extraction_admission``.
+
+    Raises:
+        HTTPException: 400 for invalid regexes, 409 if the query was
+            cancelled, 413/429/503 if it was not admitted
+
+    """
+    token = await run_in_threadpool(
+        query_registry.start, payload.session_id, payload.query_id
+    )
+    try:
+        async with extraction_admission.admit(cost):
+            # The query may have been superseded while it was queued
+            await run_in_threadpool(query_registry.poll, token)
+            token.raise_if_cancelled()
+            task = asyncio.ensure_future(run_in_threadpool(work, token))
+            try:
+                while True:
+                    done, _ = await asyncio.wait(
+                        {task}, timeout=DISCONNECT_POLL_INTERVAL
+                    )
+                    if done:
+                        return task.result()
+                    if not token.cancelled and await request.is_disconnected():
+                        token.cancel("client disconnected")
+                    await run_in_threadpool(query_registry.poll, token)
+            except asyncio.CancelledError:
+                token.cancel("request aborted")
+                raise
+    except ValueError as e:
+        logger.error("Extraction failed: %s", str(e))
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except ExtractionCancelled as e:
+        logger.info("Extraction cancelled: %s", e)
+        raise HTTPException(status_code=409, detail=f"Extraction cancelled: {e}") from e
+    finally:
+        await run_in_threadpool(query_registry.finish, token, payload.session_id)
+
+
+async def run_extraction(
+    request: Request, payload: ExtractionRequest
+) -> list[MatchResult]:
+    """Run ``extract_matches`` in a worker thread, cancelling it cooperatively.
+
+    Results for stored corpora are cached in the shared store, so repeat
+    queries from any worker skip the scan; a new revision of a corpus the
+    query was cached for only has its changed files scanned (see
+    ``core.incremental``).
+
+    Raises:
+        HTTPException: 400 for invalid regexes, 404 for unknown corpora,
+            409 if the query was cancelled, 413/429/503 if it was not admitted
+
+    """
+    text_content = resolve_corpus(payload)
+    cache_key = None
+    if payload.corpus_id is not None:
+        cache_key = result_cache_key(payload, payload.corpus_id)
+        cached = await run_in_threadpool(corpus_store.get_results, cache_key)
+        if cached is not None:
+            logger.info("Result cache hit for corpus %s", payload.corpus_id)
+            return cached
+
+    def work(token: CancellationToken) -> list[MatchResult]:
+        scan = corpus_scanner(payload, token)
+        if cache_key is None:
+            return scan(text_content)
+        return extract_stored(payload, text_content, scan)
+
+    cost = estimate_corpus_bytes(text_content)
+    return await run_cancellable(request, payload, cost, work)
 
 
 @router.get("/health")
 async def health_check():
     """Health check endpoint."""
     logger.debug("Health check requested")
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "admission": admission_snapshot(),
+        "jobs": job_manager.snapshot(),
+    }
 
 
 @router.post("/extract", response_model=ExtractionResponse)
-async def extract_data(payload: ExtractionRequest):
+async def extract_data(payload: ExtractionRequest, request: Request):
     """Run regex extraction on provided text content.
 
     Returns a preview of the first 10 matches.
@@ -42,29 +341,26 @@ async def extract_data(payload: ExtractionRequest):
     )
     logger.debug("File identifier regex: %s", payload.file_identifier_regex)
 
-    try:
-        matches = list(
-            extract_matches(
-                text_content=payload.text_content,
-                keyword_regex=payload.keyword_regex,
-                file_identifier_regex=payload.file_identifier_regex,
-            )
-        )
+    payload, optimized_pattern = apply_auto_optimize(payload)
+    matches = await run_extraction(request, payload)
+    missing = await run_in_threadpool(missing_terms, payload, matches)
 
-        logger.info("Extraction complete: %d matches found", len(matches))
+    logger.info("Extraction complete: %d matches found", len(matches))
 
-        return ExtractionResponse(
+    return negotiate_response(
+        request,
+        ExtractionResponse(
             matches=matches[:10],
             total_count=len(matches),
             preview_count=min(10, len(matches)),
-        )
-    except ValueError as e:
-        logger.error("Extraction failed: %s", str(e))
-        raise HTTPException(status_code=400, detail=str(e)) from e
+            optimized_pattern=optimized_pattern,
+            missing_terms=missing,
+        ),
+    )
 
 
 @router.post("/extract-all")
-async def extract_all_data(payload: ExtractionRequest):
+async def extract_all_data(payload: ExtractionRequest, request: Request):
     """Run regex extraction and return all matches.
 
     Use this endpoint when preparing for export.
@@ -75,74 +371,753 @@ async def extract_all_data(payload: ExtractionRequest):
         payload.keyword_regex,
     )
 
-    try:
-        matches = list(
-            extract_matches(
-                text_content=payload.text_content,
-                keyword_regex=payload.keyword_regex,
-                file_identifier_regex=payload.file_identifier_regex,
-            )
-        )
+    payload, optimized_pattern = apply_auto_optimize(payload)
+    matches = await run_extraction(request, payload)
+    missing = await run_in_threadpool(missing_terms, payload, matches)
 
-        logger.info("Full extraction complete: %d matches", len(matches))
+    logger.info("Full extraction complete: %d matches", len(matches))
 
-        return {
+    return negotiate_response(
+        request,
+        {
             "matches": [m.model_dump() for m in matches],
             "total_count": len(matches),
-        }
+            "optimized_pattern": optimized_pattern,
+            "missing_terms": missing,
+        },
+    )
+
+
+@router.post("/extract-diff", response_model=ExtractionDiff)
+async def extract_diff(payload: ExtractionDiffRequest, request: Request):
+    """Compare an extraction's matches between two stored corpus revisions.
+
+    Only files added, removed or changed between ``previous_corpus_id`` and
+    ``corpus_id`` are extracted, from the query's cached results where
+    possible; the response lists the matches each of them gained and lost.
+
+    Raises:
+        HTTPException: 400 for invalid regexes, 404 for unknown corpora,
+            409 if the query was cancelled, 413/429/503 if it was not admitted
+
+    """
+    payload, optimized_pattern = apply_auto_optimize(payload)
+    current = resolve_corpus(payload)
+    try:
+        previous = corpus_store.get(payload.previous_corpus_id)
+    except KeyError as e:
+        raise HTTPException(
+            status_code=404, detail=f"Unknown corpus: {payload.previous_corpus_id}"
+        ) from e
+
+    def work(token: CancellationToken) -> ExtractionDiff:
+        return diff_revisions(
+            previous,
+            current,
+            corpus_store.query_key(*query_parts(payload)),
+            corpus_scanner(payload, token),
+        )
+
+    cost = max(estimate_corpus_bytes(previous), estimate_corpus_bytes(current))
+    diff = await run_cancellable(request, payload, cost, work)
+    diff.optimized_pattern = optimized_pattern
+    logger.info(
+        "Revision diff: %d files differ, %d matches added, %d removed",
+        len(diff.files),
+        diff.added_count,
+        diff.removed_count,
+    )
+    return negotiate_response(request, diff)
+
+
+@router.post("/results", response_model=ResultSetInfo)
+async def create_result_set(payload: ExtractionRequest, request: Request):
+    """Run an extraction and keep its matches server-side for browsing.
+
+    The returned ``result_id`` is paged, sorted and filtered with
+    ``/results/{result_id}/query``; any worker can serve it.
+    """
+    payload, optimized_pattern = apply_auto_optimize(payload)
+    matches = await run_extraction(request, payload)
+
+    if payload.corpus_id is None:
+        corpus_id = await run_in_threadpool(corpus_id_for, payload.text_content)
+        result_id = result_cache_key(payload, corpus_id)
+        # Stored corpora are cached by run_extraction already
+        await run_in_threadpool(corpus_store.put_results, result_id, matches)
+    else:
+        result_id = result_cache_key(payload, payload.corpus_id)
+    result_sets.put(result_id, matches)
+
+    logger.info("Result set %s holds %d matches", result_id, len(matches))
+    return negotiate_response(
+        request,
+        ResultSetInfo(
+            result_id=result_id,
+            total_count=len(matches),
+            optimized_pattern=optimized_pattern,
+        ),
+    )
+
+
+@router.post("/results/{result_id}/query", response_model=ResultPage)
+async def query_result_set(result_id: str, query: ResultQuery, request: Request):
+    """Return one page of a result set, sorted and filtered.
+
+    Pass the previous page's ``next_cursor`` with the same sort and filters
+    to continue.
+
+    Raises:
+        HTTPException: 400 for an invalid regex filter or cursor, 404 if the
+            result set is unknown
+
+    """
+    try:
+        result_set = await run_in_threadpool(result_sets.get, result_id)
+        page = await run_in_threadpool(result_set.page, query)
+    except KeyError as e:
+        raise HTTPException(
+            status_code=404, detail=f"Unknown result set: {result_id}"
+        ) from e
     except ValueError as e:
-        logger.error("Extraction failed: %s", str(e))
         raise HTTPException(status_code=400, detail=str(e)) from e
+    return negotiate_response(request, page)
+
+
+def live_error(error: Exception, keyword_regex: str | None = None) -> dict:
+    """Return a live-search error message for an exception."""
+    detail = error.detail if isinstance(error, HTTPException) else str(error)
+    message = {"type": "error", "detail": detail}
+    if keyword_regex is not None:
+        message["keyword_regex"] = keyword_regex
+    return message
+
+
+async def stream_live_query(
+    websocket: WebSocket,
+    session: LiveSearchSession,
+    query: LiveQuery,
+    token: CancellationToken,
+) -> None:
+    """Run a live query in a worker thread, sending progress while it runs.
+
+    Full scans are admitted like ``/extract`` requests; refined queries only
+    revisit pages the session already holds.
+
+    Raises:
+        ValueError: For invalid regexes
+        ExtractionCancelled: If a newer query or a disconnect cancelled it
+        HTTPException: If the query was not admitted
+
+    """
+    cost = 0 if query.refined else estimate_corpus_bytes(session.text_content)
+    async with extraction_admission.admit(cost):
+        task = asyncio.ensure_future(run_in_threadpool(session.run, query, token))
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=LIVE_SEARCH_PROGRESS_INTERVAL)
+            if done:
+                task.result()
+                return
+            await websocket.send_json(query.update().model_dump(mode="json"))
+
+
+@router.websocket("/live-search")
+async def live_search(websocket: WebSocket):
+    """Search a corpus as the user types.
+
+    Protocol (JSON messages):
+
+    1. The client sends a ``LiveSearchOpen`` naming the corpus; the server
+       answers ``{"type": "ready", "pages": N}`` once it is loaded.
+    2. The client sends a ``LiveSearchQuery`` whenever the pattern changes.
+       Queries run after ``LIVE_SEARCH_DEBOUNCE`` seconds without a newer
+       one, and a newer query cancels the one running.
+    3. The server sends ``LiveSearchUpdate`` messages: ``progress`` every
+       ``LIVE_SEARCH_PROGRESS_INTERVAL`` seconds while scanning, then
+       ``done``. Problems are reported as ``{"type": "error", "detail": ...}``
+       and the session stays open.
+    """
+    await websocket.accept()
+    try:
+        opened = LiveSearchOpen.model_validate(await websocket.receive_json())
+        text_content = resolve_corpus(opened)
+        session = await run_in_threadpool(
+            LiveSearchSession,
+            text_content,
+            opened.file_identifier_regex,
+            opened.normalize,
+            opened.max_hits,
+        )
+    except WebSocketDisconnect:
+        return
+    except (ValidationError, ValueError, HTTPException) as e:
+        logger.error("Live search rejected: %s", e)
+        await websocket.send_json(live_error(e))
+        await websocket.close(code=1008)
+        return
+    await websocket.send_json({"type": "ready", "pages": session.page_count})
+
+    pending: str | None = None
+    arrived = asyncio.Event()
+    running: CancellationToken | None = None
+
+    async def receive_queries() -> None:
+        """Record the newest pattern until the client disconnects."""
+        nonlocal pending
+        try:
+            while True:
+                message = await websocket.receive_text()
+                try:
+                    query = LiveSearchQuery.model_validate_json(message)
+                except ValidationError as e:
+                    await websocket.send_json(live_error(e))
+                    continue
+                pending = query.keyword_regex
+                arrived.set()
+                if running is not None:
+                    running.cancel("superseded by a newer query")
+        except WebSocketDisconnect:
+            logger.debug("Live search client disconnected")
+            if running is not None:
+                running.cancel("client disconnected")
+
+    reader = asyncio.ensure_future(receive_queries())
+    try:
+        while True:
+            waiter = asyncio.ensure_future(arrived.wait())
+            await asyncio.wait({reader, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+            # Debounce: wait until the user pauses typing
+            while not reader.done():
+                arrived.clear()
+                try:
+                    await asyncio.wait_for(arrived.wait(), LIVE_SEARCH_DEBOUNCE)
+                except TimeoutError:
+                    break
+            if reader.done():
+                break
+
+            query = session.start(pending)
+            running = CancellationToken(query.keyword_regex)
+            try:
+                await stream_live_query(websocket, session, query, running)
+            except ExtractionCancelled:
+                continue  # a newer query is already pending
+            except (ValueError, HTTPException) as e:
+                await websocket.send_json(live_error(e, query.keyword_regex))
+                continue
+            finally:
+                running = None
+            await websocket.send_json(query.update().model_dump(mode="json"))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        reader.cancel()
+        if running is not None:
+            running.cancel("client disconnected")
+
+
+@router.post("/corpora", response_model=CorpusInfo)
+async def upload_corpus(payload: CorpusUploadRequest, request: Request):
+    """Store a corpus so extraction requests can reference it by ``corpus_id``.
+
+    Stored corpora are shared by all worker processes.
+    """
+    corpus_id = await run_in_threadpool(corpus_store.put, payload.text_content)
+    return negotiate_response(request, corpus_info(corpus_id))
+
+
+@router.post("/corpora/stream", response_model=CorpusInfo)
+async def upload_corpus_stream(request: Request):
+    """Store a corpus sent as NDJSON, one page per line, as it arrives.
+
+    Each line is ``{"filename": ..., "page": ..., "text": ...}`` and a
+    file's pages must be consecutive. Pages are written to the store as
+    they are read, so corpora larger than memory (or than the request body
+    limit) can be uploaded; gzip/zstd bodies are decoded on the fly.
+
+    Raises:
+        HTTPException: 400 for a malformed line, 413 above
+            ``MAX_CORPUS_STREAM_BYTES``, 415 for a body that is not NDJSON
+
+    """
+    if not is_streamed(request.headers):
+        raise HTTPException(
+            status_code=415, detail=f"Expected a {NDJSON_MEDIA_TYPE} body"
+        )
+    writer = corpus_store.writer()
+    pending = bytearray()
+    size = 0
+    line_number = 0
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if 0 < MAX_CORPUS_STREAM_BYTES < size:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Corpus stream exceeds {MAX_CORPUS_STREAM_BYTES} bytes",
+                )
+            pending += chunk
+            end = pending.rfind(b"\n")
+            if end < 0:
+                continue
+            lines = bytes(pending[:end]).split(b"\n")
+            del pending[: end + 1]
+            await run_in_threadpool(write_corpus_lines, writer, lines, line_number)
+            line_number += len(lines)
+        await run_in_threadpool(write_corpus_lines, writer, [pending], line_number)
+        corpus_id = await run_in_threadpool(writer.commit)
+    except ValueError as e:
+        writer.abort()
+        logger.error("Invalid corpus stream: %s", e)
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except BaseException:
+        writer.abort()
+        raise
+    return negotiate_response(request, corpus_info(corpus_id))
+
+
+def write_corpus_lines(
+    writer: CorpusWriter, lines: list[bytes | bytearray], line_number: int
+) -> None:
+    """Write NDJSON page lines following line ``line_number`` of a stream.
+
+    Raises:
+        ValueError: If a non-blank line is not a valid page
+
+    """
+    for number, line in enumerate(lines, line_number + 1):
+        if not line.strip():
+            continue
+        try:
+            page = CorpusPage.model_validate_json(line)
+        except ValidationError as e:
+            error = e.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            raise ValueError(
+                f"Line {number}: {location + ': ' if location else ''}{error['msg']}"
+            ) from e
+        writer.add_page(page.filename, page.page, page.text)
+
+
+@router.get("/corpora/{corpus_id}", response_model=CorpusInfo)
+async def get_corpus(corpus_id: str):
+    """Return a summary of a stored corpus."""
+    return corpus_info(corpus_id)
+
+
+@router.delete("/corpora/{corpus_id}")
+async def delete_corpus(corpus_id: str):
+    """Remove a stored corpus."""
+    if not corpus_store.delete(corpus_id):
+        raise HTTPException(status_code=404, detail=f"Unknown corpus: {corpus_id}")
+    logger.info("Deleted corpus %s", corpus_id)
+    return {"corpus_id": corpus_id, "deleted": True}
+
+
+def corpus_info(corpus_id: str) -> CorpusInfo:
+    """Summarize a stored corpus.
+
+    Raises:
+        HTTPException: 404 if the corpus is not in the store
+
+    """
+    try:
+        corpus = corpus_store.get(corpus_id)
+    except KeyError as e:
+        raise HTTPException(
+            status_code=404, detail=f"Unknown corpus: {corpus_id}"
+        ) from e
+    return CorpusInfo(
+        corpus_id=corpus_id,
+        files=len(corpus),
+        pages=corpus.page_count,
+        bytes=corpus.nbytes,
+    )
+
+
+@router.post("/cancel/{query_id}", response_model=CancelResponse)
+async def cancel_query(query_id: str):
+    """Cancel a running extraction started with this ``query_id``.
+
+    Any worker process can cancel it; one running elsewhere stops at its
+    next poll.
+    """
+    cancelled = await run_in_threadpool(query_registry.cancel, query_id)
+    logger.info("Cancel request for query %s: %s", query_id, cancelled)
+    return CancelResponse(query_id=query_id, cancelled=cancelled)
 
 
 @router.post("/guess-regex", response_model=RegexGuessResponse)
-async def generate_regex(payload: RegexGuessRequest):
+async def generate_regex(payload: RegexGuessRequest, request: Request):
     """Generate a regex pattern from example strings.
 
-    Requires at least 2 examples.
+    Requires at least 2 examples. When the request carries a corpus
+    (``text_content`` or ``corpus_id``), the pattern's scan throughput on it
+    is measured and returned so slow patterns can be flagged.
     """
     logger.info("Regex guess request: %d examples", len(payload.examples))
     logger.debug("Examples: %s", payload.examples)
 
+    text_content = resolve_corpus(payload)
     try:
-        pattern, explanation = guess_regex(payload.examples)
+        pattern, explanation = await run_in_threadpool(guess_regex, payload.examples)
 
         # Test the pattern against examples
         compiled = re.compile(pattern)
         test_results = {ex: bool(compiled.search(ex)) for ex in payload.examples}
 
+        scan_throughput = None
+        if text_content is not None:
+            scan_throughput = await run_in_threadpool(
+                measure_scan_throughput, pattern, text_content
+            )
+
         logger.info("Generated pattern: %s", pattern)
         logger.debug("Test results: %s", test_results)
 
-        return RegexGuessResponse(
-            pattern=pattern,
-            explanation=explanation,
-            test_results=test_results,
+        return negotiate_response(
+            request,
+            RegexGuessResponse(
+                pattern=pattern,
+                explanation=explanation,
+                test_results=test_results,
+                scan_throughput=scan_throughput,
+            ),
         )
     except ValueError as e:
         logger.error("Regex generation failed: %s", str(e))
         raise HTTPException(status_code=400, detail=str(e)) from e
 
 
-@router.post("/export")
-async def export_excel(payload: ExportRequest):
-    """Generate and stream an Excel file from match results."""
-    logger.info("Export request: %d matches", len(payload.matches))
+@router.post("/analyze-regex", response_model=RegexAnalysis)
+async def analyze_regex(payload: RegexAnalyzeRequest, request: Request):
+    """Flag costly constructs in a keyword regex and suggest a rewrite.
+
+    When the request carries a corpus, the scan throughput of the original
+    and the rewritten pattern are measured on it.
+    """
+    logger.info("Regex analysis request: pattern='%s'", payload.keyword_regex)
 
-    if not payload.matches:
+    text_content = resolve_corpus(payload)
+    try:
+        analysis = analyze_pattern(payload.keyword_regex)
+        if text_content is not None:
+            analysis.throughput_before = await run_in_threadpool(
+                measure_scan_throughput, analysis.pattern, text_content
+            )
+            if analysis.optimized_pattern is not None:
+                analysis.throughput_after = await run_in_threadpool(
+                    measure_scan_throughput, analysis.optimized_pattern, text_content
+                )
+    except ValueError as e:
+        logger.error("Regex analysis failed: %s", str(e))
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    logger.debug("Analysis: %s", analysis)
+    return negotiate_response(request, analysis)
+
+
+def export_filename(output: str) -> tuple[str, str]:
+    """Return the download filename and media type of an export."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if output == "zip":
+        return f"extraction_results_{timestamp}.zip", "application/zip"
+    return f"extraction_results_{timestamp}.xlsx", XLSX_MEDIA_TYPE
+
+
+async def resolve_export_matches(payload: ExportRequest) -> list[MatchResult]:
+    """Return the request's inline matches or those of its result set.
+
+    Raises:
+        HTTPException: 400 without matches, 404 for an unknown ``result_id``
+
+    """
+    matches = payload.matches
+    if payload.result_id is not None:
+        try:
+            result_set = await run_in_threadpool(result_sets.get, payload.result_id)
+        except KeyError as e:
+            raise HTTPException(
+                status_code=404, detail=f"Unknown result set: {payload.result_id}"
+            ) from e
+        matches = result_set.matches
+    logger.info("Export request: %d matches", len(matches))
+
+    if not matches:
         logger.warning("Export requested with no matches")
         raise HTTPException(status_code=400, detail="No matches to export")
+    return matches
 
-    buffer = generate_excel(payload.matches, payload.include_context)
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"extraction_results_{timestamp}.xlsx"
+@router.post("/export")
+async def export_excel(payload: ExportRequest, request: Request):
+    """Generate and stream an Excel file (or ZIP of them) from match results.
+
+    Exports that fit one sheet are a single workbook as before. With
+    ``partition_by``, or past Excel's row limit, the parts are written in
+    parallel worker processes (see ``core.export``).
+
+    Raises:
+        HTTPException: 400 without matches, 404 for an unknown ``result_id``
 
+    """
+    matches = await resolve_export_matches(payload)
+    if payload.result_id is not None:
+        cost = await run_in_threadpool(estimate_matches_bytes, matches)
+    else:
+        cost = int(request.headers.get("content-length", 0))
+
+    async with export_admission.admit(cost):
+        export = await run_in_threadpool(
+            export_matches,
+            matches,
+            payload.partition_by,
+            payload.output,
+            payload.include_context,
+        )
+
+    filename, media_type = export_filename(payload.output)
     logger.info("Excel file generated: %s", filename)
 
     return StreamingResponse(
-        buffer,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        iter_file(export),
+        media_type=media_type,
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
 
+
+def submit_job(
+    kind: str, work: Callable[[Job], None], inputs: Mapping[str, bytes] | None = None
+) -> JobInfo:
+    """Queue a background job, spooling ``inputs`` to its directory.
+
+    Raises:
+        HTTPException: 429 if the job queue is full
+
+    """
+    try:
+        return job_manager.submit(kind, work, inputs)
+    except JobQueueFull as e:
+        logger.warning("Job rejected: %s", e)
+        raise HTTPException(
+            status_code=429,
+            detail=f"Job queue full: {e}",
+            headers={"Retry-After": str(ADMISSION_RETRY_AFTER)},
+        ) from e
+
+
+def iter_response_json(
+    response: ExtractionResponse, matches: list[MatchResult]
+) -> Iterator[bytes]:
+    """Yield ``response`` as JSON with ``matches`` in place of its (empty) list.
+
+    The matches are serialized a chunk at a time, so a large extraction is
+    never held in memory as one JSON document.
+    """
+    head, tail = response.model_dump_json().split('"matches":[]', 1)
+    yield f'{head}"matches":['.encode()
+    for start in range(0, len(matches), JOB_ARTIFACT_CHUNK_MATCHES):
+        chunk = _MATCH_LIST.dump_json(
+            matches[start : start + JOB_ARTIFACT_CHUNK_MATCHES]
+        )
+        yield (b"," if start else b"") + chunk[1:-1]
+    yield f"]{tail}".encode()
+
+
+@router.post("/jobs/extract", response_model=JobInfo, status_code=202)
+async def submit_extraction_job(payload: ExtractionRequest, request: Request):
+    """Run an extraction as a background job.
+
+    Inline ``text_content`` is written to the corpus store first, so the job
+    scans a memory-mapped corpus, once it gets an ``extraction_admission``
+    slot. A finished job's artifact is the ``/extract-all`` response as
+    JSON, and its ``result_id`` can be browsed with ``/results/{id}/query``
+    or exported.
+
+    Raises:
+        HTTPException: 404 for unknown corpora, 429 if the job queue is full
+
+    """
+    payload, optimized_pattern = apply_auto_optimize(payload)
+    if payload.corpus_id is None:
+        corpus_id = await run_in_threadpool(corpus_store.put, payload.text_content)
+        payload = payload.model_copy(
+            update={"corpus_id": corpus_id, "text_content": None}
+        )
+    else:
+        resolve_corpus(payload)
+
+    def work(job: Job) -> None:
+        corpus = corpus_store.get(payload.corpus_id)
+        job.begin(files_total=len(corpus), pages_total=corpus.page_count)
+        cache_key = result_cache_key(payload, payload.corpus_id)
+        matches = corpus_store.get_results(cache_key)
+        if matches is None:
+            scan = corpus_scanner(payload, job.token, job.pages_scanned)
+
+            def tracked_scan(
+                text_content: Mapping[str, Mapping[int, str]],
+            ) -> list[MatchResult]:
+                job.track_scan(len(pages) for pages in text_content.values())
+                return scan(text_content)
+
+            # Scans wait for a slot like /extract-all; a rejection fails the job
+            with extraction_admission.admit_blocking(estimate_corpus_bytes(corpus)):
+                matches = extract_stored(payload, corpus, tracked_scan)
+        job.set_result(cache_key, len(matches))
+
+        response = ExtractionResponse(
+            matches=[],
+            total_count=len(matches),
+            preview_count=len(matches),
+            optimized_pattern=optimized_pattern,
+            missing_terms=missing_terms(payload, matches),
+        )
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        job.write_artifact(
+            f"extraction_results_{timestamp}.json",
+            "application/json",
+            iter_response_json(response, matches),
+        )
+
+    info = submit_job("extraction", work)
+    return negotiate_response(request, info)
+
+
+@router.post("/jobs/export", response_model=JobInfo, status_code=202)
+async def submit_export_job(payload: ExportRequest, request: Request):
+    """Run an Excel export as a background job.
+
+    A finished job's artifact is the workbook or ZIP ``/export`` returns.
+
+    Raises:
+        HTTPException: 400 without matches, 404 for an unknown ``result_id``,
+            429 if the job queue is full
+
+    """
+    matches = await resolve_export_matches(payload)
+    inputs = {}
+    if payload.result_id is None:
+        data = await run_in_threadpool(_MATCH_LIST.dump_json, matches)
+        inputs[_SPOOLED_MATCHES] = data
+        payload = payload.model_copy(update={"matches": []})
+        cost = len(data)
+    else:
+        cost = await run_in_threadpool(estimate_matches_bytes, matches)
+    del matches  # queued jobs read their matches back when they start
+
+    def work(job: Job) -> None:
+        if payload.result_id is None:
+            spooled = (job.directory / _SPOOLED_MATCHES).read_bytes()
+            matches = _MATCH_LIST.validate_json(spooled)
+        else:
+            try:
+                matches = result_sets.get(payload.result_id).matches
+            except KeyError as e:
+                raise ValueError(f"Unknown result set: {payload.result_id}") from e
+        job.begin(matches=len(matches))
+        filename, media_type = export_filename(payload.output)
+        with (
+            export_admission.admit_blocking(cost),
+            export_matches(
+                matches,
+                payload.partition_by,
+                payload.output,
+                payload.include_context,
+                progress_callback=job.parts_written,
+            ) as export,
+        ):
+            job.write_artifact(filename, media_type, export)
+
+    info = await run_in_threadpool(submit_job, "export", work, inputs)
+    return negotiate_response(request, info)
+
+
+def job_info(job_id: str) -> JobInfo:
+    """Return a job's state.
+
+    Raises:
+        HTTPException: 404 if the job is unknown (or expired)
+
+    """
+    try:
+        return job_manager.get(job_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}") from e
+
+
+@router.get("/jobs/{job_id}", response_model=JobInfo)
+async def get_job(job_id: str, request: Request):
+    """Return a job's status and progress; any worker can answer."""
+    info = await run_in_threadpool(job_info, job_id)
+    return negotiate_response(request, info)
+
+
+@router.get("/jobs/{job_id}/artifact")
+async def get_job_artifact(job_id: str):
+    """Download a finished job's artifact, streamed from disk.
+
+    Raises:
+        HTTPException: 404 for unknown jobs, 409 if the job has not succeeded
+
+    """
+    try:
+        path, info = await run_in_threadpool(job_manager.artifact_path, job_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}") from e
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    return FileResponse(path, media_type=info.media_type, filename=info.artifact)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobInfo)
+async def cancel_job(job_id: str, request: Request):
+    """Cancel a queued or running job; it stops at its next progress update."""
+    try:
+        info = await run_in_threadpool(job_manager.cancel, job_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}") from e
+    logger.info("Cancel request for job %s", job_id)
+    return negotiate_response(request, info)
+
+
+@router.delete("/jobs/{job_id}")
+async def delete_job(job_id: str):
+    """Remove a job and its artifact, cancelling it if it is still running."""
+    if not await run_in_threadpool(job_manager.delete, job_id):
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    logger.info("Deleted job %s", job_id)
+    return {"job_id": job_id, "deleted": True}
+
+
+@router.websocket("/jobs/{job_id}/progress")
+async def job_progress(websocket: WebSocket, job_id: str):
+    """Push a job's state until it finishes.
+
+    A ``JobInfo`` message is sent whenever the job's progress changes
+    (checked every ``JOB_PROGRESS_INTERVAL`` seconds). The last message has a
+    finished status and the server then closes the socket. An unknown job
+    gets ``{"type": "error", "detail": ...}``.
+    """
+    await websocket.accept()
+    last = None
+    try:
+        while True:
+            try:
+                info = await run_in_threadpool(job_info, job_id)
+            except HTTPException as e:
+                await websocket.send_json(live_error(e))
+                await websocket.close(code=1008)
+                return
+            # Elapsed time and ETA change on every poll
+            progress = info.model_dump(exclude={"elapsed_seconds", "eta_seconds"})
+            if progress != last:
+                await websocket.send_json(info.model_dump(mode="json"))
+                last = progress
+            if info.status in FINISHED:
+                await websocket.close()
+                return
+            await asyncio.sleep(JOB_PROGRESS_INTERVAL)
+    except WebSocketDisconnect:
+        logger.debug("Job progress client disconnected")
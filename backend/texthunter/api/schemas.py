@@ -1,27 +1,132 @@
 """Pydantic models for API requests and responses."""
 
-from pydantic import BaseModel, Field
+from typing import Literal
+
+from pydantic import BaseModel, Field, model_validator
+
+from texthunter.config.settings import FUZZY_MAX_EDITS, RESULT_PAGE_MAX_ROWS
 
 
 class ExtractionRequest(BaseModel):
-    """Request payload for text extraction."""
+    """Request payload for text extraction.
 
-    filenames: list[str] = Field(..., description="List of PDF filenames")
+    The corpus is either sent inline as ``text_content`` or referenced by
+    the ``corpus_id`` returned from ``POST /corpora``.
+    """
+
+    filenames: list[str] = Field(
+        default_factory=list, description="List of PDF filenames"
+    )
     file_identifier_regex: str | None = Field(
         None, description="Regex to extract metadata from filenames"
     )
     keyword_regex: str = Field(..., description="Regex pattern to match in text")
+    text_content: dict[str, dict[int, str]] | None = Field(
+        None, description="Map of filename -> {page_number: text_content}"
+    )
+    corpus_id: str | None = Field(
+        None, description="ID of a corpus previously uploaded to /corpora"
+    )
+    session_id: str | None = Field(
+        None, description="Client session; a new query cancels the previous one"
+    )
+    query_id: str | None = Field(
+        None, description="Optional ID for cancelling this query via /cancel"
+    )
+    normalize: list[Literal["unicode", "casefold", "whitespace"]] = Field(
+        default_factory=list,
+        description="Normalizations applied to page text before matching",
+    )
+    fuzzy_terms: list[str] = Field(
+        default_factory=list,
+        description="Tags to match approximately instead of keyword_regex",
+    )
+    max_edits: int = Field(
+        default=0,
+        ge=0,
+        le=FUZZY_MAX_EDITS,
+        description="Edits allowed per fuzzy match; 0 with no fuzzy_terms is exact",
+    )
+    terms: list[str] = Field(
+        default_factory=list,
+        description="Literal terms (e.g. a tag list) to look up instead of "
+        "keyword_regex",
+    )
+    ignore_case: bool = Field(default=False, description="Term lookup ignores case")
+    ignore_whitespace: bool = Field(
+        default=False, description="Term lookup ignores whitespace"
+    )
+
+    @model_validator(mode="after")
+    def check_corpus_source(self) -> "ExtractionRequest":
+        """Require exactly one of ``text_content`` and ``corpus_id``."""
+        if (self.text_content is None) == (self.corpus_id is None):
+            raise ValueError("Provide exactly one of text_content or corpus_id")
+        return self
+
+
+class ExtractionDiffRequest(ExtractionRequest):
+    """Request payload for comparing an extraction across corpus revisions.
+
+    Both revisions must be stored corpora: ``corpus_id`` is the new one.
+    """
+
+    previous_corpus_id: str = Field(
+        ..., description="Stored corpus of the revision to compare against"
+    )
+
+    @model_validator(mode="after")
+    def check_stored_corpus(self) -> "ExtractionDiffRequest":
+        """Require the new revision to be a stored corpus."""
+        if self.corpus_id is None:
+            raise ValueError("corpus_id is required to compare revisions")
+        return self
+
+
+class CorpusUploadRequest(BaseModel):
+    """Request payload for storing a corpus on the server."""
+
     text_content: dict[str, dict[int, str]] = Field(
         ..., description="Map of filename -> {page_number: text_content}"
     )
 
 
+class CorpusPage(BaseModel):
+    """One line of a corpus streamed as NDJSON to ``POST /corpora/stream``."""
+
+    filename: str
+    page: int
+    text: str
+
+
+class CorpusInfo(BaseModel):
+    """Summary of a stored corpus."""
+
+    corpus_id: str = Field(..., description="Content hash identifying the corpus")
+    files: int
+    pages: int
+    bytes: int = Field(..., description="UTF-8 size of all page text")
+
+
 class RegexGuessRequest(BaseModel):
     """Request payload for regex generation from examples."""
 
     examples: list[str] = Field(
         ..., min_length=2, description="Example strings to generate regex from"
     )
+    text_content: dict[str, dict[int, str]] | None = Field(
+        default=None, description="Optional corpus to measure scan throughput on"
+    )
+    corpus_id: str | None = Field(
+        default=None, description="Stored corpus to measure scan throughput on"
+    )
+
+    @model_validator(mode="after")
+    def check_corpus_source(self) -> "RegexGuessRequest":
+        """Accept at most one of ``text_content`` and ``corpus_id``."""
+        if self.text_content is not None and self.corpus_id is not None:
+            raise ValueError("Provide at most one of text_content or corpus_id")
+        return self
 
 
 class MatchResult(BaseModel):
@@ -33,6 +138,9 @@ class MatchResult(BaseModel):
     page: int
     match_found: str
     context: str = Field(..., description="±20 chars around the match")
+    edit_distance: int | None = Field(
+        default=None, description="Edits from the nearest term (fuzzy matching)"
+    )
 
 
 class ExtractionResponse(BaseModel):
@@ -41,6 +149,49 @@ class ExtractionResponse(BaseModel):
     matches: list[MatchResult]
     total_count: int
     preview_count: int = Field(default=10, description="Number of matches in preview")
+    optimized_pattern: str | None = Field(
+        default=None, description="Pattern actually run, if auto-optimized"
+    )
+    missing_terms: list[str] | None = Field(
+        default=None, description="Looked-up terms found nowhere in the corpus"
+    )
+
+
+class FileDiff(BaseModel):
+    """Matches gained and lost by one file between two corpus revisions."""
+
+    filename: str
+    status: Literal["added", "removed", "changed"]
+    added: list[MatchResult] = Field(default_factory=list)
+    removed: list[MatchResult] = Field(default_factory=list)
+
+
+class ExtractionDiff(BaseModel):
+    """Per-file differences in an extraction between two corpus revisions."""
+
+    files: list[FileDiff] = Field(
+        ..., description="Files added, removed or changed, in corpus order"
+    )
+    unchanged_files: int = Field(..., description="Files with identical content")
+    scanned_files: int = Field(
+        ..., description="Files scanned; the rest came from cached results"
+    )
+    added_count: int
+    removed_count: int
+    optimized_pattern: str | None = Field(
+        default=None, description="Pattern actually run, if auto-optimized"
+    )
+
+
+class ScanThroughput(BaseModel):
+    """Measured scan speed of a pattern over (a sample of) a corpus."""
+
+    bytes_scanned: int
+    seconds: float
+    mb_per_second: float
+    matches: int
+    sampled: bool = Field(..., description="Whether only part of the corpus ran")
+    slow: bool = Field(..., description="Below the slow-pattern threshold")
 
 
 class RegexGuessResponse(BaseModel):
@@ -51,11 +202,219 @@ class RegexGuessResponse(BaseModel):
     test_results: dict[str, bool] = Field(
         ..., description="Which examples match the generated pattern"
     )
+    scan_throughput: ScanThroughput | None = Field(
+        default=None, description="Pattern speed on the request's corpus, if any"
+    )
 
 
-class ExportRequest(BaseModel):
-    """Request payload for Excel export."""
+class RegexAnalyzeRequest(BaseModel):
+    """Request payload for keyword regex cost analysis."""
+
+    keyword_regex: str = Field(..., description="Pattern to analyze")
+    text_content: dict[str, dict[int, str]] | None = Field(
+        default=None, description="Optional corpus to measure throughput on"
+    )
+    corpus_id: str | None = Field(
+        default=None, description="Stored corpus to measure throughput on"
+    )
+
+    @model_validator(mode="after")
+    def check_corpus_source(self) -> "RegexAnalyzeRequest":
+        """Accept at most one of ``text_content`` and ``corpus_id``."""
+        if self.text_content is not None and self.corpus_id is not None:
+            raise ValueError("Provide at most one of text_content or corpus_id")
+        return self
+
+
+class RegexIssue(BaseModel):
+    """A costly construct found in a pattern."""
+
+    code: str = Field(..., description="Machine-readable issue identifier")
+    severity: str = Field(..., description="high, medium or low")
+    message: str
+
+
+class RegexAnalysis(BaseModel):
+    """Cost analysis of a keyword regex and its optimized rewrite."""
+
+    pattern: str
+    issues: list[RegexIssue]
+    optimized_pattern: str | None = Field(
+        default=None, description="Rewritten pattern, if any rewrite applies"
+    )
+    rewrites: list[str] = Field(
+        default_factory=list, description="Rewrites applied to the pattern"
+    )
+    exact: bool = Field(
+        default=True, description="Whether the rewrite keeps matches identical"
+    )
+    throughput_before: ScanThroughput | None = None
+    throughput_after: ScanThroughput | None = None
+
+
+class LiveSearchOpen(BaseModel):
+    """First message on ``/live-search``: the corpus the session searches."""
+
+    text_content: dict[str, dict[int, str]] | None = None
+    corpus_id: str | None = None
+    file_identifier_regex: str | None = None
+    normalize: list[Literal["unicode", "casefold", "whitespace"]] = Field(
+        default_factory=list
+    )
+    max_hits: int = Field(default=10, ge=0, le=100, description="Hits per update")
+
+    @model_validator(mode="after")
+    def check_corpus_source(self) -> "LiveSearchOpen":
+        """Require exactly one of ``text_content`` and ``corpus_id``."""
+        if (self.text_content is None) == (self.corpus_id is None):
+            raise ValueError("Provide exactly one of text_content or corpus_id")
+        return self
+
+
+class LiveSearchQuery(BaseModel):
+    """A pattern typed by the user; supersedes any earlier query."""
+
+    keyword_regex: str
+
+
+class LiveSearchUpdate(BaseModel):
+    """Progress or final result of a live-search query."""
+
+    type: Literal["progress", "done"]
+    keyword_regex: str
+    pages_done: int
+    pages_total: int = Field(..., description="Pages this query has to scan")
+    total_count: int = Field(..., description="Matches found so far")
+    hits: list[MatchResult] = Field(..., description="First matches found")
+    refined: bool = Field(
+        ..., description="Whether only the previous query's pages were scanned"
+    )
+
+
+class CancelResponse(BaseModel):
+    """Response from the query cancellation endpoint."""
+
+    query_id: str
+    cancelled: bool = Field(..., description="Whether a running query was found")
+
+
+class ResultSetInfo(BaseModel):
+    """A server-held result set created by ``POST /results``."""
+
+    result_id: str = Field(..., description="Handle for ``/results/{id}/query``")
+    total_count: int
+    optimized_pattern: str | None = Field(
+        default=None, description="Pattern actually run, if it was rewritten"
+    )
+
+
+ResultSortKey = Literal[
+    "source_file", "project_id", "sheet_no", "page", "match_found", "edit_distance"
+]
+
+
+class ResultQuery(BaseModel):
+    """One page of a result set, sorted and filtered."""
+
+    sort: ResultSortKey | None = Field(
+        default=None, description="Sort key; extraction order if omitted"
+    )
+    descending: bool = False
+    contains: str | None = Field(
+        default=None, description="Case-insensitive substring of the match text"
+    )
+    regex: str | None = Field(
+        default=None, description="Pattern searched in the match text"
+    )
+    source_file: str | None = None
+    project_id: str | None = None
+    sheet_no: str | None = None
+    page: int | None = None
+    limit: int = Field(default=100, ge=1, le=RESULT_PAGE_MAX_ROWS)
+    cursor: str | None = Field(
+        default=None, description="``next_cursor`` of the previous page"
+    )
+    facets: bool = Field(default=True, description="Whether to return facet counts")
+
+
+class FacetCount(BaseModel):
+    """Number of filtered matches sharing one value of a facet."""
+
+    value: str | None
+    count: int
+
+
+class ResultPage(BaseModel):
+    """A page of a result set."""
 
     matches: list[MatchResult]
+    total_count: int = Field(..., description="Matches passing the filters")
+    next_cursor: str | None = Field(
+        default=None, description="Cursor of the next page; None on the last"
+    )
+    facets: dict[str, list[FacetCount]] = Field(
+        default_factory=dict,
+        description="Most frequent values of source_file, project_id and sheet_no",
+    )
+
+
+class ExportRequest(BaseModel):
+    """Request payload for Excel export.
+
+    Matches are sent inline or referenced by the ``result_id`` of a result
+    set from ``POST /results``, which avoids resending large result sets.
+    """
+
+    matches: list[MatchResult] = Field(default_factory=list)
+    result_id: str | None = Field(
+        default=None, description="Export a server-held result set"
+    )
     include_context: bool = Field(default=True)
+    partition_by: Literal["source_file", "project_id", "sheet_no"] | None = Field(
+        default=None,
+        description="One sheet (or workbook) per value of this field; sheets "
+        "over Excel's row limit are split either way",
+    )
+    output: Literal["xlsx", "zip"] = Field(
+        default="xlsx",
+        description="One workbook with a sheet per part, or a ZIP holding a "
+        "workbook per part",
+    )
+
+    @model_validator(mode="after")
+    def check_match_source(self) -> "ExportRequest":
+        """Reject requests carrying both inline matches and a ``result_id``."""
+        if self.matches and self.result_id is not None:
+            raise ValueError("Provide either matches or result_id, not both")
+        return self
 
+
+JobStatus = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+
+
+class JobInfo(BaseModel):
+    """State and progress of a background job from ``POST /jobs/*``."""
+
+    job_id: str
+    kind: Literal["extraction", "export"]
+    status: JobStatus
+    detail: str | None = Field(default=None, description="Why a job failed")
+    created_at: float = Field(..., description="Submission time (Unix seconds)")
+    elapsed_seconds: float = Field(default=0, description="Running time so far")
+    eta_seconds: float | None = Field(
+        default=None, description="Estimated seconds left, once measurable"
+    )
+    files_done: int = 0
+    files_total: int = 0
+    pages_done: int = 0
+    pages_total: int = 0
+    parts_done: int = Field(default=0, description="Export sheets written")
+    parts_total: int = 0
+    matches: int = Field(default=0, description="Matches found (or exported)")
+    result_id: str | None = Field(
+        default=None, description="Result set of a finished extraction"
+    )
+    artifact: str | None = Field(
+        default=None, description="Filename of ``GET /jobs/{id}/artifact``"
+    )
+    media_type: str | None = None
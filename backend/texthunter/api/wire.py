@@ -0,0 +1,416 @@
+"""Wire formats: compressed bodies and MessagePack payloads.
+
+Large corpora uploaded to ``/extract*`` and match lists sent to ``/export``
+are expensive to transfer and to parse as JSON. This module provides:
+
+- ``CompressionMiddleware``: decodes gzip/zstd request bodies
+  (``Content-Encoding``) and compresses responses negotiated through
+  ``Accept-Encoding``. Streamed (NDJSON) bodies are decoded chunk by chunk
+  as the route reads them instead of being buffered.
+- ``WireRoute``: an ``APIRoute`` that accepts ``application/msgpack`` request
+  bodies. Maps with integer keys decode straight to ``int`` page numbers,
+  matching the engine's ``dict[str, dict[int, str]]`` corpus shape.
+- ``negotiate_response``: returns a MessagePack response when the client
+  asks for one through ``Accept``.
+
+``msgpack`` and ``zstandard`` are optional (``texthunter[wire]``); without
+them the corresponding formats are rejected with 415 and never negotiated.
+"""
+
+import logging
+import zlib
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from texthunter.config.settings import (
+    COMPRESSIBLE_MEDIA_TYPES,
+    COMPRESSION_MIN_SIZE,
+    MAX_REQUEST_BODY_BYTES,
+)
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+_DECODE_ERRORS: tuple[type[Exception], ...] = (zlib.error, EOFError)
+if zstandard is not None:
+    _DECODE_ERRORS += (zstandard.ZstdError,)
+
+
+def supported_encodings() -> list[str]:
+    """Return content codings available in this install, most preferred first."""
+    return ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+
+def _decompressor(encoding: str) -> Any | None:
+    """Return a streaming decompressor for a content coding, or None."""
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompressobj()
+    return None
+
+
+def _compressor(encoding: str) -> Any:
+    """Return a streaming compressor with ``compress``/``flush`` methods."""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=3).compressobj()
+    return zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+def _media_type(content_type: str | None) -> str:
+    """Strip parameters from a Content-Type value."""
+    return (content_type or "").split(";")[0].strip().lower()
+
+
+def is_streamed(headers: Headers) -> bool:
+    """Whether a request body is NDJSON, read by its route as it arrives."""
+    return _media_type(headers.get("content-type")) == NDJSON_MEDIA_TYPE
+
+
+def _parse_qualities(header: str) -> dict[str, float]:
+    """Parse an Accept / Accept-Encoding header into {token: quality}."""
+    qualities: dict[str, float] = {}
+    for part in header.split(","):
+        token, *params = [p.strip() for p in part.split(";")]
+        if not token:
+            continue
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        qualities[token.lower()] = quality
+    return qualities
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """Pick the best supported response coding for an Accept-Encoding header."""
+    qualities = _parse_qualities(accept_encoding)
+    best, best_quality = None, 0.0
+    for encoding in supported_encodings():
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def accepts_msgpack(request: Request) -> bool:
+    """Whether the client prefers a MessagePack response."""
+    if msgpack is None:
+        return False
+    qualities = _parse_qualities(request.headers.get("accept", ""))
+    msgpack_quality = max(qualities.get(t, 0.0) for t in MSGPACK_MEDIA_TYPES)
+    return msgpack_quality > 0 and msgpack_quality >= qualities.get(
+        "application/json", 0.0
+    )
+
+
+def _error(status_code: int, detail: str) -> JSONResponse:
+    return JSONResponse({"detail": detail}, status_code=status_code)
+
+
+class _BodyTooLarge(Exception):
+    """Decompressed request body exceeded the size limit."""
+
+
+class CompressionMiddleware:
+    """Decode compressed request bodies and compress negotiated responses."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        max_body_size: int = MAX_REQUEST_BODY_BYTES,
+    ):
+        """Wrap an ASGI app.
+
+        Args:
+            app: The downstream ASGI application
+            minimum_size: Responses smaller than this are sent uncompressed
+            max_body_size: Limit on decompressed request bodies (0 disables)
+
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle one ASGI connection."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        content_encoding = headers.get("content-encoding", "identity").lower()
+        if content_encoding not in ("identity", ""):
+            decompressor = _decompressor(content_encoding)
+            if decompressor is None:
+                response = _error(
+                    415, f"Unsupported Content-Encoding: {content_encoding}"
+                )
+                await response(scope, receive, send)
+                return
+            if is_streamed(headers):
+                scope = self._rewrite_request_headers(scope, None)
+                receive = self._decompressing(receive, decompressor, content_encoding)
+                await self.app(scope, receive, self._negotiated(headers, scope, send))
+                return
+            try:
+                body = await self._read_decompressed(
+                    receive, decompressor, self.max_body_size
+                )
+            except _BodyTooLarge:
+                response = _error(
+                    413, f"Decompressed request body exceeds {self.max_body_size} bytes"
+                )
+                await response(scope, receive, send)
+                return
+            except _DECODE_ERRORS as e:
+                logger.error("Invalid %s request body: %s", content_encoding, e)
+                response = _error(400, f"Invalid {content_encoding} request body")
+                await response(scope, receive, send)
+                return
+            logger.debug(
+                "Decoded %s request body: %d bytes", content_encoding, len(body)
+            )
+            scope = self._rewrite_request_headers(scope, len(body))
+            receive = self._replay(body, receive)
+
+        await self.app(scope, receive, self._negotiated(headers, scope, send))
+
+    def _negotiated(self, headers: Headers, scope: Scope, send: Send) -> Send:
+        """Wrap ``send`` to compress the response if the client accepts it."""
+        encoding = negotiate_encoding(headers.get("accept-encoding", ""))
+        if encoding is not None and scope.get("method") != "HEAD":
+            return _CompressingSender(send, encoding, self.minimum_size)
+        return send
+
+    @staticmethod
+    async def _read_decompressed(
+        receive: Receive, decompressor: Any, max_size: int
+    ) -> bytes:
+        chunks = []
+        size = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunk = decompressor.decompress(message.get("body", b""))
+            size += len(chunk)
+            if 0 < max_size < size:
+                raise _BodyTooLarge
+            chunks.append(chunk)
+            more_body = message.get("more_body", False)
+        if not getattr(decompressor, "eof", True):
+            raise EOFError("Truncated compressed stream")
+        return b"".join(chunks)
+
+    @staticmethod
+    def _decompressing(receive: Receive, decompressor: Any, encoding: str) -> Receive:
+        """Return a ``receive`` decoding each body chunk as it is read.
+
+        Decoding errors surface in the route as ``ValueError``.
+        """
+
+        async def decoded() -> Message:
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            try:
+                body = decompressor.decompress(message.get("body", b""))
+                more_body = message.get("more_body", False)
+                if not more_body and not getattr(decompressor, "eof", True):
+                    raise EOFError("Truncated compressed stream")
+            except _DECODE_ERRORS as e:
+                raise ValueError(f"Invalid {encoding} request body: {e}") from e
+            return {**message, "body": body}
+
+        return decoded
+
+    @staticmethod
+    def _rewrite_request_headers(scope: Scope, length: int | None) -> Scope:
+        raw = [
+            (k, v)
+            for k, v in scope["headers"]
+            if k not in (b"content-encoding", b"content-length")
+        ]
+        if length is not None:
+            raw.append((b"content-length", str(length).encode("latin-1")))
+        return {**scope, "headers": raw}
+
+    @staticmethod
+    def _replay(body: bytes, receive: Receive) -> Receive:
+        sent = False
+
+        async def replay() -> Message:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return replay
+
+
+class _CompressingSender:
+    """ASGI ``send`` wrapper that compresses eligible response bodies."""
+
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message: Message | None = None
+        self.compressor: Any = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            media_type = _media_type(headers.get("content-type"))
+            self.passthrough = "content-encoding" in headers or not (
+                media_type.startswith(COMPRESSIBLE_MEDIA_TYPES)
+            )
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self._flush_start()
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start = self.start_message
+            if self.passthrough or (not more_body and len(body) < self.minimum_size):
+                await self._flush_start()
+                await self.send(message)
+                self.passthrough = True
+                return
+
+            self.compressor = _compressor(self.encoding)
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+                body = self.compressor.compress(body)
+            else:
+                body = self.compressor.compress(body) + self.compressor.flush()
+                headers["Content-Length"] = str(len(body))
+            await self._flush_start()
+            await self.send(
+                {"type": "http.response.body", "body": body, "more_body": more_body}
+            )
+            return
+
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        body = self.compressor.compress(body)
+        if not more_body:
+            body += self.compressor.flush()
+        await self.send(
+            {"type": "http.response.body", "body": body, "more_body": more_body}
+        )
+
+    async def _flush_start(self) -> None:
+        if self.start_message is not None:
+            message, self.start_message = self.start_message, None
+            await self.send(message)
+
+
+class MsgpackRequest(Request):
+    """Request whose ``json()`` decodes a MessagePack body."""
+
+    async def json(self) -> Any:
+        """Decode the body as MessagePack, keeping integer map keys."""
+        if not hasattr(self, "_json"):
+            body = await self.body()
+            try:
+                self._json = msgpack.unpackb(body, raw=False, strict_map_key=False)
+            except (msgpack.UnpackException, ValueError) as e:
+                raise HTTPException(
+                    status_code=400, detail=f"Invalid MessagePack body: {e}"
+                ) from e
+        return self._json
+
+
+class WireRoute(APIRoute):
+    """Route that accepts JSON or MessagePack request bodies."""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        """Wrap the default handler to decode MessagePack bodies."""
+        original_handler = super().get_route_handler()
+
+        async def handler(request: Request) -> Response:
+            media_type = _media_type(request.headers.get("content-type"))
+            if media_type in MSGPACK_MEDIA_TYPES:
+                if msgpack is None:
+                    raise HTTPException(
+                        status_code=415,
+                        detail="MessagePack support is not installed",
+                    )
+                # Present the body to FastAPI as JSON so it is validated
+                # against the route's model; ``json()`` does the decoding.
+                scope = {
+                    **request.scope,
+                    "headers": [
+                        (k, v)
+                        for k, v in request.scope["headers"]
+                        if k != b"content-type"
+                    ]
+                    + [(b"content-type", b"application/json")],
+                }
+                request = MsgpackRequest(scope, request.receive)
+            return await original_handler(request)
+
+        return handler
+
+
+class MsgpackResponse(Response):
+    """Response rendered as MessagePack."""
+
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        """Pack JSON-compatible content."""
+        return msgpack.packb(content, use_bin_type=True)
+
+
+def negotiate_response(request: Request, content: BaseModel | dict) -> Any:
+    """Return ``content`` as MessagePack if the client asked for it.
+
+    JSON clients get ``content`` back unchanged so FastAPI serializes it
+    through the route's ``response_model`` as usual.
+    """
+    if not accepts_msgpack(request):
+        return content
+    if isinstance(content, BaseModel):
+        content = content.model_dump(mode="json")
+    return MsgpackResponse(content)
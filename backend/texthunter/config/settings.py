@@ -1,5 +1,17 @@
 """Runtime settings for TextHunter backend."""
 
+import os
+from pathlib import Path
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
 CORS_ORIGINS: list[str] = [
     "http://localhost:5173",
     "http://localhost:8080",
@@ -15,3 +27,117 @@ CORS_ORIGINS: list[str] = [
     "http://localhost:3003",
 ]
 
+# Wire format: responses below this size (bytes) are not compressed, and only
+# these media types are compressed (Excel/ZIP payloads are already deflated).
+COMPRESSION_MIN_SIZE: int = 1024
+COMPRESSIBLE_MEDIA_TYPES: tuple[str, ...] = (
+    "application/json",
+    "application/msgpack",
+    "application/x-msgpack",
+    "text/",
+)
+
+# Seconds between client-disconnect checks while an extraction is running.
+DISCONNECT_POLL_INTERVAL: float = 0.1
+
+# Admission control. Limits can be overridden with TEXTHUNTER_* environment
+# variables; a byte limit of 0 disables that check. They apply to the whole
+# server: each of the WORKERS processes enforces an equal share.
+MAX_CONCURRENT_EXTRACTIONS: int = _env_int("TEXTHUNTER_MAX_CONCURRENT_EXTRACTIONS", 4)
+MAX_QUEUED_EXTRACTIONS: int = _env_int("TEXTHUNTER_MAX_QUEUED_EXTRACTIONS", 16)
+MAX_CONCURRENT_EXPORTS: int = _env_int("TEXTHUNTER_MAX_CONCURRENT_EXPORTS", 2)
+MAX_QUEUED_EXPORTS: int = _env_int("TEXTHUNTER_MAX_QUEUED_EXPORTS", 8)
+ADMISSION_QUEUE_TIMEOUT: float = _env_float("TEXTHUNTER_ADMISSION_QUEUE_TIMEOUT", 30)
+ADMISSION_RETRY_AFTER: int = _env_int("TEXTHUNTER_ADMISSION_RETRY_AFTER", 5)
+MAX_REQUEST_BODY_BYTES: int = _env_int(
+    "TEXTHUNTER_MAX_REQUEST_BODY_BYTES", 512 * 1024 * 1024
+)
+MAX_INFLIGHT_CORPUS_BYTES: int = _env_int(
+    "TEXTHUNTER_MAX_INFLIGHT_CORPUS_BYTES", 1024 * 1024 * 1024
+)
+
+# Streamed corpus uploads (NDJSON to /corpora/stream) are written to the store
+# as they arrive, so they skip MAX_REQUEST_BODY_BYTES and are capped here
+# instead (0: no cap).
+MAX_CORPUS_STREAM_BYTES: int = _env_int(
+    "TEXTHUNTER_MAX_CORPUS_STREAM_BYTES", 64 * 1024 * 1024 * 1024
+)
+
+# Serving. TEXTHUNTER_WORKERS > 1 runs several uvicorn worker processes; they
+# share uploaded corpora and cached results through the on-disk store.
+WORKERS: int = _env_int("TEXTHUNTER_WORKERS", 1)
+STORE_DIR: Path = Path(
+    os.environ.get("TEXTHUNTER_STORE_DIR", Path.home() / ".texthunter" / "store")
+)
+OPEN_CORPORA_CACHE_SIZE: int = _env_int("TEXTHUNTER_OPEN_CORPORA_CACHE_SIZE", 8)
+RESULT_CACHE_MAX_ENTRIES: int = _env_int("TEXTHUNTER_RESULT_CACHE_MAX_ENTRIES", 256)
+
+# Regex inference. Example sets larger than GREX_MAX_EXAMPLES are clustered by
+# shape instead of being fed to grex whole; guessed patterns are timed against
+# up to SCAN_SAMPLE_BYTES of the current corpus and flagged as slow below
+# SLOW_SCAN_MB_PER_SECOND.
+GREX_MAX_EXAMPLES: int = _env_int("TEXTHUNTER_GREX_MAX_EXAMPLES", 10)
+GUESS_REGEX_MAX_CLUSTERS: int = _env_int("TEXTHUNTER_GUESS_REGEX_MAX_CLUSTERS", 8)
+GUESS_REGEX_CACHE_SIZE: int = _env_int("TEXTHUNTER_GUESS_REGEX_CACHE_SIZE", 128)
+SCAN_SAMPLE_BYTES: int = _env_int("TEXTHUNTER_SCAN_SAMPLE_BYTES", 4 * 1024 * 1024)
+SLOW_SCAN_MB_PER_SECOND: float = _env_float("TEXTHUNTER_SLOW_SCAN_MB_PER_SECOND", 20)
+
+# Regex cost analysis: rewrites /extract* may apply to keyword patterns before
+# running them. "off" runs patterns as written, "exact" only applies rewrites
+# that keep the matches identical, "trim" also strips leading/trailing
+# wildcards such as ".*", which changes the results: match_found shrinks to the
+# core of the pattern and a line can yield several matches instead of one.
+REGEX_AUTO_OPTIMIZE: str = os.environ.get("TEXTHUNTER_REGEX_AUTO_OPTIMIZE", "off")
+
+# Page dedup and normalization. Normalized page text is cached in-process up
+# to NORMALIZED_CACHE_BYTES; lines shorter than DEDUP_MIN_SEGMENT_CHARS are
+# not worth deduplicating on their own.
+NORMALIZED_CACHE_BYTES: int = _env_int(
+    "TEXTHUNTER_NORMALIZED_CACHE_BYTES", 64 * 1024 * 1024
+)
+DEDUP_MIN_SEGMENT_CHARS: int = _env_int("TEXTHUNTER_DEDUP_MIN_SEGMENT_CHARS", 32)
+
+# Stored corpora larger than LINE_INDEX_MAX_CORPUS_BYTES get no line dedup
+# index, which is held in memory; their pages are scanned in place, as UTF-8
+# bytes where the pattern allows.
+LINE_INDEX_MAX_CORPUS_BYTES: int = _env_int(
+    "TEXTHUNTER_LINE_INDEX_MAX_CORPUS_BYTES", 256 * 1024 * 1024
+)
+
+# Live search (/live-search WebSocket): seconds of typing silence before a
+# query runs, and seconds between progress messages while it runs.
+LIVE_SEARCH_DEBOUNCE: float = _env_float("TEXTHUNTER_LIVE_SEARCH_DEBOUNCE", 0.15)
+LIVE_SEARCH_PROGRESS_INTERVAL: float = 0.1
+
+
+# Result browsing (/results): result sets kept in memory per process, rows per
+# page, and values listed per facet (the most frequent first).
+RESULT_SETS_IN_MEMORY: int = _env_int("TEXTHUNTER_RESULT_SETS_IN_MEMORY", 8)
+RESULT_PAGE_MAX_ROWS: int = 1000
+RESULT_FACET_MAX_VALUES: int = 50
+
+# Fuzzy matching: the most edits a match may be from its term, and the
+# shortest exact piece a term is split into to find candidates (a term must
+# be at least (max_edits + 1) * FUZZY_MIN_PIECE_CHARS long).
+FUZZY_MAX_EDITS: int = 3
+FUZZY_MIN_PIECE_CHARS: int = 2
+
+# Excel export: rows per worksheet (Excel's limit, header row included) and
+# worker processes writing the parts of a partitioned export in parallel.
+# Smaller exports are written in-process, as starting workers costs ~1s.
+EXPORT_MAX_SHEET_ROWS: int = 1_048_576
+EXPORT_WORKERS: int = _env_int("TEXTHUNTER_EXPORT_WORKERS", min(4, os.cpu_count() or 1))
+EXPORT_PARALLEL_MIN_ROWS: int = 100_000
+
+# Bulk term lookup: compiled term dictionaries (automata) kept per process.
+TERM_DICTIONARY_CACHE_SIZE: int = _env_int("TEXTHUNTER_TERM_DICTIONARY_CACHE_SIZE", 8)
+
+# Background jobs (/jobs): jobs running at once per process, jobs waiting
+# before submissions get 429, seconds between progress updates, matches
+# serialized at a time into an artifact, and seconds a finished job's state
+# and artifact are kept in the store.
+JOB_WORKERS: int = _env_int("TEXTHUNTER_JOB_WORKERS", 2)
+JOB_MAX_QUEUED: int = _env_int("TEXTHUNTER_JOB_MAX_QUEUED", 32)
+JOB_PROGRESS_INTERVAL: float = 0.5
+JOB_ARTIFACT_CHUNK_MATCHES: int = 10_000
+JOB_RETENTION_SECONDS: int = _env_int("TEXTHUNTER_JOB_RETENTION_SECONDS", 86400)
@@ -1,7 +1,17 @@
 """Core business logic exports."""
 
+from texthunter.core.analyzer import analyze_pattern, auto_optimize
+from texthunter.core.cancellation import CancellationToken, ExtractionCancelled
 from texthunter.core.excel import build_dataframe, generate_excel
 from texthunter.core.regex import extract_matches, guess_regex
 
-__all__ = ["build_dataframe", "extract_matches", "generate_excel", "guess_regex"]
-
+__all__ = [
+    "analyze_pattern",
+    "auto_optimize",
+    "CancellationToken",
+    "ExtractionCancelled",
+    "build_dataframe",
+    "extract_matches",
+    "generate_excel",
+    "guess_regex",
+]
@@ -0,0 +1,546 @@
+r"""Pre-execution cost analysis and rewriting of keyword regexes.
+
+Patterns are parsed with the standard library's regex parser
+(``re._parser``), inspected for constructs that make ``extract_matches``
+slow, and written back out from the (possibly rewritten) parse tree.
+
+Rewrites come in two kinds:
+
+- exact: the rewritten pattern finds exactly the same matches. Python's
+  parser already factors common literal prefixes out of alternations and
+  turns single-character alternatives into character classes, so any
+  pattern written back from the tree carries those simplifications; a
+  trailing lazy ``.*?`` can only ever match the empty string and is dropped.
+- trim: unbounded wildcards such as ``.*`` or ``\w*`` at either end of the
+  pattern are stripped. This changes the results: each match covers only
+  the core of the pattern instead of extending to the line edges, and a
+  line holding the core several times gives several matches instead of one
+  (``.*FG`` matches ``FG FG`` once, ``FG`` twice).
+
+``REGEX_AUTO_OPTIMIZE`` decides which kinds ``auto_optimize`` applies to
+extraction patterns: ``off``, ``exact`` or ``trim`` (both kinds).
+"""
+
+import logging
+import re
+from functools import lru_cache
+from re import _constants as sre
+from re import _parser as sre_parse
+
+from texthunter.api.schemas import RegexAnalysis, RegexIssue
+from texthunter.config.settings import REGEX_AUTO_OPTIMIZE
+
+logger = logging.getLogger(__name__)
+
+AUTO_OPTIMIZE_LEVELS = ("off", "exact", "trim")
+
+# Alternations with at least this many branches are reported
+LARGE_ALTERNATION = 10
+
+_REPEATS = (sre.MAX_REPEAT, sre.MIN_REPEAT, sre.POSSESSIVE_REPEAT)
+_SINGLE_CHAR = (sre.ANY, sre.IN, sre.LITERAL, sre.NOT_LITERAL)
+
+_CATEGORIES = {
+    sre.CATEGORY_DIGIT: r"\d",
+    sre.CATEGORY_NOT_DIGIT: r"\D",
+    sre.CATEGORY_SPACE: r"\s",
+    sre.CATEGORY_NOT_SPACE: r"\S",
+    sre.CATEGORY_WORD: r"\w",
+    sre.CATEGORY_NOT_WORD: r"\W",
+}
+_ANCHORS = {
+    sre.AT_BEGINNING: "^",
+    sre.AT_BEGINNING_STRING: r"\A",
+    sre.AT_END: "$",
+    sre.AT_END_STRING: r"\Z",
+    sre.AT_BOUNDARY: r"\b",
+    sre.AT_NON_BOUNDARY: r"\B",
+}
+_FLAGS = {
+    sre.SRE_FLAG_IGNORECASE: "i",
+    sre.SRE_FLAG_MULTILINE: "m",
+    sre.SRE_FLAG_DOTALL: "s",
+    sre.SRE_FLAG_ASCII: "a",
+}
+
+
+class _Unsupported(Exception):
+    """The parse tree holds a construct the writer cannot reproduce."""
+
+
+def _flag_letters(flags: int) -> str:
+    return "".join(letter for flag, letter in _FLAGS.items() if flags & flag)
+
+
+def _write_class(items: list) -> str:
+    if len(items) == 1 and items[0][0] is sre.CATEGORY:
+        return _CATEGORIES[items[0][1]]
+    parts = []
+    for op, av in items:
+        if op is sre.NEGATE:
+            parts.append("^")
+        elif op is sre.LITERAL:
+            parts.append(re.escape(chr(av)))
+        elif op is sre.RANGE:
+            parts.append(f"{re.escape(chr(av[0]))}-{re.escape(chr(av[1]))}")
+        elif op is sre.CATEGORY:
+            parts.append(_CATEGORIES[av])
+        else:
+            raise _Unsupported(op)
+    return f"[{''.join(parts)}]"
+
+
+def _quantifier(low: int, high: int) -> str:
+    if high is sre.MAXREPEAT:
+        return {0: "*", 1: "+"}.get(low, f"{{{low},}}")
+    if (low, high) == (0, 1):
+        return "?"
+    return f"{{{low}}}" if low == high else f"{{{low},{high}}}"
+
+
+def _write(items, names: dict[int, str], nested: bool = False) -> str:
+    """Write a parse (sub)tree back out as pattern source."""
+    items = list(items)
+    out = []
+    for op, av in items:
+        if op is sre.LITERAL:
+            out.append(re.escape(chr(av)))
+        elif op is sre.NOT_LITERAL:
+            out.append(f"[^{re.escape(chr(av))}]")
+        elif op is sre.ANY:
+            out.append(".")
+        elif op is sre.IN:
+            out.append(_write_class(av))
+        elif op is sre.AT:
+            out.append(_ANCHORS[av])
+        elif op is sre.BRANCH:
+            body = "|".join(_write(branch, names) for branch in av[1])
+            out.append(f"(?:{body})" if len(items) > 1 or nested else body)
+        elif op is sre.SUBPATTERN:
+            group, add_flags, del_flags, body = av
+            inner = _write(body, names)
+            if group is not None:
+                name = names.get(group)
+                inner = f"(?P<{name}>{inner})" if name else f"({inner})"
+            if add_flags or del_flags or group is None:
+                on, off = _flag_letters(add_flags), _flag_letters(del_flags)
+                inner = f"(?{on}{'-' + off if off else ''}:{inner})"
+            out.append(inner)
+        elif op in _REPEATS:
+            low, high, body = av
+            body = list(body)
+            inner = _write(body, names)
+            if len(body) != 1 or body[0][0] not in (*_SINGLE_CHAR, sre.SUBPATTERN):
+                inner = f"(?:{inner})"
+            suffix = {sre.MIN_REPEAT: "?", sre.POSSESSIVE_REPEAT: "+"}.get(op, "")
+            out.append(inner + _quantifier(low, high) + suffix)
+        elif op in (sre.ASSERT, sre.ASSERT_NOT):
+            direction, body = av
+            kind = "=" if op is sre.ASSERT else "!"
+            lookbehind = "<" if direction < 0 else ""
+            out.append(f"(?{lookbehind}{kind}{_write(body, names)})")
+        elif op is sre.GROUPREF:
+            out.append(f"(?:\\{av})")
+        elif op is sre.ATOMIC_GROUP:
+            out.append(f"(?>{_write(av, names)})")
+        elif op is sre.GROUPREF_EXISTS:
+            group, yes, no = av
+            branches = _write(yes, names, nested=True)
+            if no is not None:
+                branches += "|" + _write(no, names, nested=True)
+            out.append(f"(?({group}){branches})")
+        else:
+            raise _Unsupported(op)
+    return "".join(out)
+
+
+def _is_wildcard(item: tuple) -> bool:
+    r"""Whether an item is an optional unbounded run like ``.*`` or ``\w*?``."""
+    op, av = item
+    if op not in _REPEATS:
+        return False
+    low, high, body = av
+    body = list(body)
+    return (
+        low == 0
+        and high is sre.MAXREPEAT
+        and len(body) == 1
+        and body[0][0] in _SINGLE_CHAR
+    )
+
+
+def _is_unbounded_repeat(op, av) -> bool:
+    return op in _REPEATS and av[1] is sre.MAXREPEAT
+
+
+def _consumes(items: list) -> bool:
+    """Whether a sequence contains anything besides zero-width assertions."""
+    return any(op not in (sre.AT, sre.ASSERT, sre.ASSERT_NOT) for op, _ in items)
+
+
+def _walk(items, depth: int = 0):
+    """Yield ``(op, av, repeat_depth)`` for every node in a parse tree."""
+    for op, av in items:
+        yield op, av, depth
+        if op in _REPEATS:
+            yield from _walk(av[2], depth + (av[1] is sre.MAXREPEAT or av[1] > 1))
+        elif op is sre.SUBPATTERN:
+            yield from _walk(av[3], depth)
+        elif op is sre.BRANCH:
+            for branch in av[1]:
+                yield from _walk(branch, depth)
+        elif op in (sre.ASSERT, sre.ASSERT_NOT):
+            yield from _walk(av[1], depth)
+        elif op is sre.ATOMIC_GROUP:
+            yield from _walk(av, depth)
+        elif op is sre.GROUPREF_EXISTS:
+            for branch in av[1:]:
+                if branch is not None:
+                    yield from _walk(branch, depth)
+
+
+def _find_issues(items: list) -> list[RegexIssue]:
+    issues = []
+    if items and _is_wildcard(items[0]):
+        issues.append(
+            RegexIssue(
+                code="leading_wildcard",
+                severity="high",
+                message=(
+                    "Pattern starts with an unbounded wildcard; the engine"
+                    " retries it from every position and backtracks over"
+                    " the rest of the line each time"
+                ),
+            )
+        )
+    if len(items) > 1 and _is_wildcard(items[-1]):
+        issues.append(
+            RegexIssue(
+                code="trailing_wildcard",
+                severity="medium",
+                message="Trailing wildcard stretches every match to the line end",
+            )
+        )
+    for op, av, depth in _walk(items):
+        if depth and _is_unbounded_repeat(op, av):
+            issues.append(
+                RegexIssue(
+                    code="nested_quantifier",
+                    severity="high",
+                    message=(
+                        "Repeat nested inside another repeat can backtrack"
+                        " exponentially on near-misses"
+                    ),
+                )
+            )
+            break
+    for op, av, _ in _walk(items):
+        if op is sre.BRANCH and len(av[1]) >= LARGE_ALTERNATION:
+            issues.append(
+                RegexIssue(
+                    code="large_alternation",
+                    severity="medium",
+                    message=(
+                        f"Alternation of {len(av[1])} branches is tried"
+                        " branch by branch at every position"
+                    ),
+                )
+            )
+            break
+    return issues
+
+
+def _count_alternations(pattern: str) -> int:
+    """Count ``|`` operators in pattern source, ignoring escapes and classes."""
+    count = 0
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 1
+        elif in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+            # A ']' straight after '[' or '[^' is a literal
+            if pattern[i + 1 : i + 2] == "^":
+                i += 1
+            if pattern[i + 1 : i + 2] == "]":
+                i += 1
+        elif char == "|":
+            count += 1
+        i += 1
+    return count
+
+
+@lru_cache(maxsize=256)
+def optimize_pattern(pattern: str, allow_trim: bool = True) -> tuple[str, list[str]]:
+    """Return a rewritten pattern and descriptions of the rewrites applied.
+
+    Args:
+        pattern: Keyword regex to rewrite
+        allow_trim: Also strip leading/trailing wildcards, which changes
+            match extents (see module docstring)
+
+    Returns:
+        Tuple of (pattern, rewrites). The pattern is returned unchanged with
+        no rewrites when nothing applies or the tree cannot be written back.
+
+    Raises:
+        ValueError: If the pattern is not a valid regex
+
+    """
+    try:
+        tree = sre_parse.parse(pattern)
+    except re.error as e:
+        raise ValueError(f"Invalid keyword regex: {e}") from e
+
+    items = list(tree)
+    rewrites = []
+    if (
+        len(items) > 1
+        and items[-1][0] is sre.MIN_REPEAT
+        and _is_wildcard(items[-1])
+        and _consumes(items[:-1])
+    ):
+        items.pop()
+        rewrites.append("Dropped trailing lazy wildcard (it only matches '')")
+    if allow_trim:
+        stripped = False
+        while items and _is_wildcard(items[0]) and _consumes(items[1:]):
+            items.pop(0)
+            stripped = True
+        if stripped:
+            rewrites.append("Stripped leading wildcard")
+        stripped = False
+        while len(items) > 1 and _is_wildcard(items[-1]) and _consumes(items[:-1]):
+            items.pop()
+            stripped = True
+        if stripped:
+            rewrites.append("Stripped trailing wildcard")
+
+    names = {index: name for name, index in tree.state.groupdict.items()}
+    try:
+        body = _write(items, names)
+    except _Unsupported as e:
+        logger.debug("Cannot rewrite pattern %r: unsupported node %s", pattern, e)
+        return pattern, []
+    flags = _flag_letters(tree.state.flags & ~sre.SRE_FLAG_UNICODE)
+    rewritten = f"(?{flags}){body}" if flags else body
+
+    if _count_alternations(rewritten) < _count_alternations(pattern):
+        rewrites.append(
+            "Simplified alternation (common prefixes factored out,"
+            " single characters merged into classes)"
+        )
+    if not rewrites or re.compile(rewritten).groups != re.compile(pattern).groups:
+        return pattern, []
+    return rewritten, rewrites
+
+
+def _can_match_newline(items, flags: int) -> bool:
+    r"""Whether any consuming node of a tree can match ``\n``."""
+    for op, av in items:
+        if op is sre.LITERAL and av == 10:
+            return True
+        if op is sre.NOT_LITERAL and av != 10:
+            return True
+        if op is sre.ANY and flags & sre.SRE_FLAG_DOTALL:
+            return True
+        if op is sre.IN and re.match(_write_class(av), "\n", flags):
+            return True
+        if op in _REPEATS and _can_match_newline(av[2], flags):
+            return True
+        if op is sre.SUBPATTERN:
+            local = (flags | av[1]) & ~av[2]
+            if _can_match_newline(av[3], local):
+                return True
+        if op is sre.BRANCH and any(_can_match_newline(b, flags) for b in av[1]):
+            return True
+        if op is sre.ATOMIC_GROUP and _can_match_newline(av, flags):
+            return True
+        if op is sre.GROUPREF_EXISTS and any(
+            b is not None and _can_match_newline(b, flags) for b in av[1:]
+        ):
+            return True
+    return False
+
+
+@lru_cache(maxsize=256)
+def is_segment_safe(pattern: str) -> bool:
+    r"""Whether a pattern can be run line by line with identical results.
+
+    True when every match lies within one line and does not depend on text
+    outside it: the pattern cannot match ``\n``, always consumes at least
+    one character, and uses no lookarounds or string-level anchors (``^`` and
+    ``$`` only under ``re.MULTILINE``). Invalid or unsupported patterns are
+    reported as unsafe.
+    """
+    try:
+        tree = sre_parse.parse(pattern)
+    except re.error:
+        return False
+    flags = tree.state.flags
+    if tree.getwidth()[0] == 0:
+        return False
+    for op, av, _ in _walk(tree):
+        if op in (sre.ASSERT, sre.ASSERT_NOT):
+            return False
+        if op is sre.AT and av in (sre.AT_BEGINNING_STRING, sre.AT_END_STRING):
+            return False
+        if (
+            op is sre.AT
+            and av in (sre.AT_BEGINNING, sre.AT_END)
+            and not flags & sre.SRE_FLAG_MULTILINE
+        ):
+            return False
+    try:
+        return not _can_match_newline(tree, flags)
+    except _Unsupported:
+        return False
+
+
+_ASCII_CATEGORIES = (sre.CATEGORY_DIGIT, sre.CATEGORY_SPACE, sre.CATEGORY_WORD)
+
+
+@lru_cache(maxsize=256)
+def is_bytes_safe(pattern: str) -> bool:
+    r"""Whether a pattern finds the same matches in UTF-8 bytes as in text.
+
+    True when the pattern only ever matches ASCII characters and never
+    treats a non-ASCII character as a unit: ASCII literals and non-negated
+    classes of them, lookarounds and anchors built from those, and no case
+    folding. ``.``, negated classes, and ``\d``/``\w``/``\s``/```` (which
+    are Unicode-aware in text unless ``(?a)`` is set) are unsafe. On pure
+    ASCII text every pattern is safe; this is for text that is not.
+    """
+    if not pattern.isascii():
+        return False
+    try:
+        tree = sre_parse.parse(pattern)
+    except re.error:
+        return False
+    flags = tree.state.flags
+    if flags & sre.SRE_FLAG_IGNORECASE:
+        return False
+    ascii_only = flags & sre.SRE_FLAG_ASCII
+    for op, av, _ in _walk(tree):
+        if op in (sre.ANY, sre.NOT_LITERAL):
+            return False
+        if op is sre.LITERAL and av > 127:
+            return False
+        if op is sre.SUBPATTERN and av[1] & sre.SRE_FLAG_IGNORECASE:
+            return False
+        if op is sre.AT and av in (sre.AT_BOUNDARY, sre.AT_NON_BOUNDARY):
+            if not ascii_only:
+                return False
+        if op is sre.IN:
+            for item, value in av:
+                if item is sre.NEGATE:
+                    return False
+                if item is sre.LITERAL and value > 127:
+                    return False
+                if item is sre.RANGE and value[1] > 127:
+                    return False
+                if item is sre.CATEGORY and not (
+                    ascii_only and value in _ASCII_CATEGORIES
+                ):
+                    return False
+    return True
+
+
+def _freeze(items) -> tuple:
+    """Return a parse tree as nested tuples that compare structurally."""
+    frozen = []
+    for op, av in items:
+        if isinstance(av, tuple):
+            av = tuple(
+                _freeze(x) if isinstance(x, sre_parse.SubPattern) else x for x in av
+            )
+            if op is sre.BRANCH:
+                av = (None, tuple(_freeze(branch) for branch in av[1]))
+        elif isinstance(av, sre_parse.SubPattern):
+            av = _freeze(av)
+        elif isinstance(av, list):
+            av = tuple(av)
+        frozen.append((op, av))
+    return tuple(frozen)
+
+
+@lru_cache(maxsize=256)
+def is_refinement(old: str, new: str) -> bool:
+    """Whether every page with a match of ``new`` also has a match of ``old``.
+
+    True when ``new`` parses to ``old``'s top-level sequence followed by
+    more items (typically: the user appended characters), with the same
+    flags. Appending a quantifier or ``|`` changes the parsed sequence, so
+    broadening edits such as ``ab`` -> ``ab*`` or ``ab|c`` are not
+    refinements.
+    """
+    try:
+        old_tree = sre_parse.parse(old)
+        new_tree = sre_parse.parse(new)
+    except re.error:
+        return False
+    if old_tree.state.flags != new_tree.state.flags:
+        return False
+    old_items = _freeze(old_tree)
+    return _freeze(new_tree)[: len(old_items)] == old_items
+
+
+def literal_text(pattern: str) -> str | None:
+    r"""Return the text a pattern matches if it is a plain literal, else None.
+
+    Escapes are resolved, so ``10\"-FG-001`` gives ``10"-FG-001``. Patterns
+    with flags (such as ``(?i)``) are not plain literals.
+    """
+    try:
+        tree = sre_parse.parse(pattern)
+    except re.error:
+        return None
+    if tree.state.flags & ~sre.SRE_FLAG_UNICODE:
+        return None
+    if not tree or any(op is not sre.LITERAL for op, _ in tree):
+        return None
+    return "".join(chr(av) for _, av in tree)
+
+
+def analyze_pattern(pattern: str) -> RegexAnalysis:
+    """Flag costly constructs in a pattern and offer a rewritten version.
+
+    Raises:
+        ValueError: If the pattern is not a valid regex
+
+    """
+    optimized, rewrites = optimize_pattern(pattern, allow_trim=True)
+    exact_optimized, _ = optimize_pattern(pattern, allow_trim=False)
+    issues = _find_issues(list(sre_parse.parse(pattern)))
+    logger.debug(
+        "Analyzed %r: %d issues, %d rewrites", pattern, len(issues), len(rewrites)
+    )
+    return RegexAnalysis(
+        pattern=pattern,
+        issues=issues,
+        optimized_pattern=optimized if rewrites else None,
+        rewrites=rewrites,
+        exact=optimized == exact_optimized,
+    )
+
+
+def auto_optimize(pattern: str, level: str | None = None) -> str:
+    """Return the pattern extraction should run under the given level.
+
+    ``level`` defaults to ``REGEX_AUTO_OPTIMIZE``. Invalid patterns are
+    returned unchanged so the caller reports the error.
+    """
+    level = level or REGEX_AUTO_OPTIMIZE
+    if level not in ("exact", "trim"):
+        return pattern
+    try:
+        optimized, rewrites = optimize_pattern(pattern, allow_trim=level == "trim")
+    except ValueError:
+        return pattern
+    if rewrites:
+        logger.info("Auto-optimized %r to %r: %s", pattern, optimized, rewrites)
+    return optimized
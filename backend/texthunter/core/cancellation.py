@@ -0,0 +1,187 @@
+"""Cooperative cancellation for long-running extraction work.
+
+Extraction runs in a worker thread and checks a ``CancellationToken``
+between pages. Tokens are cancelled when the client disconnects, when a
+newer query arrives for the same session, or explicitly by query ID.
+
+With several worker processes, the session's newer query or the
+``/cancel`` call may reach another worker than the query. Queries with a
+session or query ID therefore leave marker files under
+``<store>/running``, as background jobs do:
+
+- ``session-<hash>`` names the session's live query; a query finding
+  another one named there has been superseded.
+- ``query-<hash>`` exists while the query runs, and ``/cancel`` adds a
+  ``query-<hash>.cancel`` marker next to it.
+
+The worker running the query looks for them each time it is polled.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+
+from texthunter.config.settings import STORE_DIR
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionCancelled(Exception):
+    """Raised inside extraction when its token has been cancelled."""
+
+
+class CancellationToken:
+    """Thread-safe flag checked by extraction loops."""
+
+    def __init__(self, query_id: str | None = None):
+        """Create an uncancelled token, optionally tagged with a query ID."""
+        self.query_id = query_id
+        self.reason: str | None = None
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancellation has been requested."""
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """Request cancellation; the first reason given is kept."""
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+            logger.info("Query %s cancelled: %s", self.query_id, reason)
+
+    def raise_if_cancelled(self) -> None:
+        """Raise ``ExtractionCancelled`` if cancellation was requested."""
+        if self._event.is_set():
+            raise ExtractionCancelled(self.reason or "cancelled")
+
+
+class QueryRegistry:
+    """Track running queries so they can be superseded or cancelled.
+
+    Each session has at most one live query: starting a new one cancels
+    the previous token for that session, in this process at once and in
+    other processes at their next ``poll``.
+    """
+
+    def __init__(self, root: Path = STORE_DIR) -> None:
+        """Create an empty registry sharing markers under ``root``."""
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._by_session: dict[str, CancellationToken] = {}
+        self._by_query: dict[str, CancellationToken] = {}
+        # token -> (session marker, query marker, the query's nonce)
+        self._markers: dict[
+            CancellationToken, tuple[Path | None, Path | None, str]
+        ] = {}
+
+    @property
+    def running_dir(self) -> Path:
+        """Directory holding the markers of running queries."""
+        return self.root / "running"
+
+    def _marker(self, kind: str, value: str) -> Path:
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).hexdigest()
+        return self.running_dir / f"{kind}-{digest}"
+
+    def start(
+        self, session_id: str | None = None, query_id: str | None = None
+    ) -> CancellationToken:
+        """Register a new query and return its token.
+
+        Args:
+            session_id: Client session; an earlier query in it is cancelled
+            query_id: Optional ID that can be passed to ``cancel`` later
+
+        Returns:
+            The token the extraction should check
+
+        """
+        token = CancellationToken(query_id)
+        with self._lock:
+            if session_id is not None:
+                previous = self._by_session.get(session_id)
+                if previous is not None:
+                    previous.cancel("superseded by a newer query")
+                self._by_session[session_id] = token
+            if query_id is not None:
+                self._by_query[query_id] = token
+        if session_id is None and query_id is None:
+            return token
+
+        nonce = uuid.uuid4().hex
+        session_marker = query_marker = None
+        self.running_dir.mkdir(parents=True, exist_ok=True)
+        if session_id is not None:
+            session_marker = self._marker("session", session_id)
+            tmp = session_marker.with_name(f"{nonce}.tmp")
+            tmp.write_text(nonce, encoding="utf-8")
+            os.replace(tmp, session_marker)
+        if query_id is not None:
+            query_marker = self._marker("query", query_id)
+            query_marker.with_suffix(".cancel").unlink(missing_ok=True)
+            query_marker.write_text(nonce, encoding="utf-8")
+        with self._lock:
+            self._markers[token] = (session_marker, query_marker, nonce)
+        return token
+
+    def poll(self, token: CancellationToken) -> None:
+        """Cancel a token superseded or cancelled from another process."""
+        with self._lock:
+            markers = self._markers.get(token)
+        if markers is None or token.cancelled:
+            return
+        session_marker, query_marker, nonce = markers
+        if query_marker is not None and query_marker.with_suffix(".cancel").exists():
+            token.cancel("cancelled by client")
+        elif session_marker is not None:
+            live = _read(session_marker)
+            if live is not None and live != nonce:
+                token.cancel("superseded by a newer query")
+
+    def cancel(self, query_id: str) -> bool:
+        """Cancel a query by ID; return False if it is not running."""
+        with self._lock:
+            token = self._by_query.get(query_id)
+        if token is not None:
+            token.cancel("cancelled by client")
+            return True
+        # Running in another process, which notices at its next poll
+        marker = self._marker("query", query_id)
+        if not marker.exists():
+            return False
+        marker.with_suffix(".cancel").touch()
+        logger.info("Query %s cancelled in another worker", query_id)
+        return True
+
+    def finish(self, token: CancellationToken, session_id: str | None = None) -> None:
+        """Forget a finished query."""
+        with self._lock:
+            if self._by_session.get(session_id) is token:
+                del self._by_session[session_id]
+            if self._by_query.get(token.query_id) is token:
+                del self._by_query[token.query_id]
+            markers = self._markers.pop(token, None)
+        if markers is None:
+            return
+        # A newer query may have taken over either marker since
+        session_marker, query_marker, nonce = markers
+        if session_marker is not None and _read(session_marker) == nonce:
+            session_marker.unlink(missing_ok=True)
+        if query_marker is not None and _read(query_marker) == nonce:
+            query_marker.with_suffix(".cancel").unlink(missing_ok=True)
+            query_marker.unlink(missing_ok=True)
+
+
+def _read(path: Path) -> str | None:
+    try:
+        return path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+
+
+query_registry = QueryRegistry()
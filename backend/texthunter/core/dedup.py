@@ -0,0 +1,198 @@
+"""Page normalization and dedup of text repeated across a corpus.
+
+Drawing sets repeat the same title block, notes and legend on every sheet.
+Two layers keep that text from being scanned over and over:
+
+- ``extract_matches`` remembers the matches of every page it scans in a
+  run, so identical pages are scanned once and their matches fanned out.
+- ``SegmentIndex`` splits each page into lines, hashes them and marks the
+  lines that occur more than once in the corpus. Patterns that cannot span
+  lines (see ``is_segment_safe``) run once per distinct repeated line; the
+  rest of each page is scanned in place.
+
+Normalized page text (whitespace, Unicode NFKC, case folding) is cached by
+page digest, so it is computed once per page rather than once per query.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+from collections.abc import Iterable, Mapping
+
+from texthunter.config.settings import DEDUP_MIN_SEGMENT_CHARS, NORMALIZED_CACHE_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Supported normalizations, in the order they are applied
+NORMALIZATIONS = ("unicode", "casefold", "whitespace")
+
+_HORIZONTAL_SPACE = re.compile(r"[^\S\n]+")
+
+# (start, end, digest) of a page slice; digest is None for text scanned in place
+Segment = tuple[int, int, bytes | None]
+
+
+def page_digest(text: str | bytes | memoryview) -> bytes:
+    """Return a 128-bit content digest of a page or line, or of its UTF-8."""
+    data = text.encode("utf-8", "surrogatepass") if isinstance(text, str) else text
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def canonical_forms(forms: Iterable[str]) -> tuple[str, ...]:
+    """Validate normalization names and return them in application order.
+
+    Raises:
+        ValueError: If a name is not in ``NORMALIZATIONS``
+
+    """
+    forms = set(forms)
+    unknown = forms.difference(NORMALIZATIONS)
+    if unknown:
+        raise ValueError(f"Unknown normalization: {', '.join(sorted(unknown))}")
+    return tuple(form for form in NORMALIZATIONS if form in forms)
+
+
+def normalize_text(text: str, forms: Iterable[str]) -> str:
+    r"""Apply normalizations to page text.
+
+    ``whitespace`` collapses runs of spaces and tabs (and ``\r\n``) but
+    keeps line breaks, so line-level dedup still applies afterwards.
+    """
+    forms = canonical_forms(forms)
+    if "unicode" in forms:
+        text = unicodedata.normalize("NFKC", text)
+    if "casefold" in forms:
+        text = text.casefold()
+    if "whitespace" in forms:
+        text = _HORIZONTAL_SPACE.sub(" ", text.replace("\r\n", "\n"))
+    return text
+
+
+class NormalizationCache:
+    """LRU of normalized page text keyed by page digest, bounded by size."""
+
+    def __init__(self, max_chars: int = NORMALIZED_CACHE_BYTES):
+        """Create a cache holding up to ``max_chars`` of normalized text."""
+        self.max_chars = max_chars
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[bytes, tuple[str, ...]], str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def normalize(self, text: str, forms: Iterable[str]) -> str:
+        """Return ``normalize_text(text, forms)``, computing it at most once."""
+        forms = canonical_forms(forms)
+        if not forms:
+            return text
+        key = (page_digest(text), forms)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        normalized = normalize_text(text, forms)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = normalized
+                self.size += len(normalized)
+            while self.size > self.max_chars and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+        return normalized
+
+
+normalization_cache = NormalizationCache()
+
+
+class SegmentIndex:
+    """Line-level dedup index of one corpus, built once and reused by queries.
+
+    Each page maps to its digest and, if it contains lines repeated
+    elsewhere in the corpus, a layout of segments covering the whole page:
+    repeated lines carry their digest, the text between them carries None.
+    """
+
+    def __init__(
+        self,
+        text_content: Mapping[str, Mapping[int, str]],
+        forms: Iterable[str] = (),
+        min_chars: int = DEDUP_MIN_SEGMENT_CHARS,
+    ):
+        """Hash the (normalized) lines of every page in ``text_content``.
+
+        Args:
+            text_content: Corpus to index
+            forms: Normalizations applied before hashing, as for extraction
+            min_chars: Shorter lines are never deduplicated on their own
+
+        """
+        self.forms = canonical_forms(forms)
+        self._pages: dict[tuple[str, int], tuple[bytes, list[Segment] | None]] = {}
+
+        line_counts: Counter[bytes] = Counter()
+        scanned: dict[tuple[str, int], tuple[bytes, int, list[Segment]]] = {}
+        for filename, pages in text_content.items():
+            for page_num, text in pages.items():
+                text = normalization_cache.normalize(text, self.forms)
+                lines = []
+                pos = 0
+                while pos < len(text):
+                    newline = text.find("\n", pos)
+                    end = len(text) if newline < 0 else newline + 1
+                    if end - pos >= min_chars:
+                        digest = page_digest(text[pos:end])
+                        lines.append((pos, end, digest))
+                        line_counts[digest] += 1
+                    pos = end
+                scanned[(filename, int(page_num))] = (page_digest(text), pos, lines)
+
+        self.total_chars = 0
+        self.unique_chars = 0
+        seen_pages: set[bytes] = set()
+        seen_lines: set[bytes] = set()
+        for key, (digest, length, lines) in scanned.items():
+            layout: list[Segment] = []
+            pos = 0
+            for start, end, line_digest in lines:
+                if line_counts[line_digest] < 2:
+                    continue
+                if start > pos:
+                    layout.append((pos, start, None))
+                layout.append((start, end, line_digest))
+                pos = end
+            if layout and pos < length:
+                layout.append((pos, length, None))
+            self._pages[key] = (digest, layout or None)
+
+            self.total_chars += length
+            if digest in seen_pages:
+                continue
+            seen_pages.add(digest)
+            for start, end, line_digest in layout or [(0, length, None)]:
+                if line_digest is None or line_digest not in seen_lines:
+                    self.unique_chars += end - start
+                if line_digest is not None:
+                    seen_lines.add(line_digest)
+
+        logger.info(
+            "Indexed %d pages: %d of %d chars unique",
+            len(self._pages),
+            self.unique_chars,
+            self.total_chars,
+        )
+
+    def page(self, filename: str, page_num: int) -> tuple[bytes, list[Segment] | None]:
+        """Return a page's digest and segment layout.
+
+        Raises:
+            KeyError: If the page was not in the indexed corpus
+
+        """
+        return self._pages[(filename, int(page_num))]
@@ -18,9 +18,11 @@ def build_dataframe(
         include_context: Whether to include the context column
 
     Returns:
-        Pandas DataFrame with match data
+        Pandas DataFrame with match data; an "Edit Distance" column is added
+        when the matches come from fuzzy matching
 
     """
+    with_distance = any(match.edit_distance is not None for match in matches)
     data = []
     for match in matches:
         row = {
@@ -30,6 +32,8 @@ def build_dataframe(
             "Page": match.page,
             "Match Found": match.match_found,
         }
+        if with_distance:
+            row["Edit Distance"] = match.edit_distance
         if include_context:
             row["Context (± 20 chars)"] = match.context
         data.append(row)
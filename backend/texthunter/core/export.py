@@ -0,0 +1,355 @@
+"""Partitioned, parallel Excel export for large result sets.
+
+``generate_excel`` writes every match to one sheet in one process, which
+fails past Excel's row limit. Here matches are split into parts first:
+
+- one per value of ``partition_by`` (source file, project or sheet number),
+  or a single part when not partitioning;
+- parts longer than a sheet holds are split into ``Name``, ``Name (2)``, ...
+
+Each part is written as a one-sheet workbook by a pool of worker processes,
+in openpyxl's write-only mode, so a worker holds the rows of one part rather
+than a workbook of cell objects. The parent then assembles the parts into a
+ZIP of workbooks, or into one workbook with a sheet per part. Merging copies
+each part's worksheet XML as it is: the parts are styled identically, so the
+first part's styles serve every sheet.
+"""
+
+import logging
+import multiprocessing
+import re
+import tempfile
+import zipfile
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+from xml.sax.saxutils import quoteattr
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+from texthunter.api.schemas import MatchResult
+from texthunter.config.settings import (
+    EXPORT_MAX_SHEET_ROWS,
+    EXPORT_PARALLEL_MIN_ROWS,
+    EXPORT_WORKERS,
+)
+from texthunter.core.excel import generate_excel
+
+logger = logging.getLogger(__name__)
+
+EXPORT_OUTPUTS = ("xlsx", "zip")
+
+# Characters Excel forbids in sheet names, plus those Windows forbids in
+# filenames (part names also name the workbooks of a ZIP export)
+_INVALID_NAME_CHARS = re.compile(r'[\[\]:*?/\\<>|"\x00-\x1f]')
+_MAX_SHEET_NAME = 31
+
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_SHEET_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+
+
+@dataclass
+class ExportPart:
+    """Rows written to one sheet (and, in ZIP exports, one workbook)."""
+
+    name: str
+    columns: list[str]
+    rows: list[tuple]
+
+
+def export_columns(matches: list[MatchResult], include_context: bool) -> list[str]:
+    """Return the column headers of an export, as ``build_dataframe`` has them."""
+    columns = ["Source File", "Project ID", "Sheet No", "Page", "Match Found"]
+    if any(match.edit_distance is not None for match in matches):
+        columns.append("Edit Distance")
+    if include_context:
+        columns.append("Context (± 20 chars)")
+    return columns
+
+
+def _row(match: MatchResult, with_distance: bool, include_context: bool) -> tuple:
+    row: tuple = (
+        match.source_file,
+        match.project_id or "",
+        match.sheet_no or "",
+        match.page,
+        match.match_found,
+    )
+    if with_distance:
+        row += (match.edit_distance,)
+    if include_context:
+        row += (match.context,)
+    return row
+
+
+def part_name(value: str, taken: set[str]) -> str:
+    """Return a unique sheet name for ``value``, recording it in ``taken``.
+
+    Forbidden characters become ``_``; names are cut to Excel's 31
+    characters and de-duplicated (case-insensitively) with `` (2)``, ...
+    """
+    base = _INVALID_NAME_CHARS.sub("_", value).strip().strip("'") or "(blank)"
+    name = base[:_MAX_SHEET_NAME]
+    suffix = 1
+    while name.casefold() in taken:
+        suffix += 1
+        tail = f" ({suffix})"
+        name = base[: _MAX_SHEET_NAME - len(tail)] + tail
+    taken.add(name.casefold())
+    return name
+
+
+def plan_parts(
+    matches: list[MatchResult],
+    partition_by: str | None = None,
+    include_context: bool = True,
+    max_rows: int | None = None,
+) -> list[ExportPart]:
+    """Split matches into parts of at most ``max_rows`` rows, header included.
+
+    Args:
+        matches: Matches in export order
+        partition_by: ``MatchResult`` field giving one part per value
+            (``source_file``, ``project_id`` or ``sheet_no``), or None
+        include_context: Whether to include the context column
+        max_rows: Rows per sheet; defaults to ``EXPORT_MAX_SHEET_ROWS``
+
+    Raises:
+        ValueError: If ``max_rows`` leaves no room below the header
+
+    """
+    max_rows = max_rows or EXPORT_MAX_SHEET_ROWS
+    if max_rows < 2:
+        raise ValueError("A sheet must hold at least one row below the header")
+    columns = export_columns(matches, include_context)
+    with_distance = "Edit Distance" in columns
+
+    groups: dict[str, list[tuple]] = {}
+    for match in matches:
+        key = "Extraction Results"
+        if partition_by is not None:
+            key = getattr(match, partition_by) or "(none)"
+        groups.setdefault(key, []).append(_row(match, with_distance, include_context))
+
+    per_sheet = max_rows - 1
+    taken: set[str] = set()
+    parts = []
+    for key, rows in groups.items():
+        for start in range(0, len(rows), per_sheet):
+            label = key if start == 0 else f"{key} ({start // per_sheet + 1})"
+            parts.append(
+                ExportPart(
+                    name=part_name(label, taken),
+                    columns=columns,
+                    rows=rows[start : start + per_sheet],
+                )
+            )
+    return parts
+
+
+def write_part(part: ExportPart, path: str) -> str:
+    """Write one part as a styled one-sheet workbook; return ``path``.
+
+    Runs in export worker processes.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(part.name)
+    sheet.freeze_panes = "A2"
+
+    # Same column widths as generate_excel: longest value plus padding, capped
+    widths = [len(column) for column in part.columns]
+    for row in part.rows:
+        for i, value in enumerate(row):
+            if value:
+                widths[i] = max(widths[i], len(str(value)))
+    for i, width in enumerate(widths, start=1):
+        sheet.column_dimensions[get_column_letter(i)].width = min(width + 2, 50)
+
+    fill = PatternFill(start_color="1F4E79", end_color="1F4E79", fill_type="solid")
+    font = Font(color="FFFFFF", bold=True)
+    alignment = Alignment(horizontal="center", vertical="center")
+    header = []
+    for column in part.columns:
+        cell = WriteOnlyCell(sheet, value=column)
+        cell.fill = fill
+        cell.font = font
+        cell.alignment = alignment
+        header.append(cell)
+    sheet.append(header)
+    for row in part.rows:
+        sheet.append(row)
+
+    workbook.save(path)
+    return path
+
+
+def _write_parts(
+    parts: list[ExportPart],
+    directory: Path,
+    workers: int,
+    progress_callback: Callable[[int, int], None] | None = None,
+) -> list[str]:
+    """Write every part to ``directory``, in parallel for large exports."""
+    paths = [str(directory / f"part-{i}.xlsx") for i in range(len(parts))]
+    workers = min(workers, len(parts))
+    if workers > 1 and sum(len(p.rows) for p in parts) >= EXPORT_PARALLEL_MIN_ROWS:
+        # Spawned, not forked: the server process runs threads
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [
+                pool.submit(write_part, part, path)
+                for part, path in zip(parts, paths, strict=True)
+            ]
+            for done, _ in enumerate(as_completed(futures), start=1):
+                if progress_callback is not None:
+                    progress_callback(done, len(parts))
+            return [future.result() for future in futures]
+    for done, (part, path) in enumerate(zip(parts, paths, strict=True), start=1):
+        write_part(part, path)
+        if progress_callback is not None:
+            progress_callback(done, len(parts))
+    return paths
+
+
+def _merge_workbooks(names: list[str], paths: list[str], out: BinaryIO) -> None:
+    """Write one workbook holding the single sheet of each part workbook."""
+    sheets = "".join(
+        f'<sheet name={quoteattr(name)} sheetId="{i}" r:id="rId{i}"/>'
+        for i, name in enumerate(names, start=1)
+    )
+    workbook_xml = (
+        f'<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}">'
+        '<bookViews><workbookView activeTab="0"/></bookViews>'
+        f"<sheets>{sheets}</sheets></workbook>"
+    )
+    count = len(names)
+    rels = "".join(
+        f'<Relationship Id="rId{i}" Type="{_REL_NS}/worksheet" '
+        f'Target="worksheets/sheet{i}.xml"/>'
+        for i in range(1, count + 1)
+    )
+    rels += (
+        f'<Relationship Id="rId{count + 1}" Type="{_REL_NS}/styles" '
+        'Target="styles.xml"/>'
+        f'<Relationship Id="rId{count + 2}" Type="{_REL_NS}/theme" '
+        'Target="theme/theme1.xml"/>'
+    )
+    overrides = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+        f'ContentType="{_SHEET_TYPE}.worksheet+xml"/>'
+        for i in range(1, count + 1)
+    )
+    content_types = (
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" '
+        'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        f'ContentType="{_SHEET_TYPE}.sheet.main+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        f'ContentType="{_SHEET_TYPE}.styles+xml"/>'
+        '<Override PartName="/xl/theme/theme1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.theme+xml"/>'
+        '<Override PartName="/docProps/core.xml" '
+        'ContentType="application/vnd.openxmlformats-package.core-properties+xml"/>'
+        f"{overrides}</Types>"
+    )
+    root_rels = (
+        f'<Relationships xmlns="{_PKG_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        f'<Relationship Id="rId2" Type="{_PKG_REL_NS}/metadata/core-properties" '
+        'Target="docProps/core.xml"/></Relationships>'
+    )
+
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as merged:
+        merged.writestr("[Content_Types].xml", content_types)
+        merged.writestr("_rels/.rels", root_rels)
+        merged.writestr("xl/workbook.xml", workbook_xml)
+        merged.writestr(
+            "xl/_rels/workbook.xml.rels",
+            f'<Relationships xmlns="{_PKG_REL_NS}">{rels}</Relationships>',
+        )
+        with zipfile.ZipFile(paths[0]) as first:
+            for item in ("xl/styles.xml", "xl/theme/theme1.xml", "docProps/core.xml"):
+                merged.writestr(item, first.read(item))
+        for i, path in enumerate(paths, start=1):
+            with (
+                zipfile.ZipFile(path) as part,
+                part.open("xl/worksheets/sheet1.xml") as source,
+                merged.open(f"xl/worksheets/sheet{i}.xml", "w") as target,
+            ):
+                while chunk := source.read(1024 * 1024):
+                    target.write(chunk)
+
+
+def export_matches(
+    matches: list[MatchResult],
+    partition_by: str | None = None,
+    output: str = "xlsx",
+    include_context: bool = True,
+    workers: int | None = None,
+    progress_callback: Callable[[int, int], None] | None = None,
+) -> BinaryIO:
+    """Export matches to one workbook or a ZIP of workbooks.
+
+    A single-sheet workbook export is written by ``generate_excel`` as
+    before; anything larger is partitioned and written in parallel.
+
+    Args:
+        matches: Matches to export
+        partition_by: ``MatchResult`` field giving a sheet (or workbook) per
+            value, or None to split only at the row limit
+        output: ``xlsx`` for one workbook, ``zip`` for one workbook per part
+        include_context: Whether to include the context column
+        workers: Worker processes; defaults to ``EXPORT_WORKERS``
+        progress_callback: Optional callable invoked as parts are written
+            with (parts done, total parts)
+
+    Returns:
+        Readable file positioned at the start of the export
+
+    Raises:
+        ValueError: For an unknown ``output``
+
+    """
+    if output not in EXPORT_OUTPUTS:
+        raise ValueError(f"Unknown export output: {output}")
+    parts = plan_parts(matches, partition_by, include_context)
+    if output == "xlsx" and len(parts) == 1:
+        excel = generate_excel(matches, include_context)
+        if progress_callback is not None:
+            progress_callback(1, 1)
+        return excel
+
+    out = tempfile.TemporaryFile()
+    with tempfile.TemporaryDirectory(prefix="texthunter-export-") as directory:
+        paths = _write_parts(
+            parts, Path(directory), workers or EXPORT_WORKERS, progress_callback
+        )
+        if output == "zip":
+            # Workbooks are compressed already
+            with zipfile.ZipFile(out, "w", zipfile.ZIP_STORED) as bundle:
+                for part, path in zip(parts, paths, strict=True):
+                    bundle.write(path, f"{part.name}.xlsx")
+        else:
+            _merge_workbooks([part.name for part in parts], paths, out)
+    logger.info(
+        "Exported %d matches as %d parts (%s)", len(matches), len(parts), output
+    )
+    out.seek(0)
+    return out
+
+
+def iter_file(file: BinaryIO, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """Yield a file's contents in chunks, closing it at the end."""
+    with file:
+        while chunk := file.read(chunk_size):
+            yield chunk
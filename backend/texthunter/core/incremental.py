@@ -0,0 +1,198 @@
+"""Incremental re-extraction of stored corpora from earlier revisions.
+
+A new revision of a drawing set changes a few dozen of its thousands of
+files. The first run of a query on a corpus is a plain scan whose matches go
+to the result cache, and the store records which corpora each query was
+cached for. Running the query on a corpus it was not cached for looks for
+the recorded revision sharing the most files with it: its cached matches
+are split by file into fragments keyed on file digest, so only files whose
+content is new are scanned. Nothing is written per file; fragments exist
+only while a query runs.
+
+Comparing two revisions works on the same fragments. Files whose digests
+agree are unchanged and never loaded; for the others the matches before and
+after are compared as multisets, giving the matches each file gained and lost.
+"""
+
+import logging
+from collections import Counter
+from collections.abc import Callable, Iterable, Mapping
+
+from texthunter.api.schemas import ExtractionDiff, FileDiff, MatchResult
+from texthunter.core.store import CorpusStore, MappedCorpus, corpus_store
+
+logger = logging.getLogger(__name__)
+
+# Runs the query on a corpus, or on a subset of one as a plain dict
+Scan = Callable[[Mapping[str, Mapping[int, str]]], Iterable[MatchResult]]
+
+
+def cached_fragments(
+    corpus: MappedCorpus, query_key: str, store: CorpusStore = corpus_store
+) -> dict[str, list[MatchResult]]:
+    """Return a query's cached matches per file digest for a corpus's files.
+
+    They come from the revision in the query's history sharing the most
+    files with ``corpus`` whose results are still cached; empty if none is.
+    """
+    digests = {corpus.file_digest(name) for name in corpus}
+    candidates = []
+    for corpus_id, result_key in store.revisions(query_key):
+        try:
+            revision = store.get(corpus_id)
+        except KeyError:
+            continue
+        shared = digests.intersection(map(revision.file_digest, revision))
+        if shared:
+            candidates.append((len(shared), corpus_id, revision, result_key))
+
+    for _, corpus_id, revision, result_key in sorted(
+        candidates, key=lambda candidate: candidate[0], reverse=True
+    ):
+        matches = store.get_results(result_key)
+        if matches is None:
+            continue
+        fragments: dict[str, list[MatchResult]] = {
+            digest: [] for digest in map(revision.file_digest, revision)
+        }
+        for match in matches:
+            fragments[revision.file_digest(match.source_file)].append(match)
+        logger.debug("Reusing matches of revision %s", corpus_id)
+        return {digest: fragments[digest] for digest in digests & fragments.keys()}
+    return {}
+
+
+def file_matches(
+    corpus: MappedCorpus,
+    scan: Scan,
+    fragments: Mapping[str, list[MatchResult]],
+    filenames: Iterable[str] | None = None,
+) -> tuple[dict[str, list[MatchResult]], list[str]]:
+    """Return the matches of each file, scanning only files without a fragment.
+
+    Args:
+        corpus: Stored corpus to extract from
+        scan: Runs the query; given the whole corpus when no file is cached,
+            so it can use the corpus-wide line index
+        fragments: Matches by file digest, from ``cached_fragments``
+        filenames: Files to return, in order; all files if None
+
+    Returns:
+        Matches by filename, and the filenames that were scanned
+
+    """
+    names = list(corpus if filenames is None else filenames)
+    digests = {name: corpus.file_digest(name) for name in names}
+    stale = [name for name in names if digests[name] not in fragments]
+
+    scanned: dict[str, list[MatchResult]] = {name: [] for name in stale}
+    if stale:
+        subset = corpus if len(stale) == len(corpus) else {n: corpus[n] for n in stale}
+        for match in scan(subset):
+            scanned[match.source_file].append(match)
+
+    logger.info(
+        "Extracted %d files: %d from an earlier revision, %d scanned",
+        len(names),
+        len(names) - len(stale),
+        len(stale),
+    )
+    matches = {
+        name: scanned[name] if name in scanned else fragments[digests[name]]
+        for name in names
+    }
+    return matches, stale
+
+
+def extract_revision(
+    corpus: MappedCorpus, query_key: str, scan: Scan, store: CorpusStore = corpus_store
+) -> list[MatchResult]:
+    """Return a query's matches on a corpus, reusing an earlier revision's.
+
+    Without a cached revision sharing files this is a plain ``scan``.
+    """
+    fragments = cached_fragments(corpus, query_key, store)
+    if not fragments:
+        return list(scan(corpus))
+    by_file, _ = file_matches(corpus, scan, fragments)
+    return [match for matches in by_file.values() for match in matches]
+
+
+def _match_key(match: MatchResult) -> tuple:
+    # Not the context: editing a neighbouring tag would move a match
+    return (match.page, match.match_found, match.edit_distance)
+
+
+def diff_matches(
+    before: list[MatchResult], after: list[MatchResult]
+) -> tuple[list[MatchResult], list[MatchResult]]:
+    """Return the matches only in ``after`` and only in ``before``.
+
+    Matches compare by page, text and edit distance, counting repeats: a
+    tag found twice before and once after is removed once.
+    """
+    counts = Counter(map(_match_key, before))
+    added = []
+    for match in after:
+        key = _match_key(match)
+        if counts[key]:
+            counts[key] -= 1
+        else:
+            added.append(match)
+    counts = Counter(map(_match_key, after))
+    removed = []
+    for match in before:
+        key = _match_key(match)
+        if counts[key]:
+            counts[key] -= 1
+        else:
+            removed.append(match)
+    return added, removed
+
+
+def diff_revisions(
+    previous: MappedCorpus,
+    current: MappedCorpus,
+    query_key: str,
+    scan: Scan,
+    store: CorpusStore = corpus_store,
+) -> ExtractionDiff:
+    """Compare a query's matches, file by file, between two corpus revisions.
+
+    Files are paired by name. Only files added, removed or changed are
+    extracted, each from a cached revision or by ``scan``.
+    """
+    before_digests = {name: previous.file_digest(name) for name in previous}
+    after_digests = {name: current.file_digest(name) for name in current}
+    changed = [
+        name
+        for name, digest in after_digests.items()
+        if before_digests.get(name, digest) != digest
+    ]
+    added = [name for name in after_digests if name not in before_digests]
+    removed = [name for name in before_digests if name not in after_digests]
+
+    before, scanned_before = file_matches(
+        previous, scan, cached_fragments(previous, query_key, store), changed + removed
+    )
+    after, scanned_after = file_matches(
+        current, scan, cached_fragments(current, query_key, store), changed + added
+    )
+
+    files = []
+    for name in current:
+        if name in before_digests and name not in before:
+            continue  # unchanged
+        gained, lost = diff_matches(before.get(name, []), after[name])
+        status = "changed" if name in before else "added"
+        files.append(FileDiff(filename=name, status=status, added=gained, removed=lost))
+    for name in removed:
+        files.append(FileDiff(filename=name, status="removed", removed=before[name]))
+
+    return ExtractionDiff(
+        files=files,
+        unchanged_files=len(after_digests) - len(changed) - len(added),
+        scanned_files=len(scanned_before) + len(scanned_after),
+        added_count=sum(len(diff.added) for diff in files),
+        removed_count=sum(len(diff.removed) for diff in files),
+    )
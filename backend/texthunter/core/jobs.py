@@ -0,0 +1,428 @@
+"""Background jobs for long-running extractions and exports.
+
+Large ``/extract-all`` and ``/export`` calls outlast proxy and client
+timeouts as single requests. Submitted as jobs, they return a job ID at
+once and run on a bounded pool of worker threads:
+
+- A job's state and progress (files and pages done, matches, ETA) are
+  written to ``<store>/jobs/<job_id>/job.json`` as it runs, so any worker
+  process can answer a poll and clients can disconnect and come back.
+- Large inputs (inline export matches) are spooled to the same directory
+  when the job is submitted, so a queued job holds no request data in
+  memory.
+- Its artifact (the extraction response as JSON, or the export workbook
+  or ZIP) is written to the same directory in chunks and streamed from
+  disk; once a job finishes, only its metadata stays in memory.
+- Cancelling leaves a ``cancel`` marker in the job directory, which the
+  process running the job notices at its next progress update.
+- Jobs are removed ``JOB_RETENTION_SECONDS`` after their last update.
+"""
+
+import bisect
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
+from pathlib import Path
+from typing import BinaryIO
+
+from texthunter.api.schemas import JobInfo
+from texthunter.config.settings import (
+    JOB_MAX_QUEUED,
+    JOB_PROGRESS_INTERVAL,
+    JOB_RETENTION_SECONDS,
+    JOB_WORKERS,
+    STORE_DIR,
+)
+from texthunter.core.cancellation import CancellationToken, ExtractionCancelled
+
+logger = logging.getLogger(__name__)
+
+FINISHED = ("succeeded", "failed", "cancelled")
+_STATE_FILE = "job.json"
+_CANCEL_FILE = "cancel"
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is full."""
+
+
+class Job:
+    """A background job: its state, progress counters and spool directory.
+
+    Progress is reported from the job's worker thread and read from any
+    thread; the state file is rewritten at most every
+    ``JOB_PROGRESS_INTERVAL`` seconds while the job runs.
+    """
+
+    def __init__(self, job_id: str, kind: str, directory: Path):
+        """Create a queued job spooling to ``directory``."""
+        self.directory = directory
+        self.token = CancellationToken(job_id)
+        self._info = JobInfo(
+            job_id=job_id, kind=kind, status="queued", created_at=time.time()
+        )
+        self._lock = threading.Lock()
+        self._started: float | None = None
+        self._saved_at = 0.0
+        # Pages already done when the scan started, and cumulative page
+        # counts of the files it covers
+        self._scan_started: float | None = None
+        self._scan_base = (0, 0)
+        self._file_ends: list[int] = []
+
+    @property
+    def job_id(self) -> str:
+        """The job's ID."""
+        return self._info.job_id
+
+    @property
+    def finished(self) -> bool:
+        """Whether the job has succeeded, failed or been cancelled."""
+        return self._info.status in FINISHED
+
+    def info(self) -> JobInfo:
+        """Return a snapshot of the job's state, with elapsed time and ETA."""
+        with self._lock:
+            info = self._info.model_copy()
+            if info.status == "running" and self._started is not None:
+                info.elapsed_seconds = time.monotonic() - self._started
+                info.eta_seconds = self._eta()
+        return info
+
+    def _eta(self) -> float | None:
+        info = self._info
+        if self._scan_started is not None and info.pages_done > self._scan_base[1]:
+            scanned = info.pages_done - self._scan_base[1]
+            rate = scanned / (time.monotonic() - self._scan_started)
+            return (info.pages_total - info.pages_done) / rate
+        if self._started is not None and info.parts_done:
+            rate = info.parts_done / (time.monotonic() - self._started)
+            return (info.parts_total - info.parts_done) / rate
+        return None
+
+    def save(self) -> None:
+        """Write the job's state file."""
+        path = self.directory / _STATE_FILE
+        tmp = path.with_name(f"{_STATE_FILE}.{threading.get_ident()}.tmp")
+        try:
+            tmp.write_text(self.info().model_dump_json(), encoding="utf-8")
+            os.replace(tmp, path)
+        except FileNotFoundError:
+            logger.debug("Job %s was deleted while running", self.job_id)
+
+    def start(self) -> None:
+        """Mark the job running, unless it was cancelled while queued.
+
+        Raises:
+            ExtractionCancelled: If the job was cancelled
+
+        """
+        self._check_cancelled()
+        with self._lock:
+            self._info.status = "running"
+            self._started = time.monotonic()
+        self.save()
+
+    def begin(
+        self,
+        files_total: int = 0,
+        pages_total: int = 0,
+        parts_total: int = 0,
+        matches: int = 0,
+    ) -> None:
+        """Record the size of the work ahead."""
+        with self._lock:
+            self._info.files_total = files_total
+            self._info.pages_total = pages_total
+            self._info.parts_total = parts_total
+            self._info.matches = matches
+        self.save()
+
+    def track_scan(self, page_counts: Iterable[int]) -> None:
+        """Start counting a scan of files with these page counts.
+
+        Files left out of the scan (answered from a cache) count as done.
+        """
+        ends = list(accumulate(page_counts))
+        with self._lock:
+            info = self._info
+            info.files_done = info.files_total - len(ends)
+            info.pages_done = info.pages_total - (ends[-1] if ends else 0)
+            self._scan_base = (info.files_done, info.pages_done)
+            self._file_ends = ends
+            self._scan_started = time.monotonic()
+        self._checkpoint()
+
+    def pages_scanned(self, pages_done: int, matches: int) -> None:
+        """Record scan progress (an ``extract_matches`` progress callback)."""
+        with self._lock:
+            files, pages = self._scan_base
+            self._info.files_done = files + bisect.bisect_right(
+                self._file_ends, pages_done
+            )
+            self._info.pages_done = pages + pages_done
+            self._info.matches = matches
+        self._checkpoint()
+
+    def parts_written(self, parts_done: int, parts_total: int) -> None:
+        """Record export progress (an ``export_matches`` progress callback)."""
+        with self._lock:
+            self._info.parts_done = parts_done
+            self._info.parts_total = parts_total
+        self._checkpoint()
+
+    def _checkpoint(self) -> None:
+        """Save progress and notice cancellation, at most every interval.
+
+        Raises:
+            ExtractionCancelled: If the job was cancelled
+
+        """
+        now = time.monotonic()
+        if now - self._saved_at >= JOB_PROGRESS_INTERVAL:
+            self._saved_at = now
+            self.save()
+            self._check_cancelled()
+        self.token.raise_if_cancelled()
+
+    def _check_cancelled(self) -> None:
+        if (self.directory / _CANCEL_FILE).exists():
+            self.token.cancel("cancelled by client")
+        self.token.raise_if_cancelled()
+
+    def write_artifact(
+        self, filename: str, media_type: str, data: bytes | BinaryIO | Iterable[bytes]
+    ) -> None:
+        """Spool the job's result to its directory for download.
+
+        ``data`` is the whole result, a file to copy or chunks to write.
+        """
+        with open(self.directory / filename, "wb") as out:
+            if isinstance(data, bytes):
+                out.write(data)
+            elif hasattr(data, "read"):
+                shutil.copyfileobj(data, out)
+            else:
+                out.writelines(data)
+        with self._lock:
+            self._info.artifact = filename
+            self._info.media_type = media_type
+
+    def set_result(self, result_id: str, matches: int) -> None:
+        """Record the result set a finished extraction can be browsed as."""
+        with self._lock:
+            self._info.result_id = result_id
+            self._info.matches = matches
+
+    def finish(self, status: str, detail: str | None = None) -> None:
+        """Mark the job finished and write its final state."""
+        with self._lock:
+            info = self._info
+            info.status = status
+            info.detail = detail
+            if self._started is not None:
+                info.elapsed_seconds = time.monotonic() - self._started
+            info.eta_seconds = None
+            if status == "succeeded":
+                info.files_done = info.files_total
+                info.pages_done = info.pages_total
+                info.parts_done = info.parts_total
+        self.save()
+        logger.info("Job %s %s", self.job_id, status)
+
+
+class JobManager:
+    """Run jobs on a bounded thread pool and track them on disk."""
+
+    def __init__(
+        self,
+        root: Path = STORE_DIR,
+        workers: int = JOB_WORKERS,
+        max_queued: int = JOB_MAX_QUEUED,
+        retention: float = JOB_RETENTION_SECONDS,
+    ):
+        """Create a manager keeping job directories under ``root``.
+
+        Args:
+            root: Store directory shared by all worker processes
+            workers: Jobs running at once in this process
+            max_queued: Jobs waiting before submissions are refused
+            retention: Seconds a job is kept after its last update
+
+        """
+        self.root = Path(root)
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retention = retention
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._pool: ThreadPoolExecutor | None = None
+
+    @property
+    def jobs_dir(self) -> Path:
+        """Directory holding a subdirectory per job."""
+        return self.root / "jobs"
+
+    def _directory(self, job_id: str) -> Path:
+        if not job_id.isalnum():
+            raise KeyError(job_id)
+        return self.jobs_dir / job_id
+
+    def submit(
+        self,
+        kind: str,
+        work: Callable[[Job], None],
+        inputs: Mapping[str, bytes] | None = None,
+    ) -> JobInfo:
+        """Queue ``work`` as a job and return its initial state.
+
+        ``inputs`` are written to the job's directory, by filename, before
+        the job is queued; ``work`` reads them back from ``job.directory``.
+
+        Raises:
+            JobQueueFull: If ``workers + max_queued`` jobs are unfinished
+
+        """
+        self.sweep()
+        with self._lock:
+            active = sum(not job.finished for job in self._jobs.values())
+            if active >= self.workers + self.max_queued:
+                raise JobQueueFull(f"{active} jobs are queued or running")
+            job_id = uuid.uuid4().hex
+            job = Job(job_id, kind, self._directory(job_id))
+            job.directory.mkdir(parents=True)
+            job.save()
+            self._jobs[job_id] = job
+        # Written outside the lock (and before queueing), as inputs can be large
+        try:
+            for filename, data in (inputs or {}).items():
+                (job.directory / filename).write_bytes(data)
+        except BaseException:
+            self.delete(job_id)
+            raise
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="texthunter-job"
+                )
+            self._pool.submit(self._run, job, work)
+        logger.info("Queued %s job %s", kind, job_id)
+        return job.info()
+
+    @staticmethod
+    def _run(job: Job, work: Callable[[Job], None]) -> None:
+        try:
+            job.start()
+            work(job)
+        except ExtractionCancelled as e:
+            job.finish("cancelled", str(e))
+        except Exception as e:  # reported through the job, not raised
+            logger.exception("Job %s failed", job.job_id)
+            job.finish("failed", str(e))
+        else:
+            job.finish("succeeded")
+
+    def get(self, job_id: str) -> JobInfo:
+        """Return a job's state, from memory or from its state file.
+
+        Raises:
+            KeyError: If no such job exists
+
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job.info()
+        try:
+            data = (self._directory(job_id) / _STATE_FILE).read_text(encoding="utf-8")
+        except FileNotFoundError as e:
+            raise KeyError(job_id) from e
+        return JobInfo.model_validate_json(data)
+
+    def artifact_path(self, job_id: str) -> tuple[Path, JobInfo]:
+        """Return the path of a finished job's artifact and its state.
+
+        Raises:
+            KeyError: If no such job exists
+            ValueError: If the job has not produced an artifact (yet)
+
+        """
+        info = self.get(job_id)
+        if info.status != "succeeded" or info.artifact is None:
+            raise ValueError(f"Job {job_id} has no artifact (status: {info.status})")
+        return self._directory(job_id) / info.artifact, info
+
+    def cancel(self, job_id: str) -> JobInfo:
+        """Request cancellation of a queued or running job.
+
+        Raises:
+            KeyError: If no such job exists
+
+        """
+        info = self.get(job_id)
+        if info.status in FINISHED:
+            return info
+        (self._directory(job_id) / _CANCEL_FILE).touch()
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            job.token.cancel("cancelled by client")
+        return self.get(job_id)
+
+    def delete(self, job_id: str) -> bool:
+        """Cancel a job if needed and remove it with its artifact.
+
+        Returns False if the job did not exist.
+        """
+        try:
+            self.cancel(job_id)
+        except KeyError:
+            return False
+        with self._lock:
+            self._jobs.pop(job_id, None)
+        shutil.rmtree(self._directory(job_id), ignore_errors=True)
+        return True
+
+    def sweep(self) -> None:
+        """Remove jobs whose state has not changed for ``retention`` seconds.
+
+        Jobs still running in this process are kept; stale unfinished jobs
+        of other (exited) processes are removed like finished ones.
+        """
+        if not self.jobs_dir.exists():
+            return
+        cutoff = time.time() - self.retention
+        with self._lock:
+            active = {job_id for job_id, job in self._jobs.items() if not job.finished}
+        for directory in self.jobs_dir.iterdir():
+            if directory.name in active:
+                continue
+            try:
+                updated = (directory / _STATE_FILE).stat().st_mtime
+            except FileNotFoundError:
+                continue  # being created or removed
+            if updated < cutoff:
+                shutil.rmtree(directory, ignore_errors=True)
+                with self._lock:
+                    self._jobs.pop(directory.name, None)
+                logger.debug("Removed expired job %s", directory.name)
+
+    def snapshot(self) -> dict:
+        """Return counts of this process's queued and running jobs."""
+        with self._lock:
+            statuses = [job.info().status for job in self._jobs.values()]
+        return {
+            "queued": statuses.count("queued"),
+            "running": statuses.count("running"),
+            "workers": self.workers,
+            "max_queued": self.max_queued,
+        }
+
+
+job_manager = JobManager()
@@ -0,0 +1,140 @@
+"""Live-search sessions for regex-as-you-type.
+
+A session holds one corpus (and its line dedup index) for as long as the
+client is connected, and remembers which pages matched the last completed
+query. When the next pattern is a refinement of it (see
+``analyzer.is_refinement``), only those pages are scanned again.
+"""
+
+import logging
+import time
+from collections.abc import Iterable, Mapping
+
+from texthunter.api.schemas import LiveSearchUpdate, MatchResult
+from texthunter.core.analyzer import is_refinement
+from texthunter.core.cancellation import CancellationToken
+from texthunter.core.dedup import SegmentIndex
+from texthunter.core.regex import extract_matches
+from texthunter.core.store import MappedCorpus
+
+logger = logging.getLogger(__name__)
+
+PageRef = tuple[str, int]
+
+
+class LiveQuery:
+    """State of one query, updated by the scanning thread as it runs."""
+
+    def __init__(
+        self, keyword_regex: str, candidates: list[PageRef] | None, pages_total: int
+    ):
+        """Prepare a query over ``candidates`` (None for the whole corpus)."""
+        self.keyword_regex = keyword_regex
+        self.candidates = candidates
+        self.pages_total = pages_total
+        self.pages_done = 0
+        self.total_count = 0
+        self.hits: list[MatchResult] = []
+        self.matched_pages: dict[PageRef, None] = {}
+        self.done = False
+        self.started = time.perf_counter()
+
+    @property
+    def refined(self) -> bool:
+        """Whether only a previous query's candidate pages are scanned."""
+        return self.candidates is not None
+
+    def update(self) -> LiveSearchUpdate:
+        """Return a snapshot for sending to the client."""
+        return LiveSearchUpdate(
+            type="done" if self.done else "progress",
+            keyword_regex=self.keyword_regex,
+            pages_done=self.pages_done,
+            pages_total=self.pages_total,
+            total_count=self.total_count,
+            hits=list(self.hits),
+            refined=self.refined,
+        )
+
+
+class LiveSearchSession:
+    """A corpus kept hot for a sequence of live queries."""
+
+    def __init__(
+        self,
+        text_content: Mapping[str, Mapping[int, str]],
+        file_identifier_regex: str | None = None,
+        normalize: Iterable[str] = (),
+        max_hits: int = 10,
+    ):
+        """Open a session; builds the corpus' line dedup index once."""
+        self.text_content = text_content
+        self.file_identifier_regex = file_identifier_regex
+        self.normalize = list(normalize)
+        self.max_hits = max_hits
+        if isinstance(text_content, MappedCorpus):
+            self.segments = text_content.segment_index(self.normalize)
+        else:
+            self.segments = SegmentIndex(text_content, self.normalize)
+        self.page_count = sum(len(pages) for pages in text_content.values())
+        self._last: LiveQuery | None = None
+
+    def start(self, keyword_regex: str) -> LiveQuery:
+        """Plan a query, narrowing it to the last query's pages if possible."""
+        last = self._last
+        if last is not None and last.keyword_regex == keyword_regex:
+            return last
+        if last is not None and is_refinement(last.keyword_regex, keyword_regex):
+            candidates = list(last.matched_pages)
+            return LiveQuery(keyword_regex, candidates, len(candidates))
+        return LiveQuery(keyword_regex, None, self.page_count)
+
+    def run(
+        self, query: LiveQuery, cancel_token: CancellationToken | None = None
+    ) -> LiveQuery:
+        """Scan a planned query, filling it in as pages complete.
+
+        Raises:
+            ValueError: If the regex is invalid
+            ExtractionCancelled: If ``cancel_token`` is cancelled mid-run
+
+        """
+        if query.done:
+            return query
+
+        corpus = self.text_content
+        if query.candidates is not None:
+            subset: dict[str, dict[int, str]] = {}
+            for filename, page_num in query.candidates:
+                subset.setdefault(filename, {})[page_num] = corpus[filename][page_num]
+            corpus = subset
+
+        def on_page(pages_done: int, _matches: int) -> None:
+            query.pages_done = pages_done
+
+        for match in extract_matches(
+            corpus,
+            query.keyword_regex,
+            self.file_identifier_regex,
+            cancel_token=cancel_token,
+            normalize=self.normalize,
+            segments=self.segments,
+            progress_callback=on_page,
+        ):
+            query.total_count += 1
+            if len(query.hits) < self.max_hits:
+                query.hits.append(match)
+            query.matched_pages[(match.source_file, match.page)] = None
+
+        query.done = True
+        self._last = query
+        logger.info(
+            "Live query %r: %d matches on %d/%d pages in %.3fs (refined=%s)",
+            query.keyword_regex,
+            query.total_count,
+            query.pages_done,
+            self.page_count,
+            time.perf_counter() - query.started,
+            query.refined,
+        )
+        return query
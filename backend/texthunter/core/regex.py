@@ -1,41 +1,100 @@
 """Core regex processing logic for text extraction and pattern generation."""
 
+import bisect
 import logging
 import re
-from collections.abc import Iterator
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from functools import lru_cache
 
 from grex import RegExpBuilder
 
-from texthunter.api.schemas import MatchResult
+from texthunter.api.schemas import MatchResult, ScanThroughput
+from texthunter.config.settings import (
+    FUZZY_MAX_EDITS,
+    FUZZY_MIN_PIECE_CHARS,
+    GREX_MAX_EXAMPLES,
+    GUESS_REGEX_CACHE_SIZE,
+    GUESS_REGEX_MAX_CLUSTERS,
+    SCAN_SAMPLE_BYTES,
+    SLOW_SCAN_MB_PER_SECOND,
+)
+from texthunter.core.analyzer import is_bytes_safe, is_segment_safe, literal_text
+from texthunter.core.cancellation import CancellationToken
+from texthunter.core.dedup import (
+    Segment,
+    SegmentIndex,
+    canonical_forms,
+    normalization_cache,
+    normalize_text,
+    page_digest,
+)
+from texthunter.core.store import MappedPages
+from texthunter.core.terms import TermDictionary
 
 logger = logging.getLogger(__name__)
 
+# (start, end, matched text, edit distance or None for regex matches)
+Span = tuple[int, int, str, int | None]
+
 
 def extract_matches(
     text_content: dict[str, dict[int, str]],
     keyword_regex: str,
     file_identifier_regex: str | None = None,
     context_chars: int = 20,
+    cancel_token: CancellationToken | None = None,
+    normalize: Iterable[str] = (),
+    segments: SegmentIndex | None = None,
+    progress_callback: Callable[[int, int], None] | None = None,
+    fuzzy_terms: Iterable[str] = (),
+    max_edits: int = 0,
+    term_dictionary: TermDictionary | None = None,
 ) -> Iterator[MatchResult]:
     """Apply keyword regex to text content and yield match results.
 
+    Identical pages are scanned once and their matches reused. With a
+    ``segments`` index, lines repeated across the corpus are also scanned
+    once when the pattern cannot span lines.
+
+    Files of a ``MappedCorpus`` are otherwise scanned as UTF-8 bytes, in
+    place in the mapping, whenever that finds the same matches (see
+    ``bytes_pattern``); only the context of each match is decoded.
+
+    Given ``fuzzy_terms`` or ``max_edits``, matching is approximate instead
+    (see ``FuzzyMatcher``): matches are substrings within ``max_edits``
+    edits of a term and carry their ``edit_distance``. Without terms,
+    ``keyword_regex`` must be a plain literal and is used as the term.
+    Given a ``term_dictionary``, its literal terms are looked up in one
+    pass per page instead.
+
     Args:
         text_content: Map of filename -> {page_number: text_content}
         keyword_regex: Regex pattern to find matches
         file_identifier_regex: Optional regex to extract metadata from filenames
         context_chars: Number of characters to include around match
+        cancel_token: Optional token checked before each page
+        normalize: Normalizations applied to page text before matching
+            (see ``dedup.NORMALIZATIONS``); matches and context come from
+            the normalized text
+        segments: Optional line-level dedup index of ``text_content``, built
+            with the same normalizations
+        progress_callback: Optional callable invoked after each page with
+            (pages done, matches found so far)
+        fuzzy_terms: Tags to match approximately; ``keyword_regex`` is then
+            not used
+        max_edits: Edits (insertions, deletions, substitutions) allowed per
+            fuzzy match
+        term_dictionary: Compiled literal terms to look up; ``keyword_regex``
+            is then not used
 
     Yields:
         MatchResult objects for each match found
 
-    """
-    logger.debug("Compiling keyword regex: %s", keyword_regex)
-    try:
-        pattern = re.compile(keyword_regex)
-    except re.error as e:
-        logger.error("Invalid keyword regex: %s", e)
-        raise ValueError(f"Invalid keyword regex: {e}") from e
+    Raises:
+        ExtractionCancelled: If ``cancel_token`` is cancelled mid-run
 
+    """
     file_pattern = None
     if file_identifier_regex:
         logger.debug("Compiling file identifier regex: %s", file_identifier_regex)
@@ -45,7 +104,48 @@ def extract_matches(
             logger.error("Invalid file identifier regex: %s", e)
             raise ValueError(f"Invalid file identifier regex: {e}") from e
 
+    forms = canonical_forms(normalize)
+    fuzzy = None
+    pattern = None
+    fuzzy_terms = list(fuzzy_terms)
+    if term_dictionary is not None:
+        if fuzzy_terms or max_edits:
+            raise ValueError("Term lookup and fuzzy matching cannot be combined")
+    elif fuzzy_terms or max_edits:
+        if not fuzzy_terms:
+            literal = literal_text(keyword_regex)
+            if literal is None:
+                raise ValueError(
+                    "Fuzzy matching needs fuzzy_terms or a literal keyword regex"
+                )
+            fuzzy_terms = [literal]
+        # Terms are compared with normalized text, so normalize them alike
+        terms = [normalize_text(term, forms) for term in fuzzy_terms]
+        fuzzy = FuzzyMatcher(terms, max_edits)
+    else:
+        logger.debug("Compiling keyword regex: %s", keyword_regex)
+        try:
+            pattern = re.compile(keyword_regex)
+        except re.error as e:
+            logger.error("Invalid keyword regex: %s", e)
+            raise ValueError(f"Invalid keyword regex: {e}") from e
+
+    if segments is not None and segments.forms != forms:
+        logger.debug("Segment index built for %s, not %s", segments.forms, forms)
+        segments = None
+    use_layout = (
+        pattern is not None and segments is not None and is_segment_safe(keyword_regex)
+    )
+    raw_pattern = None
+    if pattern is not None and not forms and not use_layout:
+        raw_pattern = bytes_pattern(keyword_regex)
+
+    # page key -> match spans, and line digest -> spans relative to the line
+    page_spans: dict[str | bytes | tuple[int, int], list[Span]] = {}
+    segment_spans: dict[bytes, list[Span]] = {}
+
     total_matches = 0
+    pages_done = 0
     for filename, pages in text_content.items():
         logger.debug("Processing file: %s (%d pages)", filename, len(pages))
 
@@ -66,13 +166,68 @@ def extract_matches(
                     sheet_no,
                 )
 
+        if (
+            raw_pattern is not None
+            and isinstance(pages, MappedPages)
+            and (pages.ascii or is_bytes_safe(keyword_regex))
+        ):
+            for page_num, offset, view in pages.views():
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                page_key = (offset, len(view))
+                spans = page_spans.get(page_key)
+                if spans is None:
+                    spans = page_spans[page_key] = [
+                        (m.start(), m.end(), m.group().decode("utf-8"), None)
+                        for m in raw_pattern.finditer(view)
+                    ]
+                for match_start, match_end, match_found, _ in spans:
+                    total_matches += 1
+                    yield MatchResult(
+                        source_file=filename,
+                        project_id=project_id,
+                        sheet_no=sheet_no,
+                        page=page_num,
+                        match_found=match_found,
+                        context=_byte_context(
+                            view, match_start, match_end, context_chars, pages.ascii
+                        ),
+                    )
+                pages_done += 1
+                if progress_callback is not None:
+                    progress_callback(pages_done, total_matches)
+            continue
+
         # Search each page
         for page_num, text in pages.items():
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            text = normalization_cache.normalize(text, forms)
+            layout = None
+            if segments is not None:
+                page_key, layout = segments.page(filename, page_num)
+            elif isinstance(pages, MappedPages):
+                # Keyed by digest so a scan does not keep every page alive
+                page_key = page_digest(text)
+            else:
+                page_key = text
+            spans = page_spans.get(page_key)
+            if spans is None:
+                if term_dictionary is not None:
+                    spans = term_dictionary.scan(text)
+                elif fuzzy is not None:
+                    spans = fuzzy.scan(text)
+                else:
+                    spans = _scan(
+                        pattern, text, layout if use_layout else None, segment_spans
+                    )
+                page_spans[page_key] = spans
+
             page_matches = 0
-            for match in pattern.finditer(text):
+            for match_start, match_end, match_found, distance in spans:
                 # Extract context around match
-                start = max(0, match.start() - context_chars)
-                end = min(len(text), match.end() + context_chars)
+                start = max(0, match_start - context_chars)
+                end = min(len(text), match_end + context_chars)
                 context = text[start:end]
 
                 # Add ellipsis if truncated
@@ -89,18 +244,383 @@ def extract_matches(
                     project_id=project_id,
                     sheet_no=sheet_no,
                     page=int(page_num),
-                    match_found=match.group(),
+                    match_found=match_found,
                     context=context,
+                    edit_distance=distance,
                 )
 
             if page_matches > 0:
                 logger.debug("Page %d: found %d matches", page_num, page_matches)
+            pages_done += 1
+            if progress_callback is not None:
+                progress_callback(pages_done, total_matches)
 
     logger.info("Total matches found: %d", total_matches)
 
 
+@lru_cache(maxsize=256)
+def bytes_pattern(keyword_regex: str) -> re.Pattern[bytes] | None:
+    r"""Return a keyword regex compiled for UTF-8 bytes, or None if it can't be.
+
+    The bytes pattern finds the same matches as the text pattern on pure
+    ASCII text, and on any text when ``is_bytes_safe`` holds. Non-ASCII
+    patterns and text-only syntax (such as ``\N{...}``) give None.
+    """
+    if not keyword_regex.isascii():
+        return None
+    try:
+        return re.compile(keyword_regex.encode("ascii"))
+    except re.error:
+        return None
+
+
+def _byte_context(
+    page: memoryview, start: int, end: int, chars: int, ascii: bool = False
+) -> str:
+    """Return a match's context from a UTF-8 page, as text scanning gives it.
+
+    Only the bytes that can hold ``chars`` characters either side of the
+    match (at most four per character, one on ``ascii`` pages) are decoded.
+    """
+    size = len(page)
+    if ascii:
+        low = max(0, start - chars)
+        high = min(size, end + chars)
+        context = str(page[low:high], "ascii")
+        more_before, more_after = low > 0, high < size
+    else:
+        reach = 4 * chars + 3
+        low = max(0, start - reach)
+        while low > 0 and page[low] & 0xC0 == 0x80:  # inside a character
+            low += 1
+        high = min(size, end + reach)
+        while high < size and page[high] & 0xC0 == 0x80:
+            high -= 1
+        before = str(page[low:start], "utf-8")
+        after = str(page[end:high], "utf-8")
+        context = (
+            before[max(0, len(before) - chars) :]
+            + str(page[start:end], "utf-8")
+            + after[:chars]
+        )
+        more_before = low > 0 or len(before) > chars
+        more_after = high < size or len(after) > chars
+
+    if more_before:
+        context = "..." + context
+    if more_after:
+        context = context + "..."
+    return context
+
+
+def _scan(
+    pattern: re.Pattern,
+    text: str,
+    layout: list[Segment] | None,
+    segment_spans: dict[bytes, list[Span]],
+) -> list[Span]:
+    """Return the match spans of one page, reusing spans of repeated lines."""
+    if layout is None:
+        return [(m.start(), m.end(), m.group(), None) for m in pattern.finditer(text)]
+
+    spans: list[Span] = []
+    for seg_start, seg_end, digest in layout:
+        if digest is None:
+            spans.extend(
+                (m.start(), m.end(), m.group(), None)
+                for m in pattern.finditer(text, seg_start, seg_end)
+            )
+            continue
+        relative = segment_spans.get(digest)
+        if relative is None:
+            relative = segment_spans[digest] = [
+                (m.start() - seg_start, m.end() - seg_start, m.group(), None)
+                for m in pattern.finditer(text, seg_start, seg_end)
+            ]
+        spans.extend((s + seg_start, e + seg_start, g, d) for s, e, g, d in relative)
+    return spans
+
+
+def _char_masks(term: str) -> dict[str, int]:
+    """Return, per character, the bitmask of its positions in ``term``."""
+    masks: dict[str, int] = {}
+    for i, char in enumerate(term):
+        masks[char] = masks.get(char, 0) | 1 << i
+    return masks
+
+
+def edit_scores(
+    masks: dict[str, int], length: int, text: str, anchored: bool = False
+) -> list[int]:
+    """Return the edit distance of a term's best alignment ending at each char.
+
+    Myers' bit-parallel algorithm: one column of the edit-distance matrix
+    is kept as bit vectors of +1/-1 vertical deltas, so each text character
+    costs a handful of integer operations regardless of the term's length.
+
+    Args:
+        masks: ``_char_masks`` of the term
+        length: Length of the term
+        text: Text to align against
+        anchored: Alignments must start at ``text[0]`` (edit distance of
+            the term and each prefix of ``text``) instead of anywhere
+
+    """
+    full = (1 << length) - 1
+    high = 1 << (length - 1)
+    carry = 1 if anchored else 0
+    pv, mv, score = full, 0, length
+    scores = []
+    for char in text:
+        eq = masks.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = (ph << 1 | carry) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+        scores.append(score)
+    return scores
+
+
+class FuzzyMatcher:
+    """Find substrings within ``max_edits`` edits of any of a set of terms.
+
+    Each term is split into ``max_edits + 1`` pieces. A substring within
+    ``max_edits`` edits of the term leaves at least one piece intact, so
+    exact occurrences of the pieces (found with one regex scan) give the
+    only places worth checking. Each candidate window is then verified with
+    ``edit_scores``, and overlapping hits are resolved in favour of the
+    fewest edits.
+    """
+
+    def __init__(self, terms: Iterable[str], max_edits: int):
+        """Index the pieces of ``terms``.
+
+        Raises:
+            ValueError: If no terms are given, ``max_edits`` is out of range,
+                or a term is too short to split for ``max_edits``
+
+        """
+        self.terms = list(dict.fromkeys(term for term in terms if term))
+        self.max_edits = max_edits
+        if not self.terms:
+            raise ValueError("No fuzzy terms given")
+        if not 0 <= max_edits <= FUZZY_MAX_EDITS:
+            raise ValueError(f"max_edits must be between 0 and {FUZZY_MAX_EDITS}")
+
+        parts = max_edits + 1
+        # piece -> [(term index, offset of the piece in the term)]
+        self._pieces: dict[str, list[tuple[int, int]]] = {}
+        for index, term in enumerate(self.terms):
+            if len(term) < parts * FUZZY_MIN_PIECE_CHARS:
+                raise ValueError(
+                    f"Fuzzy term {term!r} is too short for {max_edits} edits"
+                )
+            for i in range(parts):
+                start = i * len(term) // parts
+                end = (i + 1) * len(term) // parts
+                self._pieces.setdefault(term[start:end], []).append((index, start))
+        self._piece_lengths = sorted({len(piece) for piece in self._pieces})
+        self._finder = re.compile(
+            "|".join(
+                re.escape(piece)
+                for piece in sorted(self._pieces, key=len, reverse=True)
+            )
+        )
+        self._masks = [_char_masks(term) for term in self.terms]
+        self._reversed_masks = [_char_masks(term[::-1]) for term in self.terms]
+        logger.debug(
+            "Fuzzy matcher: %d terms, %d pieces, k=%d",
+            len(self.terms),
+            len(self._pieces),
+            max_edits,
+        )
+
+    def _windows(self, text: str) -> dict[int, list[tuple[int, int]]]:
+        """Return merged candidate windows per term index."""
+        k = self.max_edits
+        windows: dict[int, list[tuple[int, int]]] = {}
+        pos = 0
+        while (found := self._finder.search(text, pos)) is not None:
+            at = found.start()
+            # Pieces may overlap or share a start; check every length here
+            for length in self._piece_lengths:
+                for index, offset in self._pieces.get(text[at : at + length], ()):
+                    start = at - offset
+                    windows.setdefault(index, []).append(
+                        (max(0, start - k), start + len(self.terms[index]) + k)
+                    )
+            pos = at + 1
+
+        for index, spans in windows.items():
+            spans.sort()
+            merged = [spans[0]]
+            for start, end in spans[1:]:
+                if start <= merged[-1][1]:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+                else:
+                    merged.append((start, end))
+            windows[index] = merged
+        return windows
+
+    def _verify(
+        self, index: int, text: str, lo: int, hi: int
+    ) -> Iterator[tuple[int, int, int]]:
+        """Yield (start, end, distance) of local best alignments in a window."""
+        term = self.terms[index]
+        length = len(term)
+        k = self.max_edits
+        scores = edit_scores(self._masks[index], length, text[lo:hi])
+        for j, score in enumerate(scores):
+            if score > k:
+                continue
+            # Keep the first end of each local minimum
+            if j > 0 and scores[j - 1] <= score:
+                continue
+            if j + 1 < len(scores) and scores[j + 1] < score:
+                continue
+            end = lo + j + 1
+            # Anchored reverse pass from the end finds where the match starts
+            back = text[max(lo, end - length - k) : end][::-1]
+            reverse = edit_scores(self._reversed_masks[index], length, back, True)
+            size = min(
+                (i + 1 for i, d in enumerate(reverse) if d == score),
+                key=lambda n: (abs(n - length), n),
+            )
+            yield end - size, end, score
+
+    def scan(self, text: str) -> list[Span]:
+        """Return non-overlapping fuzzy matches in ``text``, in text order."""
+        hits = [
+            (distance, start, end)
+            for index, ranges in self._windows(text).items()
+            for lo, hi in ranges
+            for start, end, distance in self._verify(index, text, lo, hi)
+        ]
+        hits.sort()
+
+        taken: list[tuple[int, int]] = []
+        spans: list[Span] = []
+        for distance, start, end in hits:
+            at = bisect.bisect_left(taken, (start, end))
+            if at > 0 and taken[at - 1][1] > start:
+                continue
+            if at < len(taken) and taken[at][0] < end:
+                continue
+            taken.insert(at, (start, end))
+            spans.append((start, end, text[start:end], distance))
+        spans.sort()
+        return spans
+
+
+# Character classes of the shape skeleton: (class key, regex for one char).
+_SHAPE_CLASSES = {
+    "9": r"\d",
+    "A": "[A-Z]",
+    "a": "[a-z]",
+    "L": r"[^\W\d_]",
+    "X": "[A-Za-z0-9]",
+    " ": r"\s",
+}
+
+Shape = tuple[tuple[str, int], ...]
+
+
+def _char_class(char: str, coarse: bool) -> str:
+    """Return the shape class of one character; punctuation is its own class."""
+    if char.isdecimal():
+        return "X" if coarse and char.isascii() else "9"
+    if char.isalpha():
+        if not char.isascii():
+            return "L"
+        if coarse:
+            return "X"
+        return "A" if char.isupper() else "a"
+    if char.isspace():
+        return " "
+    return char
+
+
+def example_shape(example: str, coarse: bool = False) -> Shape:
+    """Return the run-length shape skeleton of an example.
+
+    ``'10"-FG-001'`` becomes ``(("9", 2), ('"', 1), ("-", 1), ("A", 2),
+    ("-", 1), ("9", 3))``. Examples whose skeletons share the same sequence
+    of classes fall into one cluster; ``coarse`` merges ASCII letters and
+    digits into a single alphanumeric class.
+    """
+    runs: list[list] = []
+    for char in example:
+        key = _char_class(char, coarse)
+        if runs and runs[-1][0] == key:
+            runs[-1][1] += 1
+        else:
+            runs.append([key, 1])
+    return tuple((key, length) for key, length in runs)
+
+
+def cluster_examples(
+    examples: Iterable[str], max_clusters: int = GUESS_REGEX_MAX_CLUSTERS
+) -> list[list[str]]:
+    """Group examples by shape skeleton, largest cluster first.
+
+    Falls back to the coarse skeleton when the fine one yields more than
+    ``max_clusters`` groups.
+    """
+    examples = list(examples)
+    for coarse in (False, True):
+        clusters: dict[tuple[str, ...], list[str]] = {}
+        for example in examples:
+            key = tuple(k for k, _ in example_shape(example, coarse))
+            clusters.setdefault(key, []).append(example)
+        if len(clusters) <= max_clusters:
+            break
+    return sorted(clusters.values(), key=len, reverse=True)
+
+
+def _quantifier(low: int, high: int) -> str:
+    if low == high:
+        return "" if low == 1 else f"{{{low}}}"
+    return f"{{{low},{high}}}"
+
+
+def shape_pattern(cluster: list[str]) -> str:
+    """Build one compact pattern covering every example in a shape cluster."""
+    coarse = len({tuple(k for k, _ in example_shape(ex)) for ex in cluster}) > 1
+    shapes = [example_shape(ex, coarse) for ex in cluster]
+    parts = []
+    for runs in zip(*shapes, strict=True):
+        key = runs[0][0]
+        lengths = [length for _, length in runs]
+        atom = _SHAPE_CLASSES.get(key) or re.escape(key)
+        parts.append(atom + _quantifier(min(lengths), max(lengths)))
+    return "".join(parts)
+
+
+def _grex_pattern(examples: Iterable[str]) -> str:
+    return (
+        RegExpBuilder.from_test_cases(list(examples))
+        .with_conversion_of_digits()
+        .with_conversion_of_words()
+        .without_anchors()
+        .build()
+    )
+
+
 def guess_regex(examples: list[str]) -> tuple[str, str]:
-    """Generate a regex pattern from example strings using grex.
+    """Generate a regex pattern from example strings.
+
+    Small example sets go to grex as a whole. Larger sets are clustered by
+    shape (digit / letter / punctuation skeleton) and one compact pattern is
+    built per cluster, so hundreds of examples produce a short alternation
+    instead of one branch per example. Results are memoized by example set.
 
     Args:
         examples: List of example strings (minimum 2)
@@ -109,19 +629,33 @@ def guess_regex(examples: list[str]) -> tuple[str, str]:
         Tuple of (pattern, explanation)
 
     """
-    logger.debug("Generating regex from %d examples using grex", len(examples))
+    logger.debug("Generating regex from %d examples", len(examples))
 
     if len(examples) < 2:
         raise ValueError("At least 2 examples required")
 
+    return _guess_regex_cached(tuple(sorted(set(examples))))
+
+
+@lru_cache(maxsize=GUESS_REGEX_CACHE_SIZE)
+def _guess_regex_cached(examples: tuple[str, ...]) -> tuple[str, str]:
     try:
-        reb = RegExpBuilder.from_test_cases(examples)
-        pattern = (
-            reb.with_conversion_of_digits()
-            .with_conversion_of_words()
-            .without_anchors()
-            .build()
-        )
+        if len(examples) <= GREX_MAX_EXAMPLES:
+            pattern = _grex_pattern(examples)
+            explanation = "Regex generated by TextHunter from examples"
+        else:
+            clusters = cluster_examples(examples)
+            # Longer shapes first so a search prefers the longest branch
+            branches = sorted(
+                {shape_pattern(c) for c in clusters},
+                key=len,
+                reverse=True,
+            )
+            pattern = "|".join(branches)
+            explanation = (
+                f"Regex generated by TextHunter from {len(examples)} examples"
+                f" in {len(clusters)} shape cluster(s)"
+            )
 
         # Validate the pattern
         try:
@@ -137,7 +671,6 @@ def guess_regex(examples: list[str]) -> tuple[str, str]:
                 " Please add regex manually."
             )
 
-        explanation = "Regex generated by TextHunter from examples"
         logger.info("Generated pattern: %s", pattern)
         return pattern, explanation
 
@@ -147,3 +680,53 @@ def guess_regex(examples: list[str]) -> tuple[str, str]:
             f"Failed to generate regex from examples: {e}. Please add regex manually."
         ) from e
 
+
+def measure_scan_throughput(
+    pattern: str,
+    text_content: Mapping[str, Mapping[int, str]],
+    max_bytes: int = SCAN_SAMPLE_BYTES,
+) -> ScanThroughput:
+    """Time a full ``finditer`` scan of a pattern over a corpus sample.
+
+    Pages are taken in order until ``max_bytes`` of UTF-8 text is collected
+    (0 scans everything). Only the regex scan itself is timed.
+
+    Raises:
+        ValueError: If the pattern is not a valid regex
+
+    """
+    try:
+        compiled = re.compile(pattern)
+    except re.error as e:
+        raise ValueError(f"Invalid keyword regex: {e}") from e
+
+    sample: list[str] = []
+    size = 0
+    sampled = False
+    for pages in text_content.values():
+        for text in pages.values():
+            if 0 < max_bytes <= size:
+                sampled = True
+                break
+            sample.append(text)
+            size += len(text.encode("utf-8"))
+        if sampled:
+            break
+
+    matches = 0
+    start = time.perf_counter()
+    for text in sample:
+        for _ in compiled.finditer(text):
+            matches += 1
+    seconds = time.perf_counter() - start
+
+    mb_per_second = size / 1e6 / seconds if seconds > 0 else float("inf")
+    logger.debug("Scanned %d bytes at %.1f MB/s", size, mb_per_second)
+    return ScanThroughput(
+        bytes_scanned=size,
+        seconds=seconds,
+        mb_per_second=round(min(mb_per_second, 1e9), 3),
+        matches=matches,
+        sampled=sampled,
+        slow=size > 0 and mb_per_second < SLOW_SCAN_MB_PER_SECOND,
+    )
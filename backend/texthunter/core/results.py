@@ -0,0 +1,299 @@
+"""Server-held result sets for paging, sorting and filtering matches.
+
+An extraction's matches are kept once per process as a ``ResultSet``:
+
+- Each sort key gets a permutation of row numbers, built on first use and
+  kept, so a page in any order is a walk along that permutation.
+- Each combination of filters is evaluated once into a row mask, together
+  with its count and facet counts, and cached.
+- Each sort of a filtered view gets the permutation of just its rows, built
+  on first use and kept with the view: taken from the full permutation if
+  that exists, otherwise by sorting only the rows passing the filters.
+
+Paging through a view is therefore a slice of one page of rows per request,
+however selective the filters. Cursors are opaque: they record the position
+reached in the view's permutation and a fingerprint of the sort and filters
+they were issued for.
+
+Result sets are keyed like the shared result cache in the store, so a
+worker that does not hold one in memory reloads it from disk.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import re
+import threading
+from array import array
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, field
+from itertools import compress
+
+from texthunter.api.schemas import FacetCount, MatchResult, ResultPage, ResultQuery
+from texthunter.config.settings import RESULT_FACET_MAX_VALUES, RESULT_SETS_IN_MEMORY
+from texthunter.core.store import corpus_store
+
+logger = logging.getLogger(__name__)
+
+FACET_FIELDS = ("source_file", "project_id", "sheet_no")
+FILTER_FIELDS = ("contains", "regex", *FACET_FIELDS, "page")
+
+# Filtered views kept per result set
+_MAX_VIEWS = 16
+
+_DIGITS = re.compile(r"(\d+)")
+
+
+def natural_key(value: str | None) -> tuple:
+    """Sort key ordering ``PID-9`` before ``PID-10``; None sorts last."""
+    if value is None:
+        return (1,)
+    parts = _DIGITS.split(value)
+    return (0, *(int(p) if i % 2 else p.casefold() for i, p in enumerate(parts)))
+
+
+@dataclass
+class FilterView:
+    """Rows of a result set passing one combination of filters."""
+
+    mask: bytearray | None  # None when every row passes
+    count: int
+    facets: dict[str, list[FacetCount]]
+    # sort key -> rows passing the filters, in that order
+    orders: dict[str | None, Sequence[int]] = field(default_factory=dict)
+
+
+def _filter_key(query: ResultQuery) -> tuple:
+    return tuple(getattr(query, name) for name in FILTER_FIELDS)
+
+
+def _fingerprint(query: ResultQuery) -> str:
+    state = [query.sort, query.descending, *_filter_key(query)]
+    digest = hashlib.blake2b(json.dumps(state).encode("utf-8"), digest_size=8)
+    return digest.hexdigest()
+
+
+def encode_cursor(position: int, fingerprint: str) -> str:
+    """Return the opaque cursor for a position in a view."""
+    raw = json.dumps([position, fingerprint]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, fingerprint: str) -> int:
+    """Return the position in the view recorded in a cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for a different
+            sort or filter
+
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position, issued_for = json.loads(raw)
+        position = int(position)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if position < 0:
+        raise ValueError("Invalid cursor")
+    if issued_for != fingerprint:
+        raise ValueError("Cursor does not match the query's sort and filters")
+    return position
+
+
+class ResultSet:
+    """Matches of one extraction with cached sort orders and filter views."""
+
+    def __init__(self, matches: list[MatchResult]):
+        """Hold ``matches`` in extraction order."""
+        self.matches = matches
+        self._orders: dict[str, array] = {}
+        self._views: OrderedDict[tuple, FilterView] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of matches."""
+        return len(self.matches)
+
+    def order(self, key: str | None) -> Sequence[int]:
+        """Return row numbers sorted by ``key`` (stable; None: as extracted)."""
+        if key is None:
+            return range(len(self.matches))
+        with self._lock:
+            order = self._orders.get(key)
+        if order is not None:
+            return order
+
+        order = self._sorted(range(len(self.matches)), key)
+        with self._lock:
+            self._orders[key] = order
+        logger.debug("Built %s order over %d matches", key, len(order))
+        return order
+
+    def _sorted(self, rows: Iterable[int], key: str) -> array:
+        """Return ``rows`` stably sorted by ``key``."""
+        rows = list(rows)
+        values = [getattr(self.matches[row], key) for row in rows]
+        keys: list
+        if key == "page":
+            keys = values
+        elif key == "edit_distance":
+            keys = [(value is None, value or 0) for value in values]
+        else:
+            keys = [natural_key(value) for value in values]
+        ranked = sorted(range(len(rows)), key=keys.__getitem__)
+        return array("l", [rows[i] for i in ranked])
+
+    def view(self, query: ResultQuery) -> FilterView:
+        """Return the rows passing the query's filters, computing them once.
+
+        Raises:
+            ValueError: If the regex filter is invalid
+
+        """
+        key = _filter_key(query)
+        with self._lock:
+            view = self._views.get(key)
+            if view is not None:
+                self._views.move_to_end(key)
+                return view
+
+        predicates: list[Callable[[MatchResult], bool]] = []
+        if query.contains:
+            needle = query.contains.casefold()
+            predicates.append(lambda m: needle in m.match_found.casefold())
+        if query.regex:
+            try:
+                search = re.compile(query.regex).search
+            except re.error as e:
+                raise ValueError(f"Invalid regex filter: {e}") from e
+            predicates.append(lambda m: search(m.match_found) is not None)
+        for name in (*FACET_FIELDS, "page"):
+            wanted = getattr(query, name)
+            if wanted is not None:
+                predicates.append(
+                    lambda m, name=name, wanted=wanted: getattr(m, name) == wanted
+                )
+
+        mask = bytearray(len(self.matches)) if predicates else None
+        counters: dict[str, Counter] = {name: Counter() for name in FACET_FIELDS}
+        count = 0
+        for row, match in enumerate(self.matches):
+            if mask is not None:
+                if not all(predicate(match) for predicate in predicates):
+                    continue
+                mask[row] = 1
+            count += 1
+            for name, counter in counters.items():
+                counter[getattr(match, name)] += 1
+
+        view = FilterView(
+            mask=mask,
+            count=count,
+            facets={
+                name: [
+                    FacetCount(value=value, count=n)
+                    for value, n in counter.most_common(RESULT_FACET_MAX_VALUES)
+                ]
+                for name, counter in counters.items()
+            },
+        )
+        with self._lock:
+            self._views[key] = view
+            while len(self._views) > _MAX_VIEWS:
+                self._views.popitem(last=False)
+        return view
+
+    def view_order(self, view: FilterView, key: str | None) -> Sequence[int]:
+        """Return the rows of a filtered view sorted by ``key``, computing once."""
+        if view.mask is None:
+            return self.order(key)
+        with self._lock:
+            rows = view.orders.get(key)
+            order = self._orders.get(key)
+        if rows is not None:
+            return rows
+
+        if key is None:
+            rows = array("l", compress(range(len(self.matches)), view.mask))
+        elif order is not None:
+            rows = array("l", compress(order, map(view.mask.__getitem__, order)))
+        else:
+            # Sorting only the rows passing the filters gives the same
+            # (stable) order without sorting the whole set
+            rows = self._sorted(compress(range(len(self.matches)), view.mask), key)
+        with self._lock:
+            view.orders[key] = rows
+        return rows
+
+    def page(self, query: ResultQuery) -> ResultPage:
+        """Return the page of the sorted, filtered view at ``query.cursor``.
+
+        Raises:
+            ValueError: For an invalid regex filter or cursor
+
+        """
+        view = self.view(query)
+        order = self.view_order(view, query.sort)
+        fingerprint = _fingerprint(query)
+        position = decode_cursor(query.cursor, fingerprint) if query.cursor else 0
+
+        end = min(position + query.limit, len(order))
+        if query.descending:
+            # Descending walks the ascending order backwards
+            last = len(order) - 1
+            rows = [order[last - i] for i in range(position, end)]
+        else:
+            rows = list(order[position:end])
+
+        return ResultPage(
+            matches=[self.matches[row] for row in rows],
+            total_count=view.count,
+            next_cursor=(encode_cursor(end, fingerprint) if end < len(order) else None),
+            facets=view.facets if query.facets else {},
+        )
+
+
+class ResultSetRegistry:
+    """Per-process LRU of result sets, backed by the store's result cache."""
+
+    def __init__(self, max_sets: int = RESULT_SETS_IN_MEMORY):
+        """Keep up to ``max_sets`` result sets in memory."""
+        self.max_sets = max_sets
+        self._sets: OrderedDict[str, ResultSet] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, result_id: str, matches: list[MatchResult]) -> ResultSet:
+        """Hold the matches of an extraction under ``result_id``."""
+        with self._lock:
+            result_set = self._sets.get(result_id)
+            if result_set is None:
+                result_set = self._sets[result_id] = ResultSet(matches)
+            self._sets.move_to_end(result_id)
+            while len(self._sets) > self.max_sets:
+                self._sets.popitem(last=False)
+        return result_set
+
+    def get(self, result_id: str) -> ResultSet:
+        """Return a result set, reloading it from the store if needed.
+
+        Raises:
+            KeyError: If neither this process nor the store has it
+
+        """
+        with self._lock:
+            result_set = self._sets.get(result_id)
+            if result_set is not None:
+                self._sets.move_to_end(result_id)
+                return result_set
+        if not result_id.isalnum():
+            raise KeyError(result_id)
+        matches = corpus_store.get_results(result_id)
+        if matches is None:
+            raise KeyError(result_id)
+        logger.info("Reloaded result set %s from the store", result_id)
+        return self.put(result_id, matches)
+
+
+result_sets = ResultSetRegistry()
@@ -0,0 +1,524 @@
+"""Shared on-disk corpus store and result cache.
+
+Uploaded corpora are written once to a content-addressed store directory
+and memory-mapped read-only by every worker process, so N workers share one
+copy of the text through the OS page cache instead of each holding its own
+Python strings. Each corpus is two files:
+
+- ``<corpus_id>.bin``: all page texts concatenated as UTF-8
+- ``<corpus_id>.json``: filenames, ``[page, start, end]`` byte offsets,
+  whether each file is pure ASCII and a content digest per file
+
+Corpora are written page by page (``CorpusWriter``), so building one never
+needs the whole text in memory. Pages can be read back without decoding, as
+views of the mapping, which the extraction engine scans with bytes-mode
+regexes; together with a mapped corpus holding only compact offset arrays,
+that lets corpora larger than RAM be searched.
+
+Extraction results for a (corpus, pattern) pair are cached next to them as
+JSON so a query answered by one worker is a cache hit for the others. Each
+query also records the corpora it was last cached for, so running it on a
+new revision of one of them can reuse the matches of unchanged files (see
+``core.incremental``).
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, Mapping
+from pathlib import Path
+
+from pydantic import TypeAdapter, ValidationError
+
+from texthunter.api.schemas import MatchResult
+from texthunter.config.settings import (
+    LINE_INDEX_MAX_CORPUS_BYTES,
+    OPEN_CORPORA_CACHE_SIZE,
+    RESULT_CACHE_MAX_ENTRIES,
+    STORE_DIR,
+)
+from texthunter.core.dedup import SegmentIndex, canonical_forms, page_digest
+
+logger = logging.getLogger(__name__)
+
+# Result sets are (de)serialized in one pass by pydantic, ~2x faster than json
+_MATCH_LIST = TypeAdapter(list[MatchResult])
+
+# Corpora listed per query in its revision history
+_QUERY_REVISIONS = 8
+
+
+def _file_header(filename: str) -> bytes:
+    return b"\x00F" + filename.encode("utf-8")
+
+
+def _page_header(page_num: int) -> bytes:
+    return b"\x00P%d\x00" % page_num
+
+
+def corpus_id_for(text_content: Mapping[str, Mapping[int, str]]) -> str:
+    """Return the content hash identifying a corpus."""
+    digest = hashlib.sha256()
+    for filename, pages in text_content.items():
+        digest.update(_file_header(filename))
+        for page_num, text in pages.items():
+            digest.update(_page_header(int(page_num)))
+            digest.update(text.encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def file_digest(filename: str, page_digests: Iterable[tuple[int, bytes]]) -> str:
+    """Return the content hash of one file from its ``(page, page_digest)`` pairs.
+
+    The filename is part of the hash: matches carry metadata parsed from it.
+    """
+    digest = hashlib.sha256(_file_header(filename))
+    for page_num, page_hash in page_digests:
+        digest.update(_page_header(page_num))
+        digest.update(page_hash)
+    return digest.hexdigest()[:32]
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class MappedPages(Mapping[int, str]):
+    """Pages of one file, decoded from the mapped blob on access."""
+
+    def __init__(
+        self,
+        data: mmap.mmap | bytes,
+        pages: list[list[int]],
+        ascii: bool = False,
+        digest: str | None = None,
+    ):
+        """Wrap ``[page, start, end]`` offset rows over ``data``.
+
+        Args:
+            data: The corpus blob
+            pages: Offset rows in stored order
+            ascii: Whether every page is pure ASCII
+            digest: The file's ``file_digest``, if the index records it
+
+        """
+        self._data = data
+        self.ascii = ascii
+        self.digest = digest
+        self._numbers = array("q", [row[0] for row in pages])
+        self._starts = array("q", [row[1] for row in pages])
+        self._ends = array("q", [row[2] for row in pages])
+        self._positions: dict[int, int] | None = None
+
+    def __getitem__(self, page: int) -> str:
+        """Decode one page's text."""
+        if self._positions is None:
+            # Built on first decode; bytes-mode scans only use views()
+            self._positions = {n: i for i, n in enumerate(self._numbers)}
+        i = self._positions[page]
+        return self._data[self._starts[i] : self._ends[i]].decode("utf-8")
+
+    def __iter__(self) -> Iterator[int]:
+        """Iterate page numbers in stored order."""
+        return iter(self._numbers)
+
+    def __len__(self) -> int:
+        """Return the number of pages."""
+        return len(self._numbers)
+
+    def views(self) -> Iterator[tuple[int, int, memoryview]]:
+        """Yield ``(page, offset, UTF-8 bytes)`` as zero-copy views of the blob.
+
+        Pages with identical text share their offset (see ``CorpusWriter``).
+        """
+        data = memoryview(self._data)
+        rows = zip(self._numbers, self._starts, self._ends, strict=True)
+        for page, start, end in rows:
+            yield page, start, data[start:end]
+
+
+class MappedCorpus(Mapping[str, MappedPages]):
+    """Read-only, memory-mapped corpus usable wherever ``text_content`` is.
+
+    Behaves like ``dict[str, dict[int, str]]``; page text is decoded only
+    when accessed, so holding a corpus costs address space, not heap.
+    """
+
+    def __init__(self, data_path: Path, index: dict):
+        """Map ``data_path`` using an index loaded from the ``.json`` file."""
+        self.nbytes: int = index["bytes"]
+        self._file = open(data_path, "rb")  # closed in close()
+        self._data: mmap.mmap | bytes = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.nbytes
+            else b""
+        )
+        self._files = {
+            entry["name"]: MappedPages(
+                self._data,
+                entry["pages"],
+                entry.get("ascii", False),
+                entry.get("digest"),
+            )
+            for entry in index["files"]
+        }
+        self._segment_indexes: dict[tuple[str, ...], SegmentIndex] = {}
+        self._segment_lock = threading.Lock()
+
+    def __getitem__(self, filename: str) -> MappedPages:
+        """Return the pages of one file."""
+        return self._files[filename]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate filenames in upload order."""
+        return iter(self._files)
+
+    def __len__(self) -> int:
+        """Return the number of files."""
+        return len(self._files)
+
+    @property
+    def page_count(self) -> int:
+        """Total number of pages across files."""
+        return sum(len(pages) for pages in self._files.values())
+
+    def file_digest(self, filename: str) -> str:
+        """Return the content digest of one file (see ``file_digest``)."""
+        pages = self._files[filename]
+        if pages.digest is None:
+            # Indexes written before per-file digests: hash the pages once
+            pages.digest = file_digest(
+                filename, ((n, page_digest(view)) for n, _, view in pages.views())
+            )
+        return pages.digest
+
+    def segment_index(self, forms: Iterable[str] = ()) -> SegmentIndex | None:
+        """Return the line dedup index for a normalization, building it once.
+
+        Corpora larger than ``LINE_INDEX_MAX_CORPUS_BYTES`` get None: the
+        index lives in memory, so they are scanned page by page instead.
+        """
+        forms = canonical_forms(forms)
+        if self.nbytes > LINE_INDEX_MAX_CORPUS_BYTES:
+            return None
+        with self._segment_lock:
+            index = self._segment_indexes.get(forms)
+            if index is None:
+                index = self._segment_indexes[forms] = SegmentIndex(self, forms)
+            return index
+
+
+class CorpusWriter:
+    """Write a corpus into a store file by file, page by page.
+
+    Pages are appended to a temporary blob while the corpus ID is hashed,
+    so writing takes memory per page, not per byte of text. A page whose
+    text was already written points at the earlier copy; scans key their
+    page dedup on those offsets. ``commit`` publishes the corpus under its ID.
+    """
+
+    def __init__(self, store: "CorpusStore"):
+        """Start a corpus in ``store``."""
+        self.store = store
+        store.corpora_dir.mkdir(parents=True, exist_ok=True)
+        self._tmp = store.corpora_dir / (
+            f"incoming.{os.getpid()}.{threading.get_ident()}.{id(self)}.tmp"
+        )
+        self._blob = open(self._tmp, "wb")  # closed in commit() or abort()
+        self._digest = hashlib.sha256()
+        self._files: list[dict] = []
+        self._names: set[str] = set()
+        self._current: dict | None = None  # file receiving pages
+        self._offset = 0
+        self._written: dict[bytes, tuple[int, int]] = {}  # page digest -> span
+
+    def add_file(self, filename: str, pages: Iterable[tuple[int, str]]) -> None:
+        """Append one file's ``(page, text)`` pairs, in order."""
+        self._start_file(filename)
+        for page_num, text in pages:
+            self.add_page(filename, page_num, text)
+        self._finish_file()
+
+    def add_page(self, filename: str, page_num: int, text: str) -> None:
+        """Append one page; a file's pages must arrive together, in order.
+
+        Raises:
+            ValueError: If ``filename`` already had pages before another file
+
+        """
+        current = self._current
+        if current is None or current["name"] != filename:
+            self._finish_file()
+            current = self._start_file(filename)
+        encoded = text.encode("utf-8")
+        self._digest.update(_page_header(int(page_num)))
+        self._digest.update(encoded)
+        digest = page_digest(encoded)
+        span = self._written.get(digest)
+        if span is None:
+            self._blob.write(encoded)
+            span = self._written[digest] = (
+                self._offset,
+                self._offset + len(encoded),
+            )
+            self._offset += len(encoded)
+        current["pages"].append([int(page_num), *span])
+        current["page_digests"].append((int(page_num), digest))
+        current["ascii"] = current["ascii"] and encoded.isascii()
+
+    def _start_file(self, filename: str) -> dict:
+        if filename in self._names:
+            raise ValueError(f"Pages of {filename} are not consecutive")
+        self._names.add(filename)
+        self._digest.update(_file_header(filename))
+        self._current = {
+            "name": filename,
+            "pages": [],
+            "ascii": True,
+            "page_digests": [],
+        }
+        return self._current
+
+    def _finish_file(self) -> None:
+        current = self._current
+        if current is None:
+            return
+        page_digests = current.pop("page_digests")
+        current["digest"] = file_digest(current["name"], page_digests)
+        self._files.append(current)
+        self._current = None
+
+    def commit(self) -> str:
+        """Publish the corpus and return its ID (as ``corpus_id_for``)."""
+        self._finish_file()
+        self._blob.close()
+        corpus_id = self._digest.hexdigest()[:32]
+        data_path, index_path = self.store._paths(corpus_id)
+        if index_path.exists():
+            self._tmp.unlink(missing_ok=True)
+            logger.debug("Corpus %s already stored", corpus_id)
+            return corpus_id
+
+        # Blob first, index last: a visible index means a complete corpus.
+        os.replace(self._tmp, data_path)
+        index = {"files": self._files, "bytes": self._offset}
+        _atomic_write(index_path, json.dumps(index).encode("utf-8"))
+        logger.info(
+            "Stored corpus %s: %d files, %d bytes",
+            corpus_id,
+            len(self._files),
+            self._offset,
+        )
+        return corpus_id
+
+    def abort(self) -> None:
+        """Discard the partly written corpus."""
+        self._blob.close()
+        self._tmp.unlink(missing_ok=True)
+
+
+class CorpusStore:
+    """Content-addressed corpus and result storage shared by workers."""
+
+    def __init__(
+        self,
+        root: Path = STORE_DIR,
+        open_cache_size: int = OPEN_CORPORA_CACHE_SIZE,
+        result_cache_entries: int = RESULT_CACHE_MAX_ENTRIES,
+    ):
+        """Create a store rooted at ``root`` (created on first write).
+
+        Args:
+            root: Directory shared by all worker processes
+            open_cache_size: Mapped corpora kept open per process
+            result_cache_entries: Cached result sets kept before eviction
+
+        """
+        self.root = Path(root)
+        self.open_cache_size = open_cache_size
+        self.result_cache_entries = result_cache_entries
+        self._open: OrderedDict[str, MappedCorpus] = OrderedDict()
+        self._lock = threading.Lock()
+        self._unlink_later: set[Path] = set()
+
+    @property
+    def corpora_dir(self) -> Path:
+        """Directory holding corpus blobs and indexes."""
+        return self.root / "corpora"
+
+    @property
+    def results_dir(self) -> Path:
+        """Directory holding cached result sets."""
+        return self.root / "results"
+
+    @property
+    def queries_dir(self) -> Path:
+        """Directory holding each query's revision history."""
+        return self.root / "queries"
+
+    def _paths(self, corpus_id: str) -> tuple[Path, Path]:
+        if not corpus_id.isalnum():
+            raise KeyError(corpus_id)
+        return (
+            self.corpora_dir / f"{corpus_id}.bin",
+            self.corpora_dir / f"{corpus_id}.json",
+        )
+
+    def put(self, text_content: Mapping[str, Mapping[int, str]]) -> str:
+        """Store a corpus (if not already present) and return its ID."""
+        corpus_id = corpus_id_for(text_content)
+        if self._paths(corpus_id)[1].exists():
+            logger.debug("Corpus %s already stored", corpus_id)
+            return corpus_id
+
+        writer = self.writer()
+        try:
+            for filename, pages in text_content.items():
+                writer.add_file(filename, pages.items())
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.commit()
+
+    def writer(self) -> CorpusWriter:
+        """Return a writer for streaming a new corpus into the store."""
+        return CorpusWriter(self)
+
+    def get(self, corpus_id: str) -> MappedCorpus:
+        """Return the mapped corpus for an ID.
+
+        Raises:
+            KeyError: If no such corpus exists in the store
+
+        """
+        with self._lock:
+            corpus = self._open.get(corpus_id)
+            if corpus is not None:
+                self._open.move_to_end(corpus_id)
+                return corpus
+
+            data_path, index_path = self._paths(corpus_id)
+            try:
+                index = json.loads(index_path.read_text(encoding="utf-8"))
+            except FileNotFoundError as e:
+                raise KeyError(corpus_id) from e
+            corpus = MappedCorpus(data_path, index)
+            self._open[corpus_id] = corpus
+            while len(self._open) > self.open_cache_size:
+                # Dropped rather than closed: a request may still be scanning
+                # it; the mapping is released when the last reference goes.
+                self._open.popitem(last=False)
+            return corpus
+
+    def delete(self, corpus_id: str) -> bool:
+        """Remove a corpus; return False if it did not exist.
+
+        Scans already holding the corpus keep reading their mapping, which
+        is closed when the last of them drops it.
+        """
+        data_path, index_path = self._paths(corpus_id)
+        with self._lock:
+            self._open.pop(corpus_id, None)
+            # Blobs left mapped by an earlier delete, unless stored again since
+            blobs = {data_path} | {
+                path
+                for path in self._unlink_later
+                if not path.with_suffix(".json").exists()
+            }
+            self._unlink_later.clear()
+        existed = index_path.exists()
+        # Index first: once it is gone no request maps the blob again
+        index_path.unlink(missing_ok=True)
+        for path in blobs:
+            try:
+                path.unlink(missing_ok=True)
+            except PermissionError:
+                # Windows cannot unlink a file that a scan still maps
+                logger.debug("Corpus blob %s still mapped; retried later", path)
+                with self._lock:
+                    self._unlink_later.add(path)
+        return existed
+
+    @staticmethod
+    def result_key(corpus_id: str, *parts: str | None) -> str:
+        """Return the cache key for a corpus and query parameters."""
+        digest = hashlib.sha256(corpus_id.encode("utf-8"))
+        for part in parts:
+            digest.update(b"\x00" + (part or "").encode("utf-8"))
+        return digest.hexdigest()[:32]
+
+    @staticmethod
+    def query_key(*parts: str | None) -> str:
+        """Return the key of query parameters on any corpus."""
+        return CorpusStore.result_key("query", *parts)
+
+    def get_results(self, key: str) -> list[MatchResult] | None:
+        """Return cached matches for a key, or None on a miss."""
+        path = self.results_dir / f"{key}.json"
+        try:
+            matches = _MATCH_LIST.validate_json(path.read_bytes())
+            os.utime(path)  # keep recently used entries from eviction
+        except (FileNotFoundError, ValidationError):
+            return None
+        return matches
+
+    def put_results(self, key: str, matches: list[MatchResult]) -> None:
+        """Cache matches for a key, evicting the least recently used entries."""
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write(self.results_dir / f"{key}.json", _MATCH_LIST.dump_json(matches))
+
+        entries = self.results_dir.glob("*.json")
+        for stale in _least_recent(entries, self.result_cache_entries):
+            stale.unlink(missing_ok=True)
+
+    def revisions(self, query_key: str) -> list[tuple[str, str]]:
+        """Return ``(corpus_id, result key)`` of corpora a query was cached for.
+
+        Most recent first.
+        """
+        path = self.queries_dir / f"{query_key}.json"
+        try:
+            entries = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+        return [(corpus_id, result_key) for corpus_id, result_key in entries]
+
+    def add_revision(self, query_key: str, corpus_id: str, result_key: str) -> None:
+        """Record that a query's results on a corpus were cached.
+
+        Workers recording at once may drop each other's entry, which only
+        costs a full scan of that revision later.
+        """
+        entries = [[corpus_id, result_key]]
+        for entry in self.revisions(query_key):
+            if entry[0] != corpus_id and len(entries) < _QUERY_REVISIONS:
+                entries.append(list(entry))
+        self.queries_dir.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(entries).encode("utf-8")
+        _atomic_write(self.queries_dir / f"{query_key}.json", data)
+
+        entries = self.queries_dir.glob("*.json")
+        for stale in _least_recent(entries, self.result_cache_entries):
+            stale.unlink(missing_ok=True)
+
+
+def _least_recent(paths: Iterable[Path], keep: int) -> list[Path]:
+    """Return the paths beyond the ``keep`` most recently used ones."""
+    entries = []
+    for path in paths:
+        try:
+            entries.append((path.stat().st_mtime, path))
+        except FileNotFoundError:  # evicted by another worker
+            continue
+    entries.sort()
+    return [path for _, path in entries[: max(0, len(entries) - keep)]]
+
+
+corpus_store = CorpusStore()
@@ -0,0 +1,243 @@
+"""Bulk lookup of literal terms, such as every tag number of a line list.
+
+One alternation regex of thousands of literals is tried term by term at
+every text position. A ``TermDictionary`` instead compiles its terms into a
+multi-string automaton once and finds all of them in a single pass:
+
+- with ``pyahocorasick`` installed (``texthunter[terms]``), an Aho-Corasick
+  automaton scanning each page in linear time;
+- otherwise, a regex shaped like the terms' trie, so each position costs at
+  most one walk down the trie.
+
+Both report the leftmost-longest, non-overlapping occurrences that do not
+continue a word, so ``P-101`` is found in ``P-101-AB`` even when
+``P-101-A`` is a term too. Case and whitespace can be ignored; matches are
+always reported as they appear in the page text.
+"""
+
+import logging
+import re
+from bisect import bisect_right
+from collections.abc import Callable, Iterable, Iterator
+from functools import lru_cache
+
+from texthunter.config.settings import TERM_DICTIONARY_CACHE_SIZE
+
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - optional dependency
+    ahocorasick = None
+
+logger = logging.getLogger(__name__)
+
+_NON_SPACE = re.compile(r"\S+")
+
+# (start, end, matched text, edit distance) as in ``regex.Span``
+TermSpan = tuple[int, int, str, None]
+
+
+def _trie_pattern(keys: Iterable[str]) -> str:
+    """Return a regex matching any key, factored along the keys' trie.
+
+    Children are tried before stopping at a shorter key, so a search
+    returns the longest key at the leftmost position.
+    """
+    trie: dict = {}
+    for key in keys:
+        node = trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def write(node: dict) -> str:
+        branches = [
+            re.escape(char) + write(child) for char, child in node.items() if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if "" in node else body
+
+    return write(trie)
+
+
+class TermDictionary:
+    """A set of literal terms compiled for single-pass lookup."""
+
+    def __init__(
+        self,
+        terms: Iterable[str],
+        ignore_case: bool = False,
+        ignore_whitespace: bool = False,
+        use_automaton: bool | None = None,
+    ):
+        """Compile ``terms``.
+
+        Args:
+            terms: Literal terms; duplicates (after folding) are merged
+            ignore_case: Match regardless of case (Unicode case folding)
+            ignore_whitespace: Ignore whitespace in terms and text, so
+                ``10" -FG-001`` matches ``10"-FG-001``
+            use_automaton: Force (True) or avoid (False) pyahocorasick;
+                by default it is used when installed
+
+        Raises:
+            ValueError: If no non-blank terms are given, or pyahocorasick is
+                requested but not installed
+
+        """
+        self.ignore_case = ignore_case
+        self.ignore_whitespace = ignore_whitespace
+        # folded key -> first term that folds to it
+        self.terms: dict[str, str] = {}
+        for term in terms:
+            key = self.fold(term)
+            if key:
+                self.terms.setdefault(key, term)
+        if not self.terms:
+            raise ValueError("No terms given")
+
+        if use_automaton is None:
+            use_automaton = ahocorasick is not None
+        if use_automaton and ahocorasick is None:
+            raise ValueError("pyahocorasick is not installed")
+        self._automaton = None
+        self._pattern = None
+        if use_automaton:
+            self._automaton = ahocorasick.Automaton()
+            for key in self.terms:
+                self._automaton.add_word(key, len(key))
+            self._automaton.make_automaton()
+        else:
+            self._pattern = re.compile(_trie_pattern(self.terms))
+        logger.info(
+            "Compiled %d terms (%s)",
+            len(self.terms),
+            "Aho-Corasick" if use_automaton else "trie regex",
+        )
+
+    def fold(self, text: str) -> str:
+        """Return text as compared: case-folded and/or without whitespace."""
+        if self.ignore_whitespace:
+            text = "".join(_NON_SPACE.findall(text))
+        if self.ignore_case:
+            text = text.casefold()
+        return text
+
+    def _folded_page(self, text: str) -> tuple[str, list[int], list[int]]:
+        """Fold a page, keeping the offsets needed to map matches back.
+
+        Returns the folded text and two parallel lists: folded offsets where
+        a run starts and the original offsets of those runs.
+        """
+        if self.ignore_whitespace:
+            runs = [(m.start(), m.group()) for m in _NON_SPACE.finditer(text)]
+        else:
+            runs = [(0, text)]
+
+        parts: list[str] = []
+        folded_starts: list[int] = []
+        original_starts: list[int] = []
+        size = 0
+        for start, run in runs:
+            folded = run.casefold() if self.ignore_case else run
+            if len(folded) == len(run):
+                folded_starts.append(size)
+                original_starts.append(start)
+            else:
+                # Folding changed the length (e.g. "ß" -> "ss"): map every
+                # folded char back to the char it came from
+                folded = ""
+                for i, char in enumerate(run):
+                    for folded_char in char.casefold():
+                        folded_starts.append(size + len(folded))
+                        original_starts.append(start + i)
+                        folded += folded_char
+            parts.append(folded)
+            size += len(folded)
+        return "".join(parts), folded_starts, original_starts
+
+    def _find(
+        self, text: str, accept: Callable[[int, int], tuple[int, int] | None]
+    ) -> Iterator[tuple[int, int]]:
+        """Yield leftmost-longest key occurrences that ``accept`` keeps.
+
+        ``accept`` maps a candidate (start, end) of ``text`` to the span to
+        report, or None to reject it; a rejected occurrence does not hide a
+        shorter (or later) one that is accepted.
+        """
+        position = 0
+        if self._automaton is not None:
+            # Every occurrence, by start and then longest first
+            found = sorted(
+                (end + 1 - length, -length)
+                for end, length in self._automaton.iter(text)
+            )
+            for start, negative_length in found:
+                if start >= position:
+                    span = accept(start, start - negative_length)
+                    if span is not None:
+                        position = start - negative_length
+                        yield span
+            return
+
+        while match := self._pattern.search(text, position):
+            start, longest = match.span()
+            position = start + 1
+            # The longest key here, then any shorter keys it starts with
+            for end in range(longest, start, -1):
+                if end == longest or text[start:end] in self.terms:
+                    span = accept(start, end)
+                    if span is not None:
+                        position = end
+                        yield span
+                        break
+
+    def scan(self, text: str) -> list[TermSpan]:
+        """Return term occurrences in a page, as spans of the original text.
+
+        Occurrences continuing a word (a letter or digit right before or
+        after a term that starts or ends with one) are skipped, so
+        ``FG-001`` is not reported inside ``FG-0012``; a shorter term at the
+        same place still is (``P-101`` in ``P-101-AB``).
+        """
+        if self.ignore_case or self.ignore_whitespace:
+            folded, folded_starts, original_starts = self._folded_page(text)
+        else:
+            folded, folded_starts, original_starts = text, [0], [0]
+
+        def original(offset: int) -> int:
+            run = bisect_right(folded_starts, offset) - 1
+            return original_starts[run] + offset - folded_starts[run]
+
+        def accept(start: int, end: int) -> tuple[int, int] | None:
+            start, end = original(start), original(end - 1) + 1
+            if start > 0 and text[start].isalnum() and text[start - 1].isalnum():
+                return None
+            if end < len(text) and text[end - 1].isalnum() and text[end].isalnum():
+                return None
+            return start, end
+
+        return [
+            (start, end, text[start:end], None)
+            for start, end in self._find(folded, accept)
+        ]
+
+    def missing(self, found: Iterable[str]) -> list[str]:
+        """Return the terms matching none of the ``found`` match texts."""
+        seen = {self.fold(text) for text in found}
+        return [term for key, term in self.terms.items() if key not in seen]
+
+
+@lru_cache(maxsize=TERM_DICTIONARY_CACHE_SIZE)
+def _cached_dictionary(
+    terms: tuple[str, ...], ignore_case: bool, ignore_whitespace: bool
+) -> TermDictionary:
+    return TermDictionary(terms, ignore_case, ignore_whitespace)
+
+
+def term_dictionary(
+    terms: Iterable[str], ignore_case: bool = False, ignore_whitespace: bool = False
+) -> TermDictionary:
+    """Return the compiled dictionary for a term list, built once per list."""
+    return _cached_dictionary(tuple(terms), ignore_case, ignore_whitespace)
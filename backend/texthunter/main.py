@@ -1,7 +1,9 @@
 """TextHunter API - FastAPI application for PDF text pattern extraction."""
 
+import argparse
 import asyncio
 import logging
+import multiprocessing
 import os
 import signal
 import sys
@@ -12,8 +14,10 @@ import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from texthunter.api.admission import BodySizeLimitMiddleware
 from texthunter.api.routes import router
-from texthunter.config.settings import CORS_ORIGINS
+from texthunter.api.wire import CompressionMiddleware
+from texthunter.config.settings import CORS_ORIGINS, WORKERS
 
 # Configure logging
 logging.basicConfig(
@@ -50,6 +54,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(BodySizeLimitMiddleware)
 
 
 app.include_router(router)
@@ -70,6 +76,7 @@ async def root() -> dict[str, str]:
 
 from texthunter.license import validate_license, clear_license
 
+
 @app.get("/v1/connect")
 async def connect() -> dict:
     """Connection endpoint for Tauri sidecar."""
@@ -147,11 +154,34 @@ def start_input_thread():
         logger.error(f"Failed to start input handler: {e}")
 
 
-def run_server() -> None:
-    """Run the TextHunter API server."""
-    uvicorn.run("texthunter.main:app", host="localhost", port=PORT_API, reload=False)
+def run_server(argv: list[str] | None = None) -> None:
+    """Run the TextHunter API server.
+
+    With ``--workers N`` (or ``TEXTHUNTER_WORKERS``) uvicorn starts N worker
+    processes. They share uploaded corpora, cached results, jobs and query
+    cancellation through the on-disk store; each enforces an equal share of
+    the admission limits.
+    """
+    parser = argparse.ArgumentParser(prog="texthunter", description=app.description)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=PORT_API)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args(argv)
+
+    logger.info("Starting %d worker(s) on %s:%d", args.workers, args.host, args.port)
+    # Workers are fresh interpreters; they size their admission limits by this
+    os.environ["TEXTHUNTER_WORKERS"] = str(args.workers)
+    uvicorn.run(
+        "texthunter.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        reload=False,
+    )
 
 
 if __name__ == "__main__":
+    # Export worker processes re-run this entry point in frozen builds
+    multiprocessing.freeze_support()
     start_input_thread()
     start_api_server()